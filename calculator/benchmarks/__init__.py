@@ -0,0 +1,5 @@
+# calculator/benchmarks/__init__.py
+"""
+Benchmark scripts
+Đo hiệu năng các thành phần tính toán, chạy bằng: python -m benchmarks.<tên>
+"""
@@ -0,0 +1,163 @@
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpora import load_corpora
+from core.cache import PersistentResultCache
+from core.pool import EnginePool
+from core.stateless import StatelessCalculator
+from utils.metrics import StageMetrics
+
+SWITCH_INTERVAL = 1e-6  # đổi thread thường xuyên để lộ race condition
+CACHE_MAX_ENTRIES = 200  # cache nhỏ để thường xuyên flush/evict trong lúc nhiều thread cùng đọc ghi
+
+def load_expressions() -> List[str]:
+    corpora = load_corpora()
+    return corpora['short'] + corpora['long'] + corpora['functions'] + corpora['errors']
+
+def expected_results(expressions: List[str]) -> Dict[str, Tuple]:
+    calculator = StatelessCalculator()
+    results = {}
+    for expression in expressions:
+        result = calculator.evaluate(expression)
+        results[expression] = (result.value, result.error_code)
+    return results
+
+class StressRun:
+    def __init__(self, pool: EnginePool, expressions: List[str], expected: Dict[str, Tuple],
+                 iterations: int):
+        self.pool = pool
+        self.expressions = expressions
+        self.expected = expected
+        self.iterations = iterations
+        
+        self.failures: List[str] = []
+        self.evaluations = 0
+        self._lock = threading.Lock()
+    
+    def fail(self, message: str) -> None:
+        with self._lock:
+            if len(self.failures) < 20:
+                self.failures.append(message)
+    
+    def worker(self, seed: int) -> None:
+        rng = random.Random(seed)
+        evaluations = 0
+        
+        try:
+            for _ in range(self.iterations):
+                expressions = rng.sample(self.expressions, len(self.expressions))
+                evaluations += self.check_stateless(expressions)
+                evaluations += self.check_session(rng.sample(self.expressions, 8))
+        except Exception as e:
+            self.fail(f"thread {seed}: {type(e).__name__}: {e}")
+        
+        with self._lock:
+            self.evaluations += evaluations
+    
+    def check_stateless(self, expressions: List[str]) -> int:
+        for expression in expressions:
+            result = self.pool.evaluate(expression)
+            if (result.value, result.error_code) != self.expected[expression]:
+                self.fail(f"evaluate({expression!r}) = {(result.value, result.error_code)}, "
+                          f"mong đợi {self.expected[expression]}")
+        return len(expressions)
+    
+    def check_session(self, expressions: List[str]) -> int:
+        # Trạng thái phiên (last_result, lịch sử) phải chỉ phản ánh các phép tính của chính phiên này
+        with self.pool.session() as engine:
+            if engine.history.history or engine.last_result != "0":
+                self.fail("engine mượn từ pool còn trạng thái của phiên trước")
+            
+            successes = 0
+            for expression in expressions:
+                result = engine.try_calculate_expression(expression)
+                if (result.value, result.error_code) != self.expected[expression]:
+                    self.fail(f"session {expression!r} = {(result.value, result.error_code)}")
+                
+                value, error_code = self.expected[expression]
+                if error_code is None and expression.strip():
+                    engine.calculate_expression(expression)
+                    successes += 1
+                    if engine.last_result != value:
+                        self.fail(f"last_result {engine.last_result!r} != {value!r} sau {expression!r}")
+            
+            if len(engine.history.history) != successes:
+                self.fail(f"lịch sử có {len(engine.history.history)} mục, mong đợi {successes}")
+        
+        return len(expressions) + successes
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Kiểm tra race condition của evaluate() và EnginePool")
+    parser.add_argument("--threads", type=int, default=16, help="Số thread đồng thời")
+    parser.add_argument("--iterations", type=int, default=5, help="Số vòng qua corpus của mỗi thread")
+    parser.add_argument("--pool-size", type=int, default=4, help="Số engine trong pool")
+    args = parser.parse_args(argv)
+    
+    logging.disable(logging.CRITICAL)
+    expressions = load_expressions()
+    expected = expected_results(expressions)
+    
+    previous_interval = sys.getswitchinterval()
+    sys.setswitchinterval(SWITCH_INTERVAL)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        result_cache = PersistentResultCache(os.path.join(directory, "cache.db"),
+                                             max_entries=CACHE_MAX_ENTRIES, warm_entries=50, flush_interval=8)
+        metrics = StageMetrics(enabled=True)
+        pool = EnginePool(args.pool_size, result_cache, metrics=metrics)
+        run = StressRun(pool, expressions, expected, args.iterations)
+        
+        threads = [threading.Thread(target=run.worker, args=(seed,)) for seed in range(args.threads)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        
+        sys.setswitchinterval(previous_interval)
+        result_cache.close()
+        
+        # Kết quả ghi từ các thread phải xuống được đĩa (sqlite từ chối kết nối dùng chéo thread)
+        with sqlite3.connect(result_cache.path) as connection:
+            stored = connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        # Corpus có nhiều hơn CACHE_MAX_ENTRIES kết quả khác nhau nên cache phải đầy
+        if stored < CACHE_MAX_ENTRIES:
+            run.fail(f"chỉ {stored}/{CACHE_MAX_ENTRIES} kết quả xuống được đĩa: flush từ các thread bị lỗi")
+    
+    for stage, histogram in metrics.histograms.items():
+        if sum(histogram.counts) != histogram.count:
+            run.fail(f"histogram '{stage}' mất cập nhật: {sum(histogram.counts)} != {histogram.count}")
+    
+    counters = metrics.counter_snapshot().get('calculations', {})
+    recorded = counters.get('ok', 0) + counters.get('error', 0)
+    if recorded != run.evaluations:
+        run.fail(f"metrics ghi {recorded} phép tính, thực tế {run.evaluations}")
+    
+    stats = pool.get_stats()
+    if stats['created'] > args.pool_size or stats['idle'] != stats['created']:
+        run.fail(f"pool không nhất quán: {stats}")
+    
+    print(f"{run.evaluations} phép tính trên {args.threads} thread trong {elapsed:.2f}s, pool: {stats}")
+    for failure in run.failures:
+        print(f"  ❌ {failure}")
+    
+    if run.failures:
+        print("Phát hiện lỗi đồng thời")
+        return 1
+    
+    print("Không phát hiện race condition")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
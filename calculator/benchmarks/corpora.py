@@ -0,0 +1,71 @@
+import random
+from typing import Dict, List
+
+CORPUS_SEED = 2024
+CORPUS_SIZE = 200
+
+def _number(rng: random.Random) -> str:
+    return str(rng.randint(1, 9999))
+
+def _arithmetic(rng: random.Random, terms: int) -> str:
+    parts = [_number(rng)]
+    for _ in range(terms - 1):
+        parts.append(rng.choice('+-*/'))
+        if rng.random() < 0.2:
+            parts.append(f"({_number(rng)}{rng.choice('+-')}{_number(rng)})")
+        else:
+            parts.append(_number(rng))
+    return ''.join(parts)
+
+def short_expressions(rng: random.Random) -> List[str]:
+    return [_arithmetic(rng, rng.randint(2, 4)) for _ in range(CORPUS_SIZE)]
+
+def long_expressions(rng: random.Random) -> List[str]:
+    # Gần MAX_EXPRESSION_LENGTH để vẫn qua được validator
+    expressions = []
+    while len(expressions) < CORPUS_SIZE:
+        expression = _arithmetic(rng, 18)
+        if len(expression) <= 100:
+            expressions.append(expression)
+    return expressions
+
+def function_expressions(rng: random.Random) -> List[str]:
+    functions = ['sqrt', 'abs', 'sin', 'cos', 'log', 'fact']
+    expressions = []
+    for _ in range(CORPUS_SIZE):
+        inner = _arithmetic(rng, rng.randint(1, 3))
+        outer = rng.choice(functions)
+        if outer == 'fact':
+            inner = str(rng.randint(1, 30))
+        expressions.append(f"{outer}({inner})+{rng.choice(functions[:3])}({_number(rng)})")
+    return expressions
+
+def error_expressions(rng: random.Random) -> List[str]:
+    templates = ['{a}/0', '({a}+{b}', '{a}++{b}', '{a}+', '*{a}', '{a}.{b}.{a}', '{a}+x{b}', '()', '{a})+({b}']
+    return [
+        rng.choice(templates).format(a=_number(rng), b=_number(rng))
+        for _ in range(CORPUS_SIZE)
+    ]
+
+def keystroke_sequences(rng: random.Random) -> List[List[str]]:
+    sequences = []
+    for expression in short_expressions(rng):
+        keys = list(expression)
+        if rng.random() < 0.3:
+            keys.extend(['CE', rng.choice('0123456789')])
+        if rng.random() < 0.2:
+            keys.append('±')
+        keys.append('=')
+        sequences.append(keys)
+    return sequences
+
+def load_corpora(seed: int = CORPUS_SEED) -> Dict[str, List[str]]:
+    return {
+        'short': short_expressions(random.Random(seed)),
+        'long': long_expressions(random.Random(seed + 1)),
+        'functions': function_expressions(random.Random(seed + 2)),
+        'errors': error_expressions(random.Random(seed + 3))
+    }
+
+def load_keystrokes(seed: int = CORPUS_SEED) -> List[List[str]]:
+    return keystroke_sequences(random.Random(seed + 4))
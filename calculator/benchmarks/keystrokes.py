@@ -0,0 +1,68 @@
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import Callable, Dict
+
+DEFAULT_TREE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_KEYS = "12.5+7*3-48/6"  # một biểu thức gõ từng phím, chưa bấm '='
+EXPRESSION = "12.5+7*3-48/6"
+DEFAULT_ROUNDS = 2000
+DEFAULT_REPEAT = 7
+
+def best_of(step: Callable[[], None], rounds: int, repeat: int, operations: int) -> float:
+    # Lấy lần đo nhanh nhất: nhiễu của máy chỉ làm chậm đi
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            step()
+        elapsed = (time.perf_counter() - start) / (rounds * operations) * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def run(rounds: int, repeat: int) -> Dict[str, float]:
+    # Chỉ dùng API có từ bản gốc để chạy được cả trên cây mã cũ (--tree) khi so sánh
+    from core.calculator import CalculatorEngine
+    
+    engine = CalculatorEngine()
+    
+    def type_entry() -> None:
+        for key in ENTRY_KEYS:
+            engine.handle_button_press(key)
+        engine.handle_button_press('C')
+    
+    def type_and_equals() -> None:
+        for key in ENTRY_KEYS:
+            engine.handle_button_press(key)
+        engine.handle_button_press('=')
+        engine.handle_button_press('C')
+    
+    def calculate() -> None:
+        engine.calculate_expression(EXPRESSION)
+    
+    return {
+        'µs/phím (chưa bấm =)': best_of(type_entry, rounds, repeat, len(ENTRY_KEYS) + 1),
+        'µs/biểu thức (gõ + =)': best_of(type_and_equals, rounds, repeat, 1),
+        'µs/calculate_expression': best_of(calculate, rounds, repeat, 1)
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Đo độ trễ nhập phím và '=' của CalculatorEngine")
+    parser.add_argument("--tree", default=DEFAULT_TREE,
+                        help="Thư mục calculator cần đo, ví dụ bản checkout cũ để so sánh (mặc định: cây hiện tại)")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="Số vòng mỗi lần đo")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Số lần đo, lấy giá trị nhỏ nhất")
+    args = parser.parse_args(argv)
+    
+    sys.path.insert(0, os.path.abspath(args.tree))
+    logging.disable(logging.CRITICAL)
+    
+    print(f"Cây mã: {os.path.abspath(args.tree)}")
+    for name, value in run(args.rounds, args.repeat).items():
+        print(f"{name:<28}{value:>10.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.streaming import StreamingEvaluator
+from core.parser import SafeCalculatorEngine
+from core.cost import EvaluationBudget
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+
+def generate_expression(size: int, seed: int = 42, max_depth: int = 3) -> str:
+    rng = random.Random(seed)
+    parts: List[str] = []
+    length = 0
+    
+    while length < size:
+        depth = rng.randint(0, max_depth)
+        term = f"{rng.randint(1, 999)}*{rng.randint(1, 99)}+{rng.randint(1, 9)}/{rng.randint(1, 9)}"
+        for _ in range(depth):
+            term = f"({term})*{rng.randint(1, 9)}"
+        parts.append(term)
+        parts.append(rng.choice('+-'))
+        length += len(term) + 1
+    
+    parts.append('1')
+    return ''.join(parts)
+
+def measure_streaming(path: str, with_memory: bool) -> Dict[str, float]:
+    evaluator = StreamingEvaluator()
+    
+    start = time.perf_counter()
+    evaluator.evaluate_file(path)
+    elapsed = time.perf_counter() - start
+    
+    result = {'seconds': elapsed}
+    
+    if with_memory:
+        tracemalloc.start()
+        evaluator.evaluate_file(path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['peak_kib'] = peak / 1024
+    
+    return result
+
+def measure_pipeline(expression: str) -> float:
+    engine = SafeCalculatorEngine(budget=EvaluationBudget.unlimited())
+    
+    start = time.perf_counter()
+    engine.try_calculate(expression)
+    return time.perf_counter() - start
+
+def run(sizes: List[int], with_memory: bool, compare_limit: int) -> List[Dict[str, float]]:
+    rows = []
+    
+    for size in sizes:
+        expression = generate_expression(size)
+        
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as handle:
+            handle.write(expression)
+            path = handle.name
+        
+        try:
+            row = {'chars': len(expression)}
+            row.update(measure_streaming(path, with_memory))
+            row['us_per_char'] = row['seconds'] / len(expression) * 1e6
+            
+            if len(expression) <= compare_limit:
+                row['pipeline_seconds'] = measure_pipeline(expression)
+            
+            rows.append(row)
+            print(format_row(row), flush=True)
+        finally:
+            os.unlink(path)
+    
+    return rows
+
+def format_row(row: Dict[str, float]) -> str:
+    text = f"{int(row['chars']):>12,} chars  {row['seconds']:8.3f} s  {row['us_per_char']:6.3f} µs/char"
+    if 'peak_kib' in row:
+        text += f"  peak {row['peak_kib']:8.1f} KiB"
+    if 'pipeline_seconds' in row:
+        text += f"  (pipeline {row['pipeline_seconds']:.3f} s)"
+    return text
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Scaling benchmark cho chế độ biểu thức lớn")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Kích thước biểu thức (ký tự)")
+    parser.add_argument("--memory", action="store_true",
+                        help="Đo thêm bộ nhớ đỉnh bằng tracemalloc (chậm hơn)")
+    parser.add_argument("--compare-limit", type=int, default=1_000_000,
+                        help="Chạy thêm pipeline thường cho biểu thức đến kích thước này")
+    args = parser.parse_args(argv)
+    
+    logging.disable(logging.CRITICAL)
+    rows = run(args.sizes, args.memory, args.compare_limit)
+    
+    # Tuyến tính: thời gian trên mỗi ký tự không được tăng đáng kể theo kích thước
+    ratio = rows[-1]['us_per_char'] / rows[0]['us_per_char']
+    print(f"µs/char largest/smallest: {ratio:.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
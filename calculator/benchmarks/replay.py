@@ -0,0 +1,225 @@
+import argparse
+import heapq
+import json
+import logging
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpora import load_keystrokes
+from core.calculator import CalculatorEngine
+from utils.constants import REPLAY_MAX_GAP, REPLAY_GUI_TIMEOUT
+from utils.metrics import LatencyHistogram
+from utils.recording import RecordedEvent, load_recording
+
+SYNTHETIC_KEY_INTERVAL = 0.15  # giây giữa hai phím của phiên tổng hợp (tốc độ gõ trung bình)
+SLOWEST_EVENTS = 5
+
+# Phím -> keysym của Tk, dùng khi bản ghi là nút bấm hoặc phiên tổng hợp
+KEYSYMS = {
+    '+': 'plus', '-': 'minus', '*': 'asterisk', '/': 'slash', '.': 'period', '%': 'percent',
+    '=': 'Return', 'C': 'Escape', 'CE': 'BackSpace'
+}
+
+def classify(event: RecordedEvent) -> str:
+    if event.source == "memory":
+        return "memory"
+    if event.value in ('0', '1', '2', '3', '4', '5', '6', '7', '8', '9', '.'):
+        return "number"
+    if event.value in ('+', '-', '*', '/'):
+        return "operator"
+    if event.value == '=':
+        return "equals"
+    return "function"
+
+def synthetic_session() -> List[RecordedEvent]:
+    events = []
+    for sequence in load_keystrokes():
+        for key in sequence:
+            events.append(RecordedEvent(len(events) * SYNTHETIC_KEY_INTERVAL, "key", key, KEYSYMS.get(key, key)))
+    return events
+
+class ReplayReport:
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {'all': LatencyHistogram()}
+        self.slowest: List[Tuple[int, int, int, RecordedEvent]] = []
+        self._sequence = 0
+        self.skipped = 0
+    
+    def record(self, index: int, event: RecordedEvent, duration_ns: int) -> None:
+        self.histograms['all'].record(duration_ns)
+        self.histograms.setdefault(classify(event), LatencyHistogram()).record(duration_ns)
+        
+        # Heap nhỏ nhất giữ SLOWEST_EVENTS sự kiện chậm nhất; số thứ tự tránh so sánh RecordedEvent
+        self._sequence += 1
+        item = (duration_ns, self._sequence, index, event)
+        if len(self.slowest) < SLOWEST_EVENTS:
+            heapq.heappush(self.slowest, item)
+        elif duration_ns > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, item)
+    
+    def to_dict(self) -> Dict[str, object]:
+        slowest = sorted(self.slowest, reverse=True)
+        return {
+            'latency': {name: histogram.snapshot() for name, histogram in self.histograms.items()},
+            'skipped': self.skipped,
+            'slowest': [
+                {'index': index, 'value': event.value, 'source': event.source, 'us': duration_ns / 1000}
+                for duration_ns, _, index, event in slowest
+            ]
+        }
+    
+    def print_table(self) -> None:
+        report = self.to_dict()
+        print(f"{'loại':<10}{'số lượng':>10}{'mean µs':>10}{'p50 µs':>10}{'p95 µs':>10}{'p99 µs':>10}{'max µs':>10}")
+        for name, row in report['latency'].items():
+            print(f"{name:<10}{row['count']:>10}{row['mean_us']:>10.1f}{row['p50_us']:>10.1f}"
+                  f"{row['p95_us']:>10.1f}{row['p99_us']:>10.1f}{row['max_us']:>10.1f}")
+        
+        if report['skipped']:
+            print(f"Bỏ qua {report['skipped']} sự kiện không phát lại được")
+        print("Chậm nhất:")
+        for item in report['slowest']:
+            print(f"  #{item['index']:<6} {item['source']:<7} {item['value']!r:<8} {item['us']:>10.1f} µs")
+
+def wait_for_gap(events: List[RecordedEvent], index: int, started: float,
+                 idle: Callable[[], None]) -> None:
+    # Giữ nhịp gõ của bản ghi để các tác vụ hẹn giờ (preview, render) chen vào như khi dùng thật
+    if index == 0:
+        return
+    
+    gap = min(events[index].time - events[index - 1].time, REPLAY_MAX_GAP)
+    deadline = started + gap
+    while time.perf_counter() < deadline:
+        idle()
+
+def replay_engine(events: List[RecordedEvent], report: ReplayReport, pace: bool) -> None:
+    engine = CalculatorEngine()
+    display = "0"
+    previous = time.perf_counter()
+    
+    for index, event in enumerate(events):
+        if pace:
+            wait_for_gap(events, index, previous, lambda: time.sleep(0.001))
+        previous = time.perf_counter()
+        
+        if event.value == "cancel":
+            # Không có phép tính nền để hủy khi chạy trực tiếp trên engine
+            report.skipped += 1
+            continue
+        
+        start = time.perf_counter_ns()
+        if event.source == "memory":
+            display = apply_memory(engine, event.value, display)
+        else:
+            display = engine.handle_button_press(event.value)
+        report.record(index, event, time.perf_counter_ns() - start)
+
+def apply_memory(engine: CalculatorEngine, operation: str, display: str) -> str:
+    if operation == "MS":
+        engine.memory_store(display)
+    elif operation == "MR":
+        return engine.memory_recall()
+    elif operation == "MC":
+        engine.memory_clear()
+    elif operation == "M+":
+        engine.memory_add(display)
+    elif operation == "M-":
+        engine.memory_subtract(display)
+    return display
+
+def replay_gui(events: List[RecordedEvent], report: ReplayReport, pace: bool) -> None:
+    from gui.main_window import CalculatorMainWindow
+    
+    window = CalculatorMainWindow()
+    root = window.root
+    root.update()
+    previous = time.perf_counter()
+    
+    try:
+        for index, event in enumerate(events):
+            if pace:
+                wait_for_gap(events, index, previous, root.update)
+            previous = time.perf_counter()
+            
+            start = time.perf_counter_ns()
+            if event.source == "memory":
+                window.memory_panel.memory_callback(event.value)
+            elif event.source == "button" and window.button_grid.get_button(event.value) is not None:
+                window.button_grid.get_button(event.value).invoke()
+            else:
+                keysym = event.keysym or KEYSYMS.get(event.value, event.value)
+                root.event_generate('<KeyPress>', keysym=keysym)
+            
+            # Độ trễ tính đến khi kết quả đã lên màn hình: chờ phép tính nền và lượt render
+            deadline = time.perf_counter() + REPLAY_GUI_TIMEOUT
+            while window.evaluator.is_pending and time.perf_counter() < deadline:
+                root.update()
+            root.update_idletasks()
+            report.record(index, event, time.perf_counter_ns() - start)
+    
+    finally:
+        window.evaluator.shutdown()
+        root.destroy()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Phát lại phiên đã ghi (--record) và đo độ trễ từng phím")
+    parser.add_argument("recording", nargs="?", default=None,
+                        help="File ghi phiên (JSON mỗi dòng); bỏ trống để dùng phiên tổng hợp từ corpus phím")
+    parser.add_argument("--gui", action="store_true",
+                        help="Phát lại trên cửa sổ Tk thật bằng event_generate (cần màn hình)")
+    parser.add_argument("--pace", action="store_true",
+                        help=f"Giữ khoảng nghỉ giữa các phím như bản ghi (tối đa {REPLAY_MAX_GAP:g} giây)")
+    parser.add_argument("--repeat", type=int, default=1, help="Số lần phát lại toàn bộ phiên")
+    parser.add_argument("--with-logging", action="store_true",
+                        help="Giữ logging như khi chạy ứng dụng (mặc định tắt để không đo I/O log)")
+    parser.add_argument("--json", action="store_true", help="In kết quả dạng JSON")
+    args = parser.parse_args(argv)
+    
+    if not args.with_logging:
+        logging.disable(logging.CRITICAL)
+    
+    try:
+        events = load_recording(args.recording) if args.recording else synthetic_session()
+    except (OSError, ValueError) as e:
+        print(f"Không đọc được bản ghi: {e}")
+        return 1
+    
+    if not events:
+        print("Bản ghi không có sự kiện nào")
+        return 1
+    
+    report = ReplayReport()
+    replay = replay_engine
+    display_errors: tuple = ()
+    
+    if args.gui:
+        try:
+            import tkinter
+        except ImportError as e:
+            print(f"Không tải được Tk: {e}")
+            return 1
+        replay = replay_gui
+        display_errors = (tkinter.TclError,)
+    
+    try:
+        for _ in range(max(1, args.repeat)):
+            replay(events, report, args.pace)
+    except display_errors as e:
+        print(f"Không mở được cửa sổ Tk (cần màn hình, ví dụ DISPLAY hoặc xvfb-run): {e}")
+        return 1
+    
+    if args.json:
+        print(json.dumps(report.to_dict(), ensure_ascii=False, indent=2))
+    else:
+        print(f"Phát lại {len(events)} sự kiện x {max(1, args.repeat)} lần trên "
+              f"{'GUI' if args.gui else 'CalculatorEngine'}")
+        report.print_table()
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
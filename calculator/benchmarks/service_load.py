@@ -0,0 +1,131 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpora import load_corpora
+from utils.metrics import LatencyHistogram
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+STARTUP_TIMEOUT = 10.0
+
+def load_expressions() -> List[str]:
+    corpora = load_corpora()
+    return corpora['short'] + corpora['long'] + corpora['functions'] + corpora['errors']
+
+async def run_connection(socket_path: str, expressions, requests: int, pipeline: int,
+                         histogram: LatencyHistogram, counts: Dict[str, int]) -> None:
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    sent_at: Dict[int, int] = {}
+    window = asyncio.Semaphore(pipeline)
+    
+    async def receive() -> None:
+        for _ in range(requests):
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("service closed the connection")
+            
+            response = json.loads(line)
+            histogram.record(time.perf_counter_ns() - sent_at.pop(response['id']))
+            counts['ok' if response.get('ok') else 'error'] += 1
+            window.release()
+    
+    receiver = asyncio.create_task(receive())
+    
+    for request_id in range(requests):
+        await window.acquire()
+        sent_at[request_id] = time.perf_counter_ns()
+        writer.write(json.dumps({'id': request_id, 'expression': next(expressions)}).encode('utf-8') + b"\n")
+        if window.locked():
+            await writer.drain()
+    
+    await writer.drain()
+    await receiver
+    writer.close()
+    await writer.wait_closed()
+
+async def run_load(socket_path: str, connections: int, requests: int, pipeline: int) -> Dict[str, float]:
+    expressions = itertools.cycle(load_expressions())
+    histogram = LatencyHistogram()
+    counts = {'ok': 0, 'error': 0}
+    per_connection = max(1, requests // connections)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        run_connection(socket_path, expressions, per_connection, pipeline, histogram, counts)
+        for _ in range(connections)
+    ])
+    elapsed = time.perf_counter() - start
+    
+    snapshot = histogram.snapshot()
+    total = counts['ok'] + counts['error']
+    return {
+        'requests': total,
+        'errors': counts['error'],
+        'seconds': elapsed,
+        'requests_per_second': total / elapsed if elapsed else 0.0,
+        'p50_us': snapshot['p50_us'],
+        'p95_us': snapshot['p95_us'],
+        'p99_us': snapshot['p99_us'],
+        'max_us': snapshot['max_us']
+    }
+
+def start_service(socket_path: str) -> subprocess.Popen:
+    process = subprocess.Popen([sys.executable, MAIN_SCRIPT, "--serve", socket_path],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while not os.path.exists(socket_path):
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            raise RuntimeError("Không khởi động được dịch vụ tính toán")
+        time.sleep(0.05)
+    
+    return process
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Đo tải dịch vụ tính toán qua Unix socket")
+    parser.add_argument("--socket", default=None,
+                        help="Socket của dịch vụ đang chạy (mặc định: tự khởi động dịch vụ tạm)")
+    parser.add_argument("--connections", type=int, default=8, help="Số kết nối đồng thời")
+    parser.add_argument("--requests", type=int, default=20000, help="Tổng số yêu cầu")
+    parser.add_argument("--pipeline", type=int, default=32, help="Số yêu cầu gửi dồn tối đa trên mỗi kết nối")
+    parser.add_argument("--json", action="store_true", help="In kết quả dạng JSON")
+    args = parser.parse_args(argv)
+    
+    process: Optional[subprocess.Popen] = None
+    socket_path = args.socket
+    
+    with tempfile.TemporaryDirectory() as directory:
+        if socket_path is None:
+            socket_path = os.path.join(directory, "calculator.sock")
+            process = start_service(socket_path)
+        
+        try:
+            report = asyncio.run(run_load(socket_path, max(1, args.connections),
+                                          args.requests, max(1, args.pipeline)))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+    
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['requests']} yêu cầu ({report['errors']} lỗi) trong {report['seconds']:.2f}s "
+              f"-> {report['requests_per_second']:,.0f} yêu cầu/giây")
+        print(f"latency p50={report['p50_us']:.0f}µs p95={report['p95_us']:.0f}µs "
+              f"p99={report['p99_us']:.0f}µs max={report['max_us']:.0f}µs")
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import argparse
+import gc
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.calculator import CalculatorEngine, CalculatorSession
+from core.stateless import StatelessCalculator
+from utils.constants import SESSION_SNAPSHOT_HISTORY
+
+ACTIVE_KEYS = "12+7*3="  # một phép tính đầy đủ: có buffer và một mục lịch sử
+
+def measure(factory: Callable[[], object], count: int, keys: str = "") -> Dict[str, float]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    
+    start = time.perf_counter()
+    objects: List[object] = []
+    for _ in range(count):
+        session = factory()
+        for key in keys:
+            session.handle_button_press(key)
+        objects.append(session)
+    elapsed = time.perf_counter() - start
+    
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    
+    # Danh sách chứa các đối tượng cũng được tính: 8 byte mỗi phần tử
+    return {
+        'count': count,
+        'bytes_per_session': used / count,
+        'total_mb': used / (1024 * 1024),
+        'create_us': elapsed / count * 1e6
+    }
+
+def measure_snapshot(shared: StatelessCalculator, history_entries: int, rounds: int) -> Dict[str, float]:
+    session = CalculatorSession(shared)
+    for i in range(history_entries):
+        session.calculate_expression(f"{i}*7+1")
+    for key in "12+3.5":
+        session.handle_button_press(key)
+    
+    data = session.snapshot()
+    restored = CalculatorSession(shared)
+    restored.restore(data)
+    expected = dict(session.get_current_state(), history_count=min(history_entries, SESSION_SNAPSHOT_HISTORY))
+    if restored.get_current_state() != expected:
+        raise AssertionError("Trạng thái sau khi khôi phục không khớp")
+    
+    start = time.perf_counter()
+    for _ in range(rounds):
+        CalculatorSession(shared).restore(session.snapshot())
+    elapsed = time.perf_counter() - start
+    
+    return {
+        'history': min(history_entries, SESSION_SNAPSHOT_HISTORY),
+        'bytes': len(data),
+        'round_trip_us': elapsed / rounds * 1e6
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Đo bộ nhớ cho mỗi phiên tính toán")
+    parser.add_argument("--sessions", type=int, default=100000, help="Số CalculatorSession tạo ra")
+    parser.add_argument("--engines", type=int, default=1000,
+                        help="Số CalculatorEngine để so sánh (mỗi engine có parser/validator riêng)")
+    parser.add_argument("--snapshot-rounds", type=int, default=10000,
+                        help="Số vòng snapshot + restore để đo thời gian")
+    args = parser.parse_args(argv)
+    
+    logging.disable(logging.CRITICAL)
+    shared = StatelessCalculator()
+    
+    rows = [
+        ("CalculatorEngine (rảnh)", measure(CalculatorEngine, args.engines)),
+        ("CalculatorEngine (đã tính)", measure(CalculatorEngine, args.engines, ACTIVE_KEYS)),
+        ("CalculatorSession (rảnh)", measure(lambda: CalculatorSession(shared), args.sessions)),
+        ("CalculatorSession (đã tính)", measure(lambda: CalculatorSession(shared), args.sessions, ACTIVE_KEYS))
+    ]
+    
+    print(f"{'loại':<30}{'số lượng':>10}{'byte/phiên':>14}{'tổng MB':>10}{'µs/phiên':>10}")
+    for name, row in rows:
+        print(f"{name:<30}{row['count']:>10}{row['bytes_per_session']:>14,.0f}"
+              f"{row['total_mb']:>10.1f}{row['create_us']:>10.1f}")
+    
+    print()
+    print(f"{'snapshot':<30}{'lịch sử':>10}{'byte':>14}{'µs/vòng':>10}")
+    for entries in (0, 1, SESSION_SNAPSHOT_HISTORY * 2):
+        row = measure_snapshot(shared, entries, args.snapshot_rounds)
+        print(f"{'snapshot + restore':<30}{row['history']:>10}{row['bytes']:>14,}{row['round_trip_us']:>10.1f}")
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpora import load_corpora, load_keystrokes
+from core.calculator import CalculatorEngine, CalculationHistory
+from core.parser import ExpressionTokenizer, ExpressionParser, ExpressionEvaluator
+from core.validator import ExpressionValidator, InputSanitizer
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.25  # chậm hơn baseline quá 25% được coi là regression
+DEFAULT_REPEAT = 5
+MIN_RUN_SECONDS = 0.05
+COMPARISONS = [("engine/handle_button_presses", "engine/handle_button_press")]
+
+class Benchmark:
+    def __init__(self, name: str, setup: Callable[[], Callable[[], Any]], operations: int):
+        self.name = name
+        self.setup = setup
+        self.operations = operations
+        
+        self._step: Optional[Callable[[], Any]] = None
+        self._loops = 1
+        self.best: Optional[float] = None
+    
+    def calibrate(self) -> None:
+        self._step = self.setup()
+        
+        # Tự chọn số vòng để mỗi lần đo đủ dài so với độ phân giải của đồng hồ
+        self._loops = 1
+        while self._time() < MIN_RUN_SECONDS:
+            self._loops *= 2
+    
+    def sample(self) -> float:
+        elapsed = self._time() / (self._loops * self.operations) * 1e9
+        self.best = elapsed if self.best is None else min(self.best, elapsed)
+        return elapsed
+    
+    def _time(self) -> float:
+        step = self._step
+        start = time.perf_counter()
+        for _ in range(self._loops):
+            step()
+        return time.perf_counter() - start
+
+def _each(function: Callable[[Any], Any], items: List[Any]) -> Callable[[], None]:
+    def step() -> None:
+        for item in items:
+            try:
+                function(item)
+            except Exception:
+                pass
+    return step
+
+def build_benchmarks() -> List[Benchmark]:
+    corpora = load_corpora()
+    keystrokes = load_keystrokes()
+    benchmarks: List[Benchmark] = []
+    
+    sanitizer = InputSanitizer()
+    validator = ExpressionValidator()
+    tokenizer = ExpressionTokenizer()
+    parser = ExpressionParser()
+    evaluator = ExpressionEvaluator()
+    
+    for corpus_name, expressions in corpora.items():
+        count = len(expressions)
+        
+        benchmarks.append(Benchmark(
+            f"sanitizer/{corpus_name}",
+            lambda items=expressions: _each(sanitizer.sanitize_calculator_input, items), count))
+        benchmarks.append(Benchmark(
+            f"validator/{corpus_name}",
+            lambda items=expressions: _each(validator.validate_expression, items), count))
+        benchmarks.append(Benchmark(
+            f"tokenizer/{corpus_name}",
+            lambda items=expressions: _each(tokenizer.tokenize, items), count))
+        benchmarks.append(Benchmark(
+            f"parser/{corpus_name}",
+            lambda items=expressions: _each(parser.parse, items), count))
+        benchmarks.append(Benchmark(
+            f"evaluator/{corpus_name}",
+            lambda items=expressions: _each(evaluator.evaluate, _parse_all(parser, items)), count))
+    
+    history_entries = [(expression, str(index)) for index, expression in enumerate(corpora['short'])]
+    benchmarks.append(Benchmark(
+        "history/add_calculation",
+        lambda: _history_add(history_entries), len(history_entries)))
+    benchmarks.append(Benchmark(
+        "history/export_import",
+        lambda: _history_round_trip(history_entries), 1))
+    
+    total_keys = sum(len(sequence) for sequence in keystrokes)
+    benchmarks.append(Benchmark(
+        "engine/handle_button_press",
+        lambda: _press_keys(keystrokes), total_keys))
+    benchmarks.append(Benchmark(
+        "engine/handle_button_presses",
+        lambda: _press_key_batches(keystrokes), total_keys))
+    
+    return benchmarks
+
+def _parse_all(parser: ExpressionParser, expressions: List[str]) -> List[Any]:
+    postfix_programs = []
+    for expression in expressions:
+        try:
+            postfix_programs.append(parser.parse(expression))
+        except Exception:
+            pass
+    return postfix_programs
+
+def _history_add(entries: List[tuple]) -> Callable[[], None]:
+    history = CalculationHistory()
+    
+    def step() -> None:
+        for expression, result in entries:
+            history.add_calculation(expression, result)
+    return step
+
+def _history_round_trip(entries: List[tuple]) -> Callable[[], None]:
+    source = CalculationHistory()
+    for expression, result in entries:
+        source.add_calculation(expression, result)
+    exported = source.export_to_json()
+    
+    def step() -> None:
+        CalculationHistory().import_from_json(exported)
+        source.export_to_json()
+    return step
+
+def _press_keys(sequences: List[List[str]]) -> Callable[[], None]:
+    engine = CalculatorEngine()
+    
+    def step() -> None:
+        for sequence in sequences:
+            for key in sequence:
+                engine.handle_button_press(key)
+    return step
+
+def _press_key_batches(sequences: List[List[str]]) -> Callable[[], None]:
+    engine = CalculatorEngine()
+    
+    def step() -> None:
+        for sequence in sequences:
+            engine.handle_button_presses(sequence)
+    return step
+
+def run_suite(name_filter: Optional[str] = None, repeat: int = DEFAULT_REPEAT) -> Dict[str, float]:
+    benchmarks = [
+        benchmark for benchmark in build_benchmarks()
+        if not name_filter or name_filter in benchmark.name
+    ]
+    
+    for benchmark in benchmarks:
+        benchmark.calibrate()
+    
+    # Đo xen kẽ theo vòng: nhiễu tạm thời của máy không dồn vào một benchmark duy nhất
+    for _ in range(repeat):
+        for benchmark in benchmarks:
+            benchmark.sample()
+    
+    results = {}
+    for benchmark in benchmarks:
+        results[benchmark.name] = benchmark.best
+        print(f"{benchmark.name:<32} {benchmark.best:>12.1f} ns/op", flush=True)
+    
+    print_ratios(results)
+    return results
+
+def print_ratios(results: Dict[str, float]) -> None:
+    # Các cặp benchmark đo cùng một khối lượng việc theo hai cách: in tỉ lệ để so sánh trực tiếp
+    for name, reference in COMPARISONS:
+        if name in results and reference in results and results[reference]:
+            ratio = results[name] / results[reference]
+            print(f"{name} / {reference}: {ratio:.3f} (thời gian mỗi thao tác {ratio - 1:+.1%})")
+
+def environment_info() -> Dict[str, str]:
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'system': platform.system()
+    }
+
+def save_baseline(results: Dict[str, float], path: str) -> None:
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump({'environment': environment_info(), 'results': results}, handle, indent=2, sort_keys=True)
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as handle:
+        return json.load(handle)
+
+def compare(results: Dict[str, float], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    regressions = []
+    
+    for name, value in sorted(results.items()):
+        previous = baseline['results'].get(name)
+        if previous is None:
+            print(f"{name:<32} (không có trong baseline)")
+            continue
+        
+        change = value / previous - 1
+        marker = "REGRESSION" if change > threshold else ""
+        print(f"{name:<32} {previous:>12.1f} -> {value:>12.1f} ns/op  {change:+7.1%} {marker}")
+        
+        if change > threshold:
+            regressions.append(name)
+    
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmark cho các bước xử lý của calculator")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="File baseline JSON (đo trên máy cục bộ, không commit)")
+    parser.add_argument("--save-baseline", action="store_true", help="Ghi kết quả làm baseline mới")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Tỉ lệ chậm đi tối đa so với baseline (0.25 = 25%%)")
+    parser.add_argument("--filter", default=None, help="Chỉ chạy benchmark có tên chứa chuỗi này")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Số lần đo, lấy giá trị nhỏ nhất")
+    parser.add_argument("--with-logging", action="store_true",
+                        help="Giữ logging như khi chạy ứng dụng (mặc định tắt để không đo I/O log)")
+    args = parser.parse_args(argv)
+    
+    if not args.with_logging:
+        logging.disable(logging.CRITICAL)
+    
+    # Không có baseline thì không so sánh được: báo lỗi ngay thay vì chạy xong rồi coi như đạt
+    if not args.save_baseline and not os.path.exists(args.baseline):
+        print(f"Lỗi: chưa có baseline ({args.baseline}), chạy với --save-baseline trên máy này trước")
+        return 2
+    
+    results = run_suite(args.filter, args.repeat)
+    
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Đã lưu baseline: {args.baseline}")
+        return 0
+    
+    baseline = load_baseline(args.baseline)
+    if baseline.get('environment') != environment_info():
+        print("Cảnh báo: baseline được đo trên môi trường khác, so sánh có thể không chính xác")
+    
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} benchmark chậm hơn baseline quá {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,21 +5,63 @@ Chứa business logic và calculation engine
 """
 
 try:
-    from core.calculator import CalculatorEngine, CalculationHistory
+    from core.calculator import CalculatorEngine, CalculatorSession, CalculationHistory
     from core.parser import SafeCalculatorEngine, ExpressionParser, ExpressionEvaluator
     from core.validator import ExpressionValidator, InputSanitizer
+    from core.cache import PersistentResultCache, SharedResultCache, RejectedExpressionCache
+    from core.result import CalculationResult
+    from core.canonical import ExpressionCanonicalizer
+    from core.cost import CostEstimator, EvaluationBudget, EvaluationCost
+    from core.preview import ExpressionPreviewer, IncrementalTokenizer
+    from core.editor import ExpressionBuffer
+    from core.streaming import StreamingEvaluator
+    from core.service import EvaluationService
+    from core.stateless import StatelessCalculator, evaluate
+    from core.pool import EnginePool
+    from core.snapshot import SessionState, encode_session, decode_session
 except ImportError:
     # Fallback for direct execution
-    from core.calculator import CalculatorEngine, CalculationHistory
+    from core.calculator import CalculatorEngine, CalculatorSession, CalculationHistory
     from core.parser import SafeCalculatorEngine, ExpressionParser, ExpressionEvaluator
     from core.validator import ExpressionValidator, InputSanitizer
+    from core.cache import PersistentResultCache, SharedResultCache, RejectedExpressionCache
+    from core.result import CalculationResult
+    from core.canonical import ExpressionCanonicalizer
+    from core.cost import CostEstimator, EvaluationBudget, EvaluationCost
+    from core.preview import ExpressionPreviewer, IncrementalTokenizer
+    from core.editor import ExpressionBuffer
+    from core.streaming import StreamingEvaluator
+    from core.service import EvaluationService
+    from core.stateless import StatelessCalculator, evaluate
+    from core.pool import EnginePool
+    from core.snapshot import SessionState, encode_session, decode_session
 
 __all__ = [
     'CalculatorEngine',
+    'CalculatorSession',
     'CalculationHistory',
     'SafeCalculatorEngine',
     'ExpressionParser', 
     'ExpressionEvaluator',
     'ExpressionValidator',
-    'InputSanitizer'
+    'InputSanitizer',
+    'PersistentResultCache',
+    'SharedResultCache',
+    'RejectedExpressionCache',
+    'CalculationResult',
+    'ExpressionCanonicalizer',
+    'CostEstimator',
+    'EvaluationBudget',
+    'EvaluationCost',
+    'ExpressionPreviewer',
+    'IncrementalTokenizer',
+    'ExpressionBuffer',
+    'StreamingEvaluator',
+    'EvaluationService',
+    'StatelessCalculator',
+    'evaluate',
+    'EnginePool',
+    'SessionState',
+    'encode_session',
+    'decode_session'
 ]
\ No newline at end of file
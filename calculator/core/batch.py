@@ -0,0 +1,154 @@
+import multiprocessing
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.cost import CostEstimator, EvaluationBudget
+from core.parser import ExpressionParser
+from core.canonical import ExpressionCanonicalizer
+from core.result import CalculationResult
+from core.worker import InlineExecutor, initialize_worker, evaluate_program_in_worker
+from utils.constants import BATCH_WORKERS, BATCH_HEAVY_WORKERS, BATCH_HEAVY_THRESHOLD
+from utils.exceptions import CalculatorError
+from utils.logger import get_logger
+from utils.metrics import LatencyHistogram, StageMetrics
+
+class BatchJob:
+    __slots__ = ('index', 'expression', 'cost')
+    
+    def __init__(self, index: int, expression: str, cost: float):
+        self.index = index
+        self.expression = expression
+        self.cost = cost
+    
+    def __repr__(self) -> str:
+        return f"BatchJob({self.index}, {self.expression!r}, cost={self.cost:.0f})"
+
+WorkerResult = Tuple[CalculationResult, Dict[str, LatencyHistogram]]
+
+class BatchEvaluator:
+    def __init__(self, evaluate: Callable[[str], WorkerResult] = evaluate_program_in_worker,
+                 workers: int = BATCH_WORKERS, heavy_workers: int = BATCH_HEAVY_WORKERS,
+                 heavy_threshold: float = BATCH_HEAVY_THRESHOLD, use_processes: bool = True,
+                 budget: Optional[EvaluationBudget] = None, inline: bool = False,
+                 result_cache_path: Optional[str] = None, metrics: Optional[StageMetrics] = None):
+        self.logger = get_logger("BatchEvaluator")
+        self.evaluate = evaluate
+        self.workers = max(1, workers)
+        self.heavy_workers = max(1, heavy_workers)
+        self.heavy_threshold = heavy_threshold
+        self.use_processes = use_processes
+        self.inline = inline
+        self.result_cache_path = result_cache_path
+        # Thời gian từng bước trong worker được gửi về cùng kết quả và gộp vào đây
+        self.metrics = metrics if metrics is not None else StageMetrics()
+        
+        self.parser = ExpressionParser()
+        self.canonicalizer = ExpressionCanonicalizer(self.parser)
+        self.cost_estimator = CostEstimator()
+        self.budget = budget if budget is not None else EvaluationBudget()
+        
+        self.stats = {'jobs': 0, 'light': 0, 'heavy': 0, 'max_buffered': 0}
+    
+    def estimate(self, expression: str) -> float:
+        try:
+            postfix_tokens = self.parser.build_postfix(self.canonicalizer.normalize_text(expression))
+            cost = self.cost_estimator.estimate(postfix_tokens)
+            self.budget.check(cost)
+        except (CalculatorError, ValueError):
+            # Biểu thức lỗi hoặc vượt ngân sách bị từ chối ngay nên rẻ nhất
+            return 0.0
+        
+        return cost.work + cost.operations
+    
+    def plan(self, expressions: Iterable[str]) -> Tuple[List[BatchJob], List[BatchJob]]:
+        light: List[BatchJob] = []
+        heavy: List[BatchJob] = []
+        
+        for index, expression in enumerate(expressions):
+            job = BatchJob(index, expression, self.estimate(expression))
+            (heavy if job.cost >= self.heavy_threshold else light).append(job)
+        
+        # Shortest-job-first trong mỗi nhóm; sort ổn định giữ thứ tự nhập khi bằng chi phí
+        light.sort(key=lambda job: job.cost)
+        heavy.sort(key=lambda job: job.cost)
+        return light, heavy
+    
+    def evaluate_all(self, expressions: Iterable[str]) -> List[CalculationResult]:
+        return list(self.iter_results(expressions))
+    
+    def iter_results(self, expressions: Iterable[str]) -> Iterator[CalculationResult]:
+        # Bộ đệm sắp xếp lại: kết quả hoàn thành sớm được giữ cho đến khi tới lượt theo thứ tự nhập
+        buffered: Dict[int, CalculationResult] = {}
+        next_index = 0
+        
+        for index, result in self.iter_completed(expressions):
+            buffered[index] = result
+            self.stats['max_buffered'] = max(self.stats['max_buffered'], len(buffered))
+            
+            while next_index in buffered:
+                yield buffered.pop(next_index)
+                next_index += 1
+    
+    def iter_completed(self, expressions: Iterable[str]) -> Iterator[Tuple[int, CalculationResult]]:
+        light, heavy = self.plan(expressions)
+        total = len(light) + len(heavy)
+        
+        self.stats['jobs'] += total
+        self.stats['light'] += len(light)
+        self.stats['heavy'] += len(heavy)
+        
+        if total == 0:
+            return
+        
+        self.logger.info(f"Batch of {total} expressions: {len(light)} light, {len(heavy)} heavy")
+        
+        executors: List[Executor] = []
+        try:
+            futures: Dict[Future, BatchJob] = {}
+            
+            if light:
+                executor = self._create_executor(self.workers)
+                executors.append(executor)
+                futures.update(self._submit(executor, light))
+            
+            if heavy:
+                executor = self._create_executor(self.heavy_workers)
+                executors.append(executor)
+                futures.update(self._submit(executor, heavy))
+            
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = futures[future]
+                    yield job.index, self._result_of(job, future)
+        
+        finally:
+            for executor in executors:
+                executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _create_executor(self, workers: int) -> Executor:
+        initargs = (self.result_cache_path, None, 0.0, self.metrics.enabled)
+        if self.inline:
+            initialize_worker(*initargs)
+            return InlineExecutor()
+        if self.use_processes:
+            return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=initialize_worker, initargs=initargs)
+        return ThreadPoolExecutor(workers, thread_name_prefix="BatchWorker",
+                                  initializer=initialize_worker, initargs=initargs)
+    
+    def _submit(self, executor: Executor, jobs: List[BatchJob]) -> Dict[Future, BatchJob]:
+        return {executor.submit(self.evaluate, job.expression): job for job in jobs}
+    
+    def _result_of(self, job: BatchJob, future: Future) -> CalculationResult:
+        try:
+            result, timings = future.result()
+            self.metrics.merge(timings)
+            return result
+        except Exception as e:
+            self.logger.error(f"Batch evaluation of '{job.expression}' failed: {str(e)}")
+            return CalculationResult.failure(job.expression, "UNEXPECTED_ERROR")
+    
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
@@ -0,0 +1,351 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from decimal import getcontext
+from typing import Optional, Dict, Any, Tuple
+
+from utils.constants import (
+    EVALUATOR_VERSION, NUMERIC_BACKEND, RESULT_CACHE_FILE, RESULT_CACHE_MAX_ENTRIES,
+    RESULT_CACHE_WARM_ENTRIES, RESULT_CACHE_FLUSH_INTERVAL, REJECTED_CACHE_MAX_ENTRIES,
+    SHARED_CACHE_WARM_ENTRIES, SHARED_CACHE_BUSY_TIMEOUT
+)
+from utils.logger import get_logger
+
+CacheKey = Tuple[str, str, int]
+Rejection = Tuple[Optional[str], str]
+
+class PersistentResultCache:
+    def __init__(self, path: str = RESULT_CACHE_FILE,
+                 max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+                 warm_entries: int = RESULT_CACHE_WARM_ENTRIES,
+                 flush_interval: int = RESULT_CACHE_FLUSH_INTERVAL,
+                 version: str = EVALUATOR_VERSION):
+        self.logger = get_logger("ResultCache")
+        self.path = path
+        self.max_entries = max_entries
+        self.warm_entries = min(warm_entries, max_entries)
+        self.flush_interval = flush_interval
+        self.version = version
+        
+        self.hits = 0
+        self.misses = 0
+        
+        self._memory: "OrderedDict[CacheKey, str]" = OrderedDict()
+        self._pending_puts: Dict[CacheKey, Tuple[str, int]] = {}
+        self._pending_touches: Dict[CacheKey, int] = {}
+        self._clock = 0
+        # Số dòng trên đĩa, cập nhật theo từng lần flush thay vì chạy COUNT(*)
+        self._row_count = 0
+        self._connection: Optional[sqlite3.Connection] = None
+        
+        # Một engine có thể được dùng từ nhiều thread (EnginePool, evaluate()); kết nối sqlite
+        # được dùng chung giữa các thread nên mọi truy cập đều đi qua khóa này
+        self._lock = threading.RLock()
+        
+        try:
+            self._connection = self._connect()
+            self._setup_schema()
+            self._warm_from_disk()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Result cache disabled, cannot open '{path}': {str(e)}")
+            self._connection = None
+    
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        
+        return sqlite3.connect(self.path, check_same_thread=False)
+    
+    def _setup_schema(self) -> None:
+        cursor = self._connection.cursor()
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "expression TEXT NOT NULL, backend TEXT NOT NULL, precision INTEGER NOT NULL, "
+            "result TEXT NOT NULL, last_used INTEGER NOT NULL, "
+            "PRIMARY KEY (expression, backend, precision)) WITHOUT ROWID"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)"
+        )
+        
+        row = cursor.execute(
+            "SELECT value FROM meta WHERE key = 'evaluator_version'"
+        ).fetchone()
+        
+        if row is None or row[0] != self.version:
+            cursor.execute("DELETE FROM results")
+            cursor.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('evaluator_version', ?)",
+                (self.version,)
+            )
+            if row is not None:
+                self.logger.info(f"Evaluator version changed ({row[0]} -> {self.version}), cache invalidated")
+        
+        self._connection.commit()
+    
+    def _warm_from_disk(self) -> None:
+        cursor = self._connection.cursor()
+        
+        row = cursor.execute("SELECT MAX(last_used), COUNT(*) FROM results").fetchone()
+        self._clock = row[0] or 0
+        self._row_count = row[1]
+        
+        rows = cursor.execute(
+            "SELECT expression, backend, precision, result FROM results "
+            "ORDER BY last_used DESC LIMIT ?",
+            (self.warm_entries,)
+        ).fetchall()
+        
+        for expression, backend, precision, result in reversed(rows):
+            self._memory[(expression, backend, precision)] = result
+        
+        self.logger.info(f"Result cache warmed with {len(rows)} entries from '{self.path}'")
+    
+    def make_key(self, expression: str) -> CacheKey:
+        return (expression, NUMERIC_BACKEND, getcontext().prec)
+    
+    def get(self, key: CacheKey, record_miss: bool = True) -> Optional[str]:
+        with self._lock:
+            result = self._memory.get(key)
+            
+            if result is None and self._connection is not None:
+                result = self._load_from_disk(key)
+                if result is not None:
+                    self._remember(key, result)
+            
+            if result is None:
+                if record_miss:
+                    self.misses += 1
+                return None
+            
+            self.hits += 1
+            self._memory.move_to_end(key)
+            self._clock += 1
+            self._pending_touches[key] = self._clock
+            self._maybe_flush()
+            return result
+    
+    def put(self, key: CacheKey, result: str) -> None:
+        with self._lock:
+            self._remember(key, result)
+            self._clock += 1
+            self._pending_puts[key] = (result, self._clock)
+            self._pending_touches.pop(key, None)
+            self._maybe_flush()
+    
+    def _remember(self, key: CacheKey, result: str) -> None:
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        
+        while len(self._memory) > self.warm_entries:
+            self._memory.popitem(last=False)
+    
+    def _load_from_disk(self, key: CacheKey) -> Optional[str]:
+        try:
+            row = self._connection.execute(
+                "SELECT result FROM results WHERE expression = ? AND backend = ? AND precision = ?",
+                key
+            ).fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            self.logger.warning(f"Result cache read failed: {str(e)}")
+            return None
+    
+    def _maybe_flush(self) -> None:
+        if len(self._pending_puts) + len(self._pending_touches) >= self.flush_interval:
+            self.flush()
+    
+    def flush(self) -> None:
+        with self._lock:
+            if self._connection is None:
+                self._pending_puts.clear()
+                self._pending_touches.clear()
+                return
+            
+            try:
+                cursor = self._connection.cursor()
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO results "
+                    "(expression, backend, precision, result, last_used) VALUES (?, ?, ?, ?, ?)",
+                    [key + value for key, value in self._pending_puts.items()]
+                )
+                inserted = max(cursor.rowcount, 0)
+                self._row_count += inserted
+                
+                # Hiếm khi xảy ra: kết quả đã có trên đĩa (ví dụ do process khác ghi) thì cập nhật lại
+                if inserted < len(self._pending_puts):
+                    cursor.executemany(
+                        "UPDATE results SET result = ?, last_used = ? "
+                        "WHERE expression = ? AND backend = ? AND precision = ?",
+                        [value + key for key, value in self._pending_puts.items()]
+                    )
+                cursor.executemany(
+                    "UPDATE results SET last_used = ? "
+                    "WHERE expression = ? AND backend = ? AND precision = ?",
+                    [(clock,) + key for key, clock in self._pending_touches.items()]
+                )
+                self._evict(cursor)
+                self._connection.commit()
+            except sqlite3.Error as e:
+                self.logger.warning(f"Result cache write failed: {str(e)}")
+            finally:
+                self._pending_puts.clear()
+                self._pending_touches.clear()
+    
+    def _evict(self, cursor: sqlite3.Cursor) -> None:
+        if self._row_count <= self.max_entries:
+            return
+        
+        cursor.execute(
+            "DELETE FROM results WHERE last_used < ("
+            "SELECT last_used FROM results ORDER BY last_used DESC LIMIT 1 OFFSET ?)",
+            (self.max_entries - 1,)
+        )
+        # Sau khi xóa trên đĩa còn đúng max_entries dòng, kể cả các dòng do process khác ghi
+        # vào SharedResultCache mà process này không đếm được
+        self._row_count = self.max_entries
+        self.logger.debug(f"Evicted {cursor.rowcount} entries from result cache")
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._pending_puts.clear()
+            self._pending_touches.clear()
+            
+            if self._connection is not None:
+                try:
+                    self._connection.execute("DELETE FROM results")
+                    self._connection.commit()
+                    self._row_count = 0
+                except sqlite3.Error as e:
+                    self.logger.warning(f"Result cache clear failed: {str(e)}")
+            
+            self.logger.info("Result cache cleared")
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is None:
+                return
+            
+            self.flush()
+            self._connection.close()
+            self._connection = None
+            self.logger.info("Result cache closed")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory)
+            }
+
+class SharedResultCache(PersistentResultCache):
+    def __init__(self, path: str = RESULT_CACHE_FILE,
+                 max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+                 warm_entries: int = SHARED_CACHE_WARM_ENTRIES,
+                 flush_interval: int = RESULT_CACHE_FLUSH_INTERVAL,
+                 version: str = EVALUATOR_VERSION,
+                 busy_timeout: float = SHARED_CACHE_BUSY_TIMEOUT):
+        self.busy_timeout = busy_timeout
+        self._pid = os.getpid()
+        super().__init__(path, max_entries, warm_entries, flush_interval, version)
+    
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        
+        connection = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+    
+    def _ensure_process_connection(self) -> None:
+        if self._pid == os.getpid():
+            return
+        
+        # Kết nối sqlite không được dùng chung sau fork: mở lại trong process con
+        self._pid = os.getpid()
+        self._pending_puts.clear()
+        self._pending_touches.clear()
+        try:
+            self._connection = self._connect()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Shared cache disabled in process {self._pid}: {str(e)}")
+            self._connection = None
+    
+    def get(self, key: CacheKey, record_miss: bool = True) -> Optional[str]:
+        with self._lock:
+            self._ensure_process_connection()
+            return super().get(key, record_miss)
+    
+    def put(self, key: CacheKey, result: str) -> None:
+        with self._lock:
+            self._ensure_process_connection()
+            super().put(key, result)
+    
+    def _maybe_flush(self) -> None:
+        # Kết quả mới được ghi ngay để các worker khác thấy; chỉ gom các lần cập nhật last_used
+        if self._pending_puts or len(self._pending_touches) >= self.flush_interval:
+            self.flush()
+    
+    def close(self) -> None:
+        with self._lock:
+            self._ensure_process_connection()
+            super().close()
+
+class RejectedExpressionCache:
+    def __init__(self, max_entries: int = REJECTED_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Rejection]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, expression: str) -> Optional[Rejection]:
+        with self._lock:
+            rejection = self._entries.get(expression)
+            
+            if rejection is None:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            self._entries.move_to_end(expression)
+            return rejection
+    
+    def put(self, expression: str, error_code: Optional[str], message: str) -> None:
+        with self._lock:
+            if self.max_entries <= 0:
+                return
+            
+            self._entries[expression] = (error_code, message)
+            self._entries.move_to_end(expression)
+            
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries)
+            }
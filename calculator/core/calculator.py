@@ -1,17 +1,24 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Iterable, Tuple, Union
+import time
 from decimal import Decimal
 import json
 from datetime import datetime
 
+from core.cache import PersistentResultCache, RejectedExpressionCache
+from core.result import CalculationResult, error_message
+from core.editor import ExpressionBuffer
+from core.streaming import StreamingEvaluator
+from core.stateless import StatelessCalculator, get_default_calculator
+from core.snapshot import SessionState, encode_session, decode_session
 from core.parser import SafeCalculatorEngine
 from core.validator import InputSanitizer, ExpressionValidator
-from utils.constants import ERROR_MESSAGES, MAX_EXPRESSION_LENGTH
-from utils.exceptions import (
-    CalculatorError, ExpressionSyntaxError, DivisionByZeroError,
-    NumberOverflowError, NumberUnderflowError, InvalidOperationError,
-    EmptyExpressionError
-)
+from utils.constants import MAX_EXPRESSION_LENGTH, SESSION_SNAPSHOT_HISTORY
+from utils.exceptions import CalculatorError
 from utils.logger import get_logger, logged, log_calculation_step, log_error_with_context
+from utils.metrics import StageMetrics
+from utils.tracing import traced, trace_argument
+
+ZERO = Decimal('0')
 
 class CalculationHistory:
     def __init__(self, max_entries: int = 100):
@@ -19,6 +26,7 @@ class CalculationHistory:
         self.history: List[Dict[str, Any]] = []
         self.logger = get_logger("History")
     
+    @traced("history.add_calculation", "history")
     def add_calculation(self, expression: str, result: str, 
                        calculation_time: Optional[datetime] = None) -> None:
         if calculation_time is None:
@@ -50,9 +58,11 @@ class CalculationHistory:
         self.history.clear()
         self.logger.info("History cleared")
     
+    @traced("history.export_to_json", "history")
     def export_to_json(self) -> str:
         return json.dumps(self.history, indent=2, ensure_ascii=False)
     
+    @traced("history.import_from_json", "history")
     def import_from_json(self, json_str: str) -> int:
         try:
             imported_data = json.loads(json_str)
@@ -76,54 +86,194 @@ class CalculationHistory:
             self.logger.error(f"Failed to import history: {str(e)}")
             raise ValueError(f"Không thể import lịch sử: {str(e)}")
     
+    @traced("history.add_entries", "history")
+    def add_entries(self, entries: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        for entry in entries:
+            if self._validate_history_entry(entry):
+                self.history.append(entry)
+                count += 1
+        
+        if len(self.history) > self.max_entries:
+            del self.history[:-self.max_entries]
+        
+        return count
+    
+    @staticmethod
+    def iter_json_entries(json_str: str) -> Iterator[Dict[str, Any]]:
+        for entry, _ in CalculationHistory.iter_json_entry_positions(json_str):
+            yield entry
+    
+    @staticmethod
+    def iter_json_entry_positions(json_str: str) -> Iterator[Tuple[Any, int]]:
+        decoder = json.JSONDecoder()
+        length = len(json_str)
+        position = CalculationHistory._skip_whitespace(json_str, 0)
+        
+        if position >= length or json_str[position] != '[':
+            raise ValueError("JSON data phải là một list")
+        
+        position = CalculationHistory._skip_whitespace(json_str, position + 1)
+        if position < length and json_str[position] == ']':
+            return
+        
+        while True:
+            entry, position = decoder.raw_decode(json_str, position)
+            yield entry, position
+            
+            position = CalculationHistory._skip_whitespace(json_str, position)
+            if position < length and json_str[position] == ',':
+                position = CalculationHistory._skip_whitespace(json_str, position + 1)
+            elif position < length and json_str[position] == ']':
+                return
+            else:
+                raise ValueError(f"JSON không hợp lệ tại vị trí {position}")
+    
+    @staticmethod
+    def _skip_whitespace(text: str, position: int) -> int:
+        while position < len(text) and text[position] in ' \t\r\n':
+            position += 1
+        return position
+    
+    @staticmethod
+    def iter_json_chunks(entries: List[Dict[str, Any]], chunk_size: int) -> Iterator[str]:
+        if not entries:
+            yield "[]"
+            return
+        
+        yield "[\n"
+        for start in range(0, len(entries), chunk_size):
+            chunk = entries[start:start + chunk_size]
+            parts = [
+                "  " + json.dumps(entry, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+                for entry in chunk
+            ]
+            separator = ",\n" if start + chunk_size < len(entries) else "\n"
+            yield ",\n".join(parts) + separator
+        yield "]"
+    
     def _validate_history_entry(self, entry: Dict[str, Any]) -> bool:
         required_fields = ['expression', 'result', 'timestamp']
         return (isinstance(entry, dict) and 
                 all(field in entry for field in required_fields))
 
-class CalculatorEngine:
-    def __init__(self):
-        self.logger = get_logger("CalculatorEngine")
+class CalculatorSession:
+    # Chỉ giữ trạng thái riêng của một người dùng; parser, validator và cache nằm trong
+    # StatelessCalculator dùng chung, nên có thể giữ rất nhiều phiên trong một process
+    __slots__ = ('stateless', '_buffer', 'last_result', 'memory_value', 'is_error_state', '_history')
         
-        self.sanitizer = InputSanitizer()
-        self.validator = ExpressionValidator()
-        self.calculation_engine = SafeCalculatorEngine()
-        self.history = CalculationHistory()
+    logger = get_logger("CalculatorSession")
         
-        self.current_expression = ""
+    def __init__(self, stateless: Optional[StatelessCalculator] = None):
+        self.stateless = stateless if stateless is not None else get_default_calculator()
+        self._buffer: Optional[ExpressionBuffer] = None
+        self._history: Optional[CalculationHistory] = None
         self.last_result = "0"
-        self.memory_value = Decimal('0')
+        self.memory_value = ZERO
         self.is_error_state = False
         
-        self.logger.info("Calculator engine initialized")
+    @property
+    def sanitizer(self) -> InputSanitizer:
+        return self.stateless.sanitizer
+    
+    @property
+    def validator(self) -> ExpressionValidator:
+        return self.stateless.validator
+    
+    @property
+    def calculation_engine(self) -> SafeCalculatorEngine:
+        return self.stateless.calculation_engine
+    
+    @property
+    def rejected_cache(self) -> RejectedExpressionCache:
+        return self.stateless.rejected_cache
+    
+    @property
+    def metrics(self) -> StageMetrics:
+        return self.stateless.metrics
     
+    @property
+    def expression_buffer(self) -> ExpressionBuffer:
+        # Buffer và lịch sử chỉ được tạo khi phiên thực sự dùng tới
+        if self._buffer is None:
+            self._buffer = ExpressionBuffer()
+        return self._buffer
+    
+    @property
+    def history(self) -> CalculationHistory:
+        if self._history is None:
+            self._history = CalculationHistory()
+        return self._history
+    
+    @property
+    def current_expression(self) -> str:
+        return self._buffer.text if self._buffer is not None else ""
+    
+    @current_expression.setter
+    def current_expression(self, expression: str) -> None:
+        # Sau '=' biểu thức đã kiểm tra thường trùng với buffer: không cần tách token lại
+        if expression:
+            if self._buffer is None or self._buffer.text != expression:
+                self.expression_buffer.set_text(expression)
+        else:
+            self._buffer = None
+    
+    @traced("try_calculate_expression", "engine", lambda self, expression: {'expression': trace_argument(expression)})
+    def try_calculate_expression(self, expression: str) -> CalculationResult:
+        return self.stateless.evaluate(expression)
+    
+    @traced("calculate_expression", "engine", lambda self, expression: {'expression': trace_argument(expression)})
     @logged("CalculatorEngine")
     def calculate_expression(self, expression: str) -> str:
         if not expression or expression.strip() == "":
             return "0"
         
+        rejection = self.rejected_cache.get(expression)
+        if rejection is not None:
+            self.is_error_state = True
+            self.logger.debug(f"Rejected from cache: '{expression}' ({rejection[0]})")
+            if self.metrics.enabled:
+                self.metrics.record_outcome(rejection[0])
+            return rejection[1]
+        
+        metrics = self.metrics
+        if metrics.enabled:
+            started = start = time.perf_counter_ns()
+        
         try:
             self.is_error_state = False
             
             sanitized = self.sanitizer.sanitize_calculator_input(expression)
             log_calculation_step("Sanitize", expression, sanitized)
+            if metrics.enabled:
+                start = metrics.lap("sanitize", start)
             
             validated = self.validator.validate_expression(sanitized)
             log_calculation_step("Validate", sanitized, validated)
+            if metrics.enabled:
+                start = metrics.lap("validate", start)
             
             result = self.calculation_engine.calculate(validated)
             log_calculation_step("Calculate", validated, result)
+            if metrics.enabled:
+                metrics.lap("calculate", start)
+                metrics.lap("total", started)
             
             self.current_expression = validated
             self.last_result = result
             self.history.add_calculation(validated, result)
             
             self.logger.info(f"Calculation successful: '{expression}' = {result}")
+            if metrics.enabled:
+                metrics.record_outcome(None)
             return result
             
         except CalculatorError as e:
             self.is_error_state = True
-            error_msg = self._get_user_friendly_error(e)
+            root_error = self._get_root_error(e)
+            error_msg = self._get_user_friendly_error(root_error)
+            if metrics.enabled:
+                metrics.record_outcome(root_error.error_code or "CALCULATION_ERROR")
             
             log_error_with_context(e, {
                 'expression': expression,
@@ -131,33 +281,29 @@ class CalculatorEngine:
                 'error_code': getattr(e, 'error_code', None)
             })
             
+            self._remember_rejection(expression, root_error.error_code, error_msg)
             return error_msg
             
         except Exception as e:
             self.is_error_state = True
             self.logger.error(f"Unexpected error calculating '{expression}': {str(e)}")
+            if metrics.enabled:
+                metrics.record_outcome("UNEXPECTED_ERROR")
             return "Lỗi không xác định"
     
+    def _remember_rejection(self, expression: str, error_code: Optional[str], message: str) -> None:
+        self.stateless.remember_rejection(expression, error_code, message)
+    
+    def _get_root_error(self, error: CalculatorError) -> CalculatorError:
+        while isinstance(error.__cause__, CalculatorError):
+            error = error.__cause__
+        return error
+    
     def _get_user_friendly_error(self, error: CalculatorError) -> str:
-        error_code = getattr(error, 'error_code', None)
-        
-        if error_code in ERROR_MESSAGES:
-            return ERROR_MESSAGES[error_code]
-        
-        if isinstance(error, ExpressionSyntaxError):
-            return "Lỗi cú pháp"
-        elif isinstance(error, DivisionByZeroError):
-            return "Không thể chia cho 0"
-        elif isinstance(error, NumberOverflowError):
-            return "Số quá lớn"
-        elif isinstance(error, NumberUnderflowError):
-            return "Số quá nhỏ"
-        elif isinstance(error, InvalidOperationError):
-            return "Phép toán không hợp lệ"
-        elif isinstance(error, EmptyExpressionError):
-            return "0"
-        else:
-            return "Lỗi"
+        return self._get_error_message(getattr(error, 'error_code', None))
+        
+    def _get_error_message(self, error_code: Optional[str]) -> str:
+        return error_message(error_code)
     
     def handle_button_press(self, button_value: str) -> str:
         self.logger.debug(f"Button pressed: {button_value}")
@@ -187,21 +333,62 @@ class CalculatorEngine:
             self.logger.error(f"Error handling button '{button_value}': {str(e)}")
             return "Lỗi"
     
+    def handle_button_presses(self, sequence: Iterable[str],
+                              include_intermediate: bool = False) -> Union[str, List[str]]:
+        # Chuỗi str được tách theo từng ký tự; các phím nhiều ký tự ('CE') cần truyền dạng list
+        keys = list(sequence)
+        count = len(keys)
+        self.logger.debug(f"Button sequence: {count} keys")
+        
+        handlers = self._KEY_HANDLERS
+        displays: List[str] = []
+        display = self.current_expression or self.last_result
+        position = 0
+        
+        while position < count:
+            try:
+                while position < count:
+                    key = keys[position]
+                    position += 1
+                    entry = handlers.get(key)
+                    
+                    if entry is None:
+                        # Phím ngoài bảng đi qua đường xử lý từng phím để giữ nguyên hành vi
+                        display = self.handle_button_press(key)
+                    elif (entry[2] and not include_intermediate and position < count
+                          and not self.current_expression):
+                        # ± và % khi chưa nhập gì chỉ tính giá trị hiển thị, không đổi trạng thái
+                        continue
+                    elif entry[1]:
+                        display = entry[0](self, key)
+                    else:
+                        display = entry[0](self)
+                    
+                    if include_intermediate:
+                        displays.append(display)
+            
+            except Exception as e:
+                self.logger.error(f"Error handling button '{key}': {str(e)}")
+                display = "Lỗi"
+                if include_intermediate:
+                    displays.append(display)
+        
+        return displays if include_intermediate else display
+    
     def _handle_clear(self) -> str:
-        self.current_expression = ""
+        self._buffer = None
         self.last_result = "0"
         self.is_error_state = False
         self.logger.debug("Calculator cleared")
         return "0"
     
     def _handle_clear_entry(self) -> str:
-        if self.current_expression:
-            self.current_expression = self.current_expression[:-1]
+        self.expression_buffer.pop()
         
-        if not self.current_expression:
+        if not self.expression_buffer:
             return "0"
         
-        return self.current_expression
+        return self.expression_buffer.text
     
     def _handle_equals(self) -> str:
         if not self.current_expression:
@@ -214,6 +401,25 @@ class CalculatorEngine:
         
         return result
     
+    def begin_calculation(self) -> Optional[str]:
+        return self.current_expression or None
+    
+    def precheck_calculation(self, expression: str) -> Optional[CalculationResult]:
+        return self.stateless.precheck(expression)
+    
+    def finish_calculation(self, result: CalculationResult) -> str:
+        if not result.ok:
+            # Kết quả từ worker process: ghi nhận ở đây để lần sau không phải gửi lại
+            self._remember_rejection(result.expression, result.error_code, result.message)
+            self.is_error_state = True
+            return result.message
+        
+        self.is_error_state = False
+        self.last_result = result.value
+        self.history.add_calculation(result.expression, result.value)
+        self.current_expression = ""
+        return result.value
+    
     def _handle_plus_minus(self) -> str:
         if not self.current_expression:
             if self.last_result != "0":
@@ -225,12 +431,8 @@ class CalculatorEngine:
                     return self.last_result
             return "0"
         
-        if self.current_expression.startswith('-'):
-            self.current_expression = self.current_expression[1:]
-        else:
-            self.current_expression = '-' + self.current_expression
-        
-        return self.current_expression
+        self.expression_buffer.toggle_sign()
+        return self.expression_buffer.text
     
     def _handle_percentage(self) -> str:
         if not self.current_expression:
@@ -243,60 +445,73 @@ class CalculatorEngine:
                     return self.last_result
             return "0"
         
-        self.current_expression += "/100"
-        return self.current_expression
+        self.expression_buffer.append("/100")
+        return self.expression_buffer.text
     
     def _handle_number(self, digit: str) -> str:
         if self.is_error_state:
             self.current_expression = ""
             self.is_error_state = False
         
-        if len(self.current_expression) >= MAX_EXPRESSION_LENGTH:
-            return self.current_expression
+        # Phím số là đường nóng nhất: sửa thẳng text của buffer, không tách token lại
+        buffer = self._buffer
+        if buffer is None:
+            buffer = self.expression_buffer
+        text = buffer.text
         
-        if digit == '.':
-            last_number = self._get_last_number()
-            if '.' in last_number:
-                return self.current_expression
+        if len(text) >= MAX_EXPRESSION_LENGTH:
+            return text
         
-        self.current_expression += digit
-        return self.current_expression
+        if digit == '.' and buffer.last_number_has_decimal:
+            return text
+        
+        buffer.text = text = text + digit
+        return text
     
     def _handle_operator(self, operator: str) -> str:
         if self.is_error_state:
             self.is_error_state = False
             self.current_expression = self.last_result
         
-        if not self.current_expression:
+        buffer = self._buffer
+        if buffer is None:
+            buffer = self.expression_buffer
+        text = buffer.text
+        
+        if not text:
             if operator == '-':
-                self.current_expression = '-'
-                return self.current_expression
-            else:
-                self.current_expression = self.last_result
+                buffer.text = '-'
+                return '-'
+            text = self.last_result
         
-        if (self.current_expression and 
-            self.current_expression[-1] in '+-*/' and 
-            operator != '-'):
-            self.current_expression = self.current_expression[:-1]
+        if text[-1] in '+-*/' and operator != '-':
+            text = text[:-1]
         
-        self.current_expression += operator
-        return self.current_expression
+        buffer.text = text = text + operator
+        return text
     
     def _handle_parenthesis(self, paren: str) -> str:
         if self.is_error_state:
             self.current_expression = ""
             self.is_error_state = False
         
-        self.current_expression += paren
-        return self.current_expression
+        self.expression_buffer.append(paren)
+        return self.expression_buffer.text
+    
+    # Phím -> (handler, handler nhận phím làm tham số, chỉ tính giá trị hiển thị khi buffer rỗng)
+    _KEY_HANDLERS = {
+        'C': (_handle_clear, False, False),
+        'CE': (_handle_clear_entry, False, False),
+        '=': (_handle_equals, False, False),
+        '±': (_handle_plus_minus, False, True),
+        '%': (_handle_percentage, False, True),
+        **dict.fromkeys('0123456789.', (_handle_number, True, False)),
+        **dict.fromkeys('+-*/', (_handle_operator, True, False)),
+        **dict.fromkeys('()', (_handle_parenthesis, True, False))
+    }
     
     def _get_last_number(self) -> str:
-        if not self.current_expression:
-            return ""
-        
-        parts = self.current_expression.replace('+', ' ').replace('-', ' ').replace('*', ' ').replace('/', ' ').split()
-        
-        return parts[-1] if parts else ""
+        return self.expression_buffer.last_number()
     
     def memory_store(self, value: Optional[str] = None) -> None:
         try:
@@ -313,7 +528,7 @@ class CalculatorEngine:
         return str(self.memory_value)
     
     def memory_clear(self) -> None:
-        self.memory_value = Decimal('0')
+        self.memory_value = ZERO
         self.logger.debug("Memory cleared")
     
     def memory_add(self, value: Optional[str] = None) -> None:
@@ -347,10 +562,86 @@ class CalculatorEngine:
             'history_count': len(self.history.history)
         }
     
+    def snapshot(self, history_tail: int = SESSION_SNAPSHOT_HISTORY) -> bytes:
+        history = []
+        if self._history is not None and history_tail > 0:
+            history = self._history.history[-history_tail:]
+        
+        return encode_session(SessionState(
+            self.current_expression, self.last_result, str(self.memory_value),
+            self.is_error_state, history
+        ))
+    
+    def restore(self, data: bytes) -> None:
+        state = decode_session(data)
+        
+        try:
+            memory_value = Decimal(state.memory_value) if state.memory_value != "0" else ZERO
+        except ArithmeticError as e:
+            raise ValueError(f"Snapshot phiên không hợp lệ: bộ nhớ '{state.memory_value}'") from e
+        
+        self.current_expression = state.expression
+        self.last_result = state.last_result
+        self.memory_value = memory_value
+        self.is_error_state = state.is_error_state
+        
+        if state.history:
+            history = self.history
+            history.history = state.history[-history.max_entries:]
+        elif self._history is not None:
+            self._history.history = []
+    
     def reset(self) -> None:
-        self.current_expression = ""
+        self._buffer = None
         self.last_result = "0"
-        self.memory_value = Decimal('0')
+        self.memory_value = ZERO
         self.is_error_state = False
-        self.history.clear_history()
-        self.logger.info("Calculator reset to initial state")
\ No newline at end of file
+        if self._history is not None:
+            self._history.clear_history()
+        self.logger.info("Calculator reset to initial state")
+
+class CalculatorEngine(CalculatorSession):
+    def __init__(self, result_cache: Optional[PersistentResultCache] = None,
+                 rejected_cache: Optional[RejectedExpressionCache] = None,
+                 large_expressions: bool = False,
+                 metrics: Optional[StageMetrics] = None,
+                 stateless: Optional[StatelessCalculator] = None):
+        # Phần tính toán không trạng thái có thể dùng chung giữa nhiều engine (EnginePool)
+        if stateless is None:
+            stateless = StatelessCalculator(result_cache, rejected_cache, metrics=metrics)
+        super().__init__(stateless)
+        
+        self.logger = get_logger("CalculatorEngine")
+        self.streaming_evaluator = StreamingEvaluator() if large_expressions else None
+        
+        self.logger.info("Calculator engine initialized")
+    
+    @traced("try_calculate_expression", "engine", lambda self, expression: {'expression': trace_argument(expression)})
+    def try_calculate_expression(self, expression: str) -> CalculationResult:
+        if self.streaming_evaluator is not None and len(expression) > MAX_EXPRESSION_LENGTH:
+            result = self._try_calculate_large(expression)
+            if self.metrics.enabled:
+                self.metrics.record_outcome(result.error_code)
+            return result
+        
+        return self.stateless.evaluate(expression)
+    
+    def _try_calculate_large(self, expression: str) -> CalculationResult:
+        # Biểu thức lớn không đi qua validator/cache: StreamingEvaluator tự kiểm tra trong một lượt
+        sanitized = self.sanitizer.sanitize_calculator_input(expression)
+        result = self.streaming_evaluator.try_evaluate(sanitized)
+        
+        if result.ok:
+            return CalculationResult.success(expression, result.value)
+        
+        return CalculationResult.failure(expression, result.error_code, result.position)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        result_cache = self.calculation_engine.result_cache
+        return {
+            'stages': self.metrics.snapshot(),
+            'counters': self.metrics.counter_snapshot(),
+            'history_size': len(self.history.history),
+            'rejected_cache': self.rejected_cache.get_stats(),
+            'result_cache': result_cache.get_stats() if result_cache is not None else None
+        }
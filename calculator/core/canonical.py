@@ -0,0 +1,153 @@
+from decimal import getcontext
+from typing import List, Optional, Dict, Iterable, Callable
+
+from utils.constants import OPERATOR_PRECEDENCE, OPERATOR_ALIASES
+from utils.exceptions import CalculatorError
+
+COMMUTATIVE_OPERATORS = ('+', '*')
+ATOM_PRECEDENCE = 100
+
+class _CanonicalNode:
+    __slots__ = ('text', 'operator', 'precedence', 'terms', 'exact_digits')
+    
+    def __init__(self, text: Optional[str], operator: Optional[str] = None,
+                 precedence: int = ATOM_PRECEDENCE, terms: Optional[List[str]] = None,
+                 exact_digits: Optional[int] = None):
+        self.text = text
+        self.operator = operator
+        self.precedence = precedence
+        self.terms = terms
+        # Số chữ số tối đa nếu node là số nguyên được tính chính xác (không bị làm tròn), ngược lại None
+        self.exact_digits = exact_digits
+    
+    def render(self) -> str:
+        if self.text is None:
+            self.terms.sort()
+            self.text = self.operator.join(self.terms)
+            self.terms = None
+        return self.text
+
+class ExpressionCanonicalizer:
+    def __init__(self, parser: 'ExpressionParser', reorder_commutative: bool = True):
+        self.parser = parser
+        self.reorder_commutative = reorder_commutative
+        self._alias_table = str.maketrans(OPERATOR_ALIASES)
+    
+    def canonicalize(self, expression: str) -> str:
+        text = self.normalize_text(expression)
+        
+        try:
+            postfix_tokens = self.parser.build_postfix(text)
+        except (CalculatorError, ValueError):
+            return text
+        
+        return self.canonicalize_postfix(postfix_tokens, text)
+    
+    def normalize_text(self, expression: str) -> str:
+        return ''.join(expression.translate(self._alias_table).split())
+    
+    def canonicalize_postfix(self, postfix_tokens: List['Token'], fallback: str = "") -> str:
+        stack: List[_CanonicalNode] = []
+        precision = getcontext().prec
+        
+        for token in postfix_tokens:
+            if token.type == 'number':
+                literal = self._normalize_number(token.value)
+                exact_digits = len(literal) if literal.isdigit() else None
+                stack.append(_CanonicalNode(literal, exact_digits=exact_digits))
+            
+            elif token.type == 'function':
+                if not stack:
+                    return fallback
+                operand = stack.pop()
+                stack.append(_CanonicalNode(f"{token.value}({operand.render()})"))
+            
+            elif token.type == 'operator':
+                if len(stack) < 2:
+                    return fallback
+                right = stack.pop()
+                left = stack.pop()
+                stack.append(self._combine(token.value, left, right, precision))
+        
+        if len(stack) != 1:
+            return fallback
+        
+        return stack[0].render()
+    
+    def _combine(self, operator: str, left: _CanonicalNode, right: _CanonicalNode,
+                 precision: int) -> _CanonicalNode:
+        precedence = OPERATOR_PRECEDENCE.get(operator, 0)
+        exact_digits = self._exact_digits(operator, left, right, precision)
+        
+        # Decimal làm tròn về `precision` chữ số nên + và * không kết hợp/giao hoán nói chung:
+        # chỉ sắp xếp lại chuỗi số nguyên mà mọi thứ tự tính đều cho kết quả chính xác
+        if self.reorder_commutative and operator in COMMUTATIVE_OPERATORS and exact_digits is not None:
+            terms = self._chain_terms(operator, precedence, left)
+            terms.extend(self._chain_terms(operator, precedence, right))
+            return _CanonicalNode(None, operator, precedence, terms, exact_digits)
+        
+        left_text = self._wrap(left, precedence - 1)
+        right_text = self._wrap(right, precedence)
+        return _CanonicalNode(f"{left_text}{operator}{right_text}", operator, precedence,
+                              exact_digits=exact_digits)
+    
+    def _exact_digits(self, operator: str, left: _CanonicalNode, right: _CanonicalNode,
+                      precision: int) -> Optional[int]:
+        if left.exact_digits is None or right.exact_digits is None:
+            return None
+        
+        # Cận trên số chữ số của kết quả; tổng/tích từng phần theo mọi thứ tự cũng nằm trong cận này
+        if operator in '+-':
+            digits = max(left.exact_digits, right.exact_digits) + 1
+        elif operator == '*':
+            digits = left.exact_digits + right.exact_digits
+        else:
+            return None
+        
+        return digits if digits <= precision else None
+    
+    def _chain_terms(self, operator: str, precedence: int, node: _CanonicalNode) -> List[str]:
+        if node.operator == operator and node.terms is not None:
+            return node.terms
+        return [self._wrap(node, precedence)]
+    
+    def _wrap(self, node: _CanonicalNode, precedence: int) -> str:
+        text = node.render()
+        if node.operator is not None and node.precedence <= precedence:
+            return f"({text})"
+        return text
+    
+    def _normalize_number(self, literal: str) -> str:
+        integer, _, fraction = literal.partition('.')
+        
+        if not (integer + fraction).isdigit():
+            return literal
+        
+        integer = integer.lstrip('0') or '0'
+        fraction = fraction.rstrip('0')
+        
+        return f"{integer}.{fraction}" if fraction else integer
+
+def key_hit_rate(expressions: Iterable[str], key_func: Callable[[str], str]) -> float:
+    seen = set()
+    hits = 0
+    total = 0
+    
+    for expression in expressions:
+        key = key_func(expression)
+        if key in seen:
+            hits += 1
+        else:
+            seen.add(key)
+        total += 1
+    
+    return hits / total if total else 0.0
+
+def compare_key_hit_rates(expressions: Iterable[str],
+                          canonicalizer: ExpressionCanonicalizer) -> Dict[str, float]:
+    corpus = list(expressions)
+    return {
+        'raw': key_hit_rate(corpus, lambda expression: expression),
+        'whitespace': key_hit_rate(corpus, lambda expression: ''.join(expression.split())),
+        'canonical': key_hit_rate(corpus, canonicalizer.canonicalize)
+    }
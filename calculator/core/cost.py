@@ -0,0 +1,195 @@
+import math
+import time
+from decimal import Decimal, getcontext
+from typing import List, Optional, Tuple
+
+from utils.constants import MAX_EVAL_DIGITS, MAX_EVAL_OPERATIONS, MAX_EVAL_DEPTH, MAX_EVAL_SECONDS
+from utils.exceptions import EvaluationBudgetExceededError
+
+LOG10_E = math.log10(math.e)
+
+class EvaluationBudget:
+    def __init__(self, max_digits: float = MAX_EVAL_DIGITS,
+                 max_operations: float = MAX_EVAL_OPERATIONS,
+                 max_depth: float = MAX_EVAL_DEPTH,
+                 max_seconds: float = MAX_EVAL_SECONDS):
+        self.max_digits = max_digits
+        self.max_operations = max_operations
+        self.max_depth = max_depth
+        self.max_seconds = max_seconds
+    
+    @classmethod
+    def unlimited(cls) -> 'EvaluationBudget':
+        return cls(math.inf, math.inf, math.inf, math.inf)
+    
+    def deadline(self) -> Optional[float]:
+        if math.isinf(self.max_seconds):
+            return None
+        return time.perf_counter() + self.max_seconds
+    
+    def check(self, cost: 'EvaluationCost') -> None:
+        if cost.operations > self.max_operations:
+            raise EvaluationBudgetExceededError("số phép toán", cost.operations, self.max_operations)
+        if cost.depth > self.max_depth:
+            raise EvaluationBudgetExceededError("độ sâu", cost.depth, self.max_depth)
+        if cost.digits > self.max_digits:
+            raise EvaluationBudgetExceededError("số chữ số", cost.digits, self.max_digits)
+    
+    def check_deadline(self, deadline: Optional[float]) -> None:
+        if deadline is not None and time.perf_counter() > deadline:
+            raise EvaluationBudgetExceededError("thời gian (giây)", self.max_seconds, self.max_seconds)
+    
+    def check_factorial(self, operand: Decimal) -> None:
+        digits = factorial_digits(float(operand))
+        if digits > self.max_digits:
+            raise EvaluationBudgetExceededError("số chữ số", digits, self.max_digits)
+
+class EvaluationCost:
+    __slots__ = ('operations', 'digits', 'depth', 'work')
+    
+    def __init__(self, operations: int = 0, digits: float = 0.0, depth: int = 0, work: float = 0.0):
+        self.operations = operations
+        self.digits = digits
+        self.depth = depth
+        self.work = work
+    
+    def __repr__(self) -> str:
+        return (f"EvaluationCost(operations={self.operations}, digits={self.digits:.0f}, "
+                f"depth={self.depth}, work={self.work:.0f})")
+
+def factorial_digits(n: float) -> float:
+    if math.isnan(n) or n < 0:
+        return 1.0
+    if math.isinf(n):
+        return math.inf
+    return math.lgamma(n + 1) * LOG10_E + 1
+
+class CostEstimator:
+    def estimate(self, postfix_tokens: List['Token']) -> EvaluationCost:
+        cost = EvaluationCost(operations=len(postfix_tokens))
+        precision = getcontext().prec
+        # Mỗi phần tử: (giá trị xấp xỉ nếu biết, số chữ số tối đa phải lưu cho kết quả)
+        stack: List[Tuple[Optional[float], float]] = []
+        
+        for token in postfix_tokens:
+            if token.type == 'number':
+                entry = self._literal(token.value)
+            
+            elif token.type == 'operator':
+                if len(stack) < 2:
+                    break
+                right = stack.pop()
+                left = stack.pop()
+                entry = self._binary(token.value, left, right, precision)
+                cost.work += max(left[1], right[1], 1.0)
+            
+            elif token.type == 'function':
+                if not stack:
+                    break
+                operand = stack.pop()
+                entry = self._function(token.value, operand)
+                cost.work += self._function_work(token.value, entry)
+            
+            else:
+                continue
+            
+            stack.append(entry)
+            cost.depth = max(cost.depth, len(stack))
+            cost.digits = max(cost.digits, entry[1])
+        
+        return cost
+    
+    def _literal(self, literal: str) -> Tuple[Optional[float], float]:
+        integer_part = literal.split('.', 1)[0].lstrip('0')
+        try:
+            value = float(literal)
+        except ValueError:
+            value = None
+        return value, float(max(1, len(integer_part)))
+    
+    def _binary(self, operator: str, left: Tuple[Optional[float], float],
+                right: Tuple[Optional[float], float], precision: int) -> Tuple[Optional[float], float]:
+        a, a_digits = left
+        b, b_digits = right
+        
+        if operator in '+-':
+            digits = max(a_digits, b_digits) + 1
+        elif operator == '*':
+            digits = a_digits + b_digits
+        elif operator == '/':
+            digits = a_digits + precision
+        elif operator == '%':
+            digits = b_digits
+        else:
+            # '^' được tính bằng float nên không vượt quá giới hạn của float
+            digits = 309.0
+        
+        value = None
+        if a is not None and b is not None:
+            value = self._approximate(operator, a, b)
+            if value is not None:
+                digits = self._digits_of(value)
+        
+        if operator in '+-*/':
+            digits = self._rounded_digits(digits, precision)
+        return value, digits
+    
+    def _rounded_digits(self, digits: float, precision: int) -> float:
+        # Decimal làm tròn kết quả + - * / về `precision` chữ số có nghĩa: phần vượt quá chỉ nằm
+        # trong số mũ. Chỉ 'fact' (số nguyên chính xác) mới thật sự tăng số chữ số.
+        if digits <= precision or math.isinf(digits):
+            return digits
+        return precision + self._digits_of(digits)
+    
+    def _approximate(self, operator: str, a: float, b: float) -> Optional[float]:
+        try:
+            if operator == '+':
+                value = a + b
+            elif operator == '-':
+                value = a - b
+            elif operator == '*':
+                value = a * b
+            elif operator == '/':
+                value = a / b
+            elif operator == '%':
+                value = math.fmod(a, b)
+            else:
+                value = math.pow(a, b)
+        except (ArithmeticError, ValueError):
+            return None
+        
+        return value if math.isfinite(value) else None
+    
+    def _function(self, function: str, operand: Tuple[Optional[float], float]) -> Tuple[Optional[float], float]:
+        a, a_digits = operand
+        
+        if function == 'fact':
+            n = a if a is not None else 10 ** min(a_digits, 308)
+            digits = factorial_digits(n)
+            value = None
+            if a is not None and digits < 300:
+                value = math.exp(math.lgamma(a + 1)) if a >= 0 else None
+            return value, digits
+        
+        if function == 'abs':
+            return (abs(a) if a is not None else None), a_digits
+        
+        if function == 'sqrt':
+            if a is not None and a >= 0:
+                value = math.sqrt(a)
+                return value, self._digits_of(value)
+            return None, a_digits / 2 + 1
+        
+        return None, 1.0
+    
+    def _function_work(self, function: str, entry: Tuple[Optional[float], float]) -> float:
+        if function == 'fact':
+            # Nhân số nguyên lớn và chuyển sang chuỗi: tăng nhanh hơn tuyến tính theo số chữ số
+            return entry[1] ** 1.6
+        return 1.0
+    
+    def _digits_of(self, value: float) -> float:
+        magnitude = abs(value)
+        if magnitude < 1:
+            return 1.0
+        return math.floor(math.log10(magnitude)) + 1.0
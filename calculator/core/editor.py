@@ -0,0 +1,76 @@
+from typing import List
+
+NUMBER_CHARS = frozenset('0123456789.')
+SEGMENT_SEPARATORS = frozenset('+-*/')
+
+class ExpressionBuffer:
+    # Biểu thức được giữ dạng chuỗi và sửa tại chỗ theo từng phím; kiểm tra dấu '.'
+    # chỉ quét ngược số cuối cùng thay vì tách lại cả biểu thức
+    __slots__ = ('text',)
+    
+    def __init__(self, text: str = ""):
+        self.text = text
+    
+    @property
+    def tokens(self) -> List[str]:
+        # Chuỗi chữ số liền nhau là một token, các ký tự khác đứng riêng
+        tokens: List[str] = []
+        for char in self.text:
+            if char in NUMBER_CHARS and tokens and tokens[-1][-1] in NUMBER_CHARS:
+                tokens[-1] += char
+            else:
+                tokens.append(char)
+        return tokens
+    
+    @property
+    def last_char(self) -> str:
+        return self.text[-1:]
+    
+    @property
+    def last_number_has_decimal(self) -> bool:
+        return '.' in self.last_number()
+    
+    def __len__(self) -> int:
+        return len(self.text)
+    
+    def __bool__(self) -> bool:
+        return bool(self.text)
+    
+    def __str__(self) -> str:
+        return self.text
+    
+    def set_text(self, text: str) -> None:
+        self.text = text
+    
+    def clear(self) -> None:
+        self.text = ""
+    
+    def append(self, chars: str) -> None:
+        self.text += chars
+    
+    def pop(self) -> str:
+        char = self.text[-1:]
+        self.text = self.text[:-1]
+        return char
+    
+    def toggle_sign(self) -> None:
+        if self.text[:1] == '-':
+            self.text = self.text[1:]
+        else:
+            self.text = '-' + self.text
+    
+    def last_number(self) -> str:
+        # Sau phép toán, "số cuối cùng" vẫn là số đứng trước nó cho đến khi nhập số mới
+        text = self.text
+        end = len(text)
+        while end and self._is_separator(text[end - 1]):
+            end -= 1
+        
+        start = end
+        while start and not self._is_separator(text[start - 1]):
+            start -= 1
+        
+        return text[start:end]
+    
+    def _is_separator(self, char: str) -> bool:
+        return char in SEGMENT_SEPARATORS or char.isspace()
@@ -1,14 +1,21 @@
 import re
+import time
 from typing import List, Union, Optional, Tuple
 from decimal import Decimal, getcontext, InvalidOperation
 from math import sqrt, pow, log, sin, cos, tan, factorial
 
 from utils.constants import OPERATOR_PRECEDENCE, SUPPORTED_OPERATIONS
 from utils.exceptions import (
-    ExpressionSyntaxError, DivisionByZeroError, InvalidOperationError,
+    CalculatorError, ExpressionSyntaxError, DivisionByZeroError, InvalidOperationError,
     ParsingError, CalculationError, NumberOverflowError
 )
 from utils.logger import get_logger, logged
+from utils.metrics import StageMetrics
+from utils.tracing import traced
+from core.cache import PersistentResultCache, CacheKey
+from core.result import CalculationResult, format_decimal
+from core.canonical import ExpressionCanonicalizer
+from core.cost import CostEstimator, EvaluationBudget, EvaluationCost
 
 getcontext().prec = 28
 
@@ -39,6 +46,13 @@ class ExpressionTokenizer:
     
     @logged("Tokenizer")
     def tokenize(self, expression: str) -> List[Token]:
+        tokens = self.scan(expression)
+        
+        self.logger.debug(f"Tokenized '{expression}' into {len(tokens)} tokens")
+        return tokens
+    
+    @traced("tokenize", "tokenizer")
+    def scan(self, expression: str) -> List[Token]:
         tokens = []
         position = 0
         
@@ -67,9 +81,12 @@ class ExpressionTokenizer:
                 position = new_pos
                 continue
             
-            raise ParsingError(expression, f"Ký tự không nhận diện: '{expression[position]}' tại vị trí {position}")
+            raise ParsingError(
+                expression,
+                f"Ký tự không nhận diện: '{expression[position]}' tại vị trí {position}",
+                position
+            )
         
-        self.logger.debug(f"Tokenized '{expression}' into {len(tokens)} tokens")
         return tokens
     
     def _parse_number(self, expression: str, start_pos: int) -> Tuple[Token, int]:
@@ -99,7 +116,7 @@ class ExpressionTokenizer:
         functions = ['sqrt', 'sin', 'cos', 'tan', 'log', 'abs', 'fact']
         
         for func in functions:
-            if expression[position:].startswith(func):
+            if expression.startswith(func, position):
                 return func, position + len(func)
         
         return None
@@ -109,6 +126,7 @@ class ExpressionParser:
         self.logger = get_logger("Parser")
         self.tokenizer = ExpressionTokenizer()
     
+    @traced("parse", "parser")
     @logged("Parser")
     def parse(self, expression: str) -> List[Token]:
         try:
@@ -122,6 +140,13 @@ class ExpressionParser:
             self.logger.error(f"Parsing failed for '{expression}': {str(e)}")
             raise ParsingError(expression, str(e)) from e
     
+    @traced("parse", "parser")
+    def build_postfix(self, expression: str) -> List[Token]:
+        return self._infix_to_postfix(self.tokenizer.scan(expression))
+    
+    def build_postfix_from_tokens(self, tokens: List[Token]) -> List[Token]:
+        return self._infix_to_postfix(tokens)
+    
     def _infix_to_postfix(self, tokens: List[Token]) -> List[Token]:
         output_queue = []
         operator_stack = []
@@ -182,36 +207,48 @@ class ExpressionEvaluator:
         self.logger = get_logger("Evaluator")
     
     @logged("Evaluator")
-    def evaluate(self, postfix_tokens: List[Token]) -> Decimal:
+    def evaluate(self, postfix_tokens: List[Token],
+                 budget: Optional[EvaluationBudget] = None) -> Decimal:
+        try:
+            result = self.compute(postfix_tokens, budget)
+            self.logger.info(f"Evaluation completed: {result}")
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"Evaluation failed: {str(e)}")
+            raise CalculationError("", str(e)) from e
+    
+    @traced("evaluate", "evaluator")
+    def compute(self, postfix_tokens: List[Token],
+                budget: Optional[EvaluationBudget] = None) -> Decimal:
         if not postfix_tokens:
             return Decimal('0')
         
         stack = []
+        deadline = budget.deadline() if budget is not None else None
         
-        try:
-            for token in postfix_tokens:
-                if token.type == 'number':
-                    value = Decimal(token.value)
-                    stack.append(value)
-                    
-                elif token.type == 'operator':
-                    result = self._perform_operation(token.value, stack)
-                    stack.append(result)
-                    
-                elif token.type == 'function':
-                    result = self._perform_function(token.value, stack)
-                    stack.append(result)
+        for token in postfix_tokens:
+            if deadline is not None:
+                budget.check_deadline(deadline)
             
-            if len(stack) != 1:
-                raise CalculationError("", "Lỗi cấu trúc biểu thức")
+            if token.type == 'number':
+                value = Decimal(token.value)
+                stack.append(value)
             
-            result = stack[0]
-            self.logger.info(f"Evaluation completed: {result}")
-            return result
+            elif token.type == 'operator':
+                result = self._perform_operation(token.value, stack)
+                stack.append(result)
             
-        except Exception as e:
-            self.logger.error(f"Evaluation failed: {str(e)}")
-            raise CalculationError("", str(e)) from e
+            elif token.type == 'function':
+                if budget is not None and token.value == 'fact' and stack:
+                    budget.check_factorial(stack[-1])
+                result = self._perform_function(token.value, stack)
+                stack.append(result)
+        
+        if len(stack) != 1:
+            raise CalculationError("", "Lỗi cấu trúc biểu thức")
+        
+        return stack[0]
     
     def _perform_operation(self, operator: str, stack: List[Decimal]) -> Decimal:
         if len(stack) < 2:
@@ -285,19 +322,49 @@ class ExpressionEvaluator:
             raise CalculationError("", f"Lỗi function {function}: {str(e)}") from e
 
 class SafeCalculatorEngine:
-    def __init__(self):
+    def __init__(self, result_cache: Optional[PersistentResultCache] = None,
+                 budget: Optional[EvaluationBudget] = None,
+                 metrics: Optional[StageMetrics] = None):
         self.logger = get_logger("CalculatorEngine")
         self.parser = ExpressionParser()
         self.evaluator = ExpressionEvaluator()
+        self.canonicalizer = ExpressionCanonicalizer(self.parser)
+        self.cost_estimator = CostEstimator()
+        self.result_cache = result_cache
+        self.budget = budget if budget is not None else EvaluationBudget()
+        self.metrics = metrics if metrics is not None else StageMetrics()
     
     @logged("CalculatorEngine")
     def calculate(self, expression: str) -> str:
         self.logger.info(f"Calculating expression: '{expression}'")
         
         try:
+            metrics = self.metrics
+            if metrics.enabled:
+                start = time.perf_counter_ns()
+            
             postfix_tokens = self.parser.parse(expression)
-            result = self.evaluator.evaluate(postfix_tokens)
+            if metrics.enabled:
+                start = metrics.lap("parse", start)
+            
+            cache_key, cached = self._cache_lookup(postfix_tokens)
+            if metrics.enabled:
+                start = metrics.lap("cache_lookup", start)
+            if cached is not None:
+                self.logger.debug(f"Result cache hit: '{expression}' = {cached}")
+                return cached
+            
+            self.budget.check(self.cost_estimator.estimate(postfix_tokens))
+            result = self.evaluator.evaluate(postfix_tokens, self.budget)
+            if metrics.enabled:
+                start = metrics.lap("evaluate", start)
+            
             result_str = self._format_result(result)
+            if metrics.enabled:
+                metrics.lap("format", start)
+            
+            if cache_key is not None:
+                self.result_cache.put(cache_key, result_str)
             
             self.logger.info(f"Calculation successful: '{expression}' = {result_str}")
             return result_str
@@ -306,10 +373,83 @@ class SafeCalculatorEngine:
             self.logger.error(f"Calculation failed: {str(e)}")
             raise
     
-    def _format_result(self, result: Decimal) -> str:
-        result_str = str(result.normalize())
+    def try_calculate(self, expression: str) -> CalculationResult:
+        metrics = self.metrics
+        if metrics.enabled:
+            start = time.perf_counter_ns()
         
-        if '.' in result_str and result_str.endswith('.0'):
-            result_str = result_str[:-2]
+        try:
+            postfix_tokens = self.parser.build_postfix(expression)
+        except (CalculatorError, ArithmeticError, ValueError) as e:
+            return self._failure_result(expression, e)
+        
+        if metrics.enabled:
+            metrics.lap("parse", start)
+        
+        return self.try_calculate_tokens(expression, postfix_tokens)
+    
+    def lookup(self, expression: str) -> Optional[CalculationResult]:
+        # Kết quả có được mà không cần tính: lỗi cú pháp hoặc có sẵn trong cache; None khi phải tính
+        try:
+            postfix_tokens = self.parser.build_postfix(expression)
+        except (CalculatorError, ArithmeticError, ValueError) as e:
+            return self._failure_result(expression, e)
+        
+        # Trượt ở đây chưa tính: biểu thức sẽ được tra lại (và tính là trượt) khi thực sự tính
+        cached = self._cache_lookup(postfix_tokens, record_miss=False)[1]
+        if cached is None:
+            return None
+        return CalculationResult.success(expression, cached)
+    
+    def try_calculate_tokens(self, expression: str, postfix_tokens: List[Token],
+                             cost: Optional[EvaluationCost] = None) -> CalculationResult:
+        # Dành cho nơi gọi đã tự parse (và ước lượng chi phí) để không phải làm lại
+        metrics = self.metrics
+        if metrics.enabled:
+            start = time.perf_counter_ns()
         
-        return result_str
\ No newline at end of file
+        try:
+            cache_key, cached = self._cache_lookup(postfix_tokens)
+            if metrics.enabled:
+                start = metrics.lap("cache_lookup", start)
+            if cached is not None:
+                return CalculationResult.success(expression, cached)
+            
+            self.budget.check(cost if cost is not None else self.cost_estimator.estimate(postfix_tokens))
+            result = self.evaluator.compute(postfix_tokens, self.budget)
+            if metrics.enabled:
+                start = metrics.lap("evaluate", start)
+            
+            result_str = self._format_result(result)
+            if metrics.enabled:
+                metrics.lap("format", start)
+        
+        except (CalculatorError, ArithmeticError, ValueError) as e:
+            return self._failure_result(expression, e)
+        
+        if cache_key is not None:
+            self.result_cache.put(cache_key, result_str)
+        
+        return CalculationResult.success(expression, result_str)
+    
+    def _failure_result(self, expression: str, error: Exception) -> CalculationResult:
+        if isinstance(error, CalculatorError):
+            return CalculationResult.failure(
+                expression, error.error_code, getattr(error, 'position', None)
+            )
+        return CalculationResult.failure(expression, "CALCULATION_ERROR")
+    
+    def _cache_lookup(self, postfix_tokens: List[Token],
+                      record_miss: bool = True) -> Tuple[Optional[CacheKey], Optional[str]]:
+        if self.result_cache is None:
+            return None, None
+        
+        canonical = self.canonicalizer.canonicalize_postfix(postfix_tokens)
+        if not canonical:
+            return None, None
+        
+        cache_key = self.result_cache.make_key(canonical)
+        return cache_key, self.result_cache.get(cache_key, record_miss)
+    
+    def _format_result(self, result: Decimal) -> str:
+        return format_decimal(result)
\ No newline at end of file
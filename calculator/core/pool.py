@@ -0,0 +1,91 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from core.cache import PersistentResultCache, RejectedExpressionCache
+from core.calculator import CalculatorEngine
+from core.cost import EvaluationBudget
+from core.result import CalculationResult
+from core.stateless import StatelessCalculator
+from utils.constants import ENGINE_POOL_SIZE
+from utils.logger import get_logger
+from utils.metrics import StageMetrics
+
+class EnginePool:
+    def __init__(self, size: int = ENGINE_POOL_SIZE,
+                 result_cache: Optional[PersistentResultCache] = None,
+                 rejected_cache: Optional[RejectedExpressionCache] = None,
+                 budget: Optional[EvaluationBudget] = None,
+                 metrics: Optional[StageMetrics] = None):
+        self.logger = get_logger("EnginePool")
+        self.size = max(1, size)
+        
+        # Mọi engine trong pool dùng chung parser, validator, cache và metrics
+        self.stateless = StatelessCalculator(result_cache, rejected_cache, budget, metrics)
+        
+        # LIFO để engine vừa trả về (còn "nóng") được dùng lại trước
+        self._idle: "queue.LifoQueue[CalculatorEngine]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self.checkouts = 0
+        self.waits = 0
+    
+    def evaluate(self, expression: str) -> CalculationResult:
+        # Tính toán không cần trạng thái phiên: không phải mượn engine
+        return self.stateless.evaluate(expression)
+    
+    def acquire(self, timeout: Optional[float] = None) -> CalculatorEngine:
+        engine = self._take_idle()
+        if engine is None:
+            engine = self._create()
+        
+        if engine is None:
+            with self._lock:
+                self.waits += 1
+            try:
+                engine = self._idle.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError(f"Không có engine rảnh sau {timeout} giây") from None
+        
+        with self._lock:
+            self.checkouts += 1
+        return engine
+    
+    def release(self, engine: CalculatorEngine) -> None:
+        # Xóa trạng thái phiên để người dùng tiếp theo không thấy biểu thức, bộ nhớ hay lịch sử cũ
+        engine.reset()
+        self._idle.put(engine)
+    
+    @contextmanager
+    def session(self, timeout: Optional[float] = None) -> Iterator[CalculatorEngine]:
+        engine = self.acquire(timeout)
+        try:
+            yield engine
+        finally:
+            self.release(engine)
+    
+    def _take_idle(self) -> Optional[CalculatorEngine]:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return None
+    
+    def _create(self) -> Optional[CalculatorEngine]:
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        
+        self.logger.debug(f"Creating pooled engine {self._created}/{self.size}")
+        return CalculatorEngine(stateless=self.stateless)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'size': self.size,
+                'created': self._created,
+                'idle': self._idle.qsize(),
+                'checkouts': self.checkouts,
+                'waits': self.waits
+            }
@@ -0,0 +1,117 @@
+from bisect import bisect_left
+from typing import List, Optional
+
+from core.parser import SafeCalculatorEngine, Token
+from core.cost import EvaluationBudget
+from utils.constants import PREVIEW_MAX_SECONDS
+from utils.exceptions import CalculatorError
+
+class IncrementalTokenizer:
+    def __init__(self, tokenizer: 'ExpressionTokenizer'):
+        self.tokenizer = tokenizer
+        self._text = ""
+        self._tokens: List[Token] = []
+        self._ends: List[int] = []
+        
+        self.reused_tokens = 0
+        self.scanned_chars = 0
+    
+    def tokenize(self, expression: str) -> List[Token]:
+        prefix = self._common_prefix(self._text, expression)
+        
+        # Token kết thúc ngay tại ranh giới có thể bị kéo dài (ví dụ "12" -> "123"), nên quét lại
+        keep = bisect_left(self._ends, prefix)
+        start = self._ends[keep - 1] if keep else 0
+        del self._tokens[keep:]
+        del self._ends[keep:]
+        self._text = expression[:start]
+        
+        tail = self.tokenizer.scan(expression[start:])
+        for token in tail:
+            token.position += start
+            self._tokens.append(token)
+            self._ends.append(token.position + len(token.value))
+        
+        self._text = expression
+        self.reused_tokens += keep
+        self.scanned_chars += len(expression) - start
+        return list(self._tokens)
+    
+    def reset(self) -> None:
+        self._text = ""
+        self._tokens.clear()
+        self._ends.clear()
+    
+    def _common_prefix(self, old: str, new: str) -> int:
+        limit = min(len(old), len(new))
+        if old[:limit] == new[:limit]:
+            return limit
+        
+        # Tìm nhị phân trên so sánh chuỗi (chạy trong C) thay vì duyệt từng ký tự
+        low, high = 0, limit
+        while low < high:
+            middle = (low + high + 1) // 2
+            if old[:middle] == new[:middle]:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+class ExpressionPreviewer:
+    def __init__(self, engine: Optional[SafeCalculatorEngine] = None,
+                 budget: Optional[EvaluationBudget] = None):
+        self.engine = engine if engine is not None else SafeCalculatorEngine()
+        self.budget = budget if budget is not None else EvaluationBudget(max_seconds=PREVIEW_MAX_SECONDS)
+        self.tokenizer = IncrementalTokenizer(self.engine.parser.tokenizer)
+        
+        self._last_text: Optional[str] = None
+        self._last_preview: Optional[str] = None
+    
+    def preview(self, expression: str) -> Optional[str]:
+        text = self.engine.canonicalizer.normalize_text(expression)
+        if text == self._last_text:
+            return self._last_preview
+        
+        self._last_text = text
+        self._last_preview = self._evaluate(text)
+        return self._last_preview
+    
+    def _evaluate(self, text: str) -> Optional[str]:
+        try:
+            tokens = self._complete(self.tokenizer.tokenize(text))
+            if not tokens:
+                return None
+            
+            postfix_tokens = self.engine.parser.build_postfix_from_tokens(tokens)
+            self.budget.check(self.engine.cost_estimator.estimate(postfix_tokens))
+            result = self.engine.evaluator.compute(postfix_tokens, self.budget)
+        
+        except CalculatorError:
+            return None
+        except (ArithmeticError, ValueError):
+            return None
+        
+        return self.engine._format_result(result)
+    
+    def _complete(self, tokens: List[Token]) -> List[Token]:
+        # Bỏ phép toán, hàm và ngoặc mở còn dang dở ở cuối, rồi tự đóng các ngoặc còn mở
+        end = len(tokens)
+        while end and (tokens[end - 1].type == 'function' or
+                       (tokens[end - 1].type == 'operator' and tokens[end - 1].value != ')')):
+            end -= 1
+        
+        completed = tokens[:end]
+        depth = 0
+        for token in completed:
+            if token.value == '(':
+                depth += 1
+            elif token.value == ')':
+                depth -= 1
+        
+        completed.extend(Token(')', 'operator', -1) for _ in range(max(depth, 0)))
+        return completed
+    
+    def reset(self) -> None:
+        self.tokenizer.reset()
+        self._last_text = None
+        self._last_preview = None
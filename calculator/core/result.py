@@ -0,0 +1,71 @@
+from decimal import Decimal
+from typing import Optional, Dict, Any
+
+from utils.constants import ERROR_MESSAGES, USER_ERROR_MESSAGES
+
+def format_decimal(value: Decimal) -> str:
+    result_str = str(value.normalize())
+    
+    if '.' in result_str and result_str.endswith('.0'):
+        result_str = result_str[:-2]
+    
+    return result_str
+
+def error_message(error_code: Optional[str]) -> str:
+    if error_code in ERROR_MESSAGES:
+        return ERROR_MESSAGES[error_code]
+    
+    return USER_ERROR_MESSAGES.get(error_code, "Lỗi")
+
+class CalculationResult:
+    __slots__ = ('expression', 'value', 'error_code', 'message', 'position')
+    
+    def __init__(self, expression: str, value: Optional[str] = None,
+                 error_code: Optional[str] = None, message: Optional[str] = None,
+                 position: Optional[int] = None):
+        self.expression = expression
+        self.value = value
+        self.error_code = error_code
+        self.message = message
+        self.position = position
+    
+    @classmethod
+    def success(cls, expression: str, value: str) -> 'CalculationResult':
+        return cls(expression, value=value)
+    
+    @classmethod
+    def failure(cls, expression: str, error_code: Optional[str],
+                position: Optional[int] = None) -> 'CalculationResult':
+        # Thông báo được ánh xạ từ error_code tại đây để GUI, batch và dịch vụ trả cùng một câu
+        error_code = error_code or "CALCULATION_ERROR"
+        return cls(expression, error_code=error_code, message=error_message(error_code), position=position)
+    
+    @property
+    def ok(self) -> bool:
+        return self.error_code is None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        if self.ok:
+            return {'expression': self.expression, 'ok': True, 'value': self.value}
+        
+        return {
+            'expression': self.expression,
+            'ok': False,
+            'error_code': self.error_code,
+            'message': self.message,
+            'position': self.position
+        }
+    
+    def __repr__(self) -> str:
+        if self.ok:
+            return f"CalculationResult({self.expression!r} = {self.value})"
+        return f"CalculationResult({self.expression!r}, error={self.error_code})"
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CalculationResult):
+            return False
+        return (self.expression == other.expression and self.value == other.value
+                and self.error_code == other.error_code and self.position == other.position)
+    
+    def __hash__(self) -> int:
+        return hash((self.expression, self.value, self.error_code, self.position))
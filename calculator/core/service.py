@@ -0,0 +1,276 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+from core.cache import PersistentResultCache
+from core.cost import EvaluationBudget, EvaluationCost
+from core.parser import SafeCalculatorEngine
+from core.result import CalculationResult
+from core.worker import InlineExecutor, initialize_worker, evaluate_program_in_worker
+from utils.constants import (
+    SERVICE_HEAVY_WORKERS, SERVICE_HEAVY_THRESHOLD, SERVICE_MAX_PIPELINE,
+    SERVICE_MAX_LINE_BYTES, SERVICE_SOCKET_MODE
+)
+from utils.exceptions import CalculatorError
+from utils.logger import get_logger
+from utils.metrics import StageMetrics
+
+class EvaluationService:
+    def __init__(self, socket_path: str, result_cache: Optional[PersistentResultCache] = None,
+                 budget: Optional[EvaluationBudget] = None,
+                 heavy_workers: int = SERVICE_HEAVY_WORKERS,
+                 heavy_threshold: float = SERVICE_HEAVY_THRESHOLD,
+                 max_pipeline: int = SERVICE_MAX_PIPELINE, inline: bool = False):
+        self.logger = get_logger("EvaluationService")
+        self.socket_path = socket_path
+        self.heavy_workers = max(1, heavy_workers)
+        self.heavy_threshold = heavy_threshold
+        self.max_pipeline = max(1, max_pipeline)
+        self.inline = inline
+        
+        # Engine "ấm" dùng chung cho mọi kết nối; chỉ chạy trên thread của event loop
+        self.metrics = StageMetrics(enabled=True)
+        self.result_cache = result_cache if result_cache is not None else PersistentResultCache(":memory:")
+        self.engine = SafeCalculatorEngine(self.result_cache, budget, self.metrics)
+        
+        self.connections = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._executor: Optional[Executor] = None
+    
+    async def start(self) -> None:
+        if os.path.exists(self.socket_path):
+            # File socket cũ còn sót lại sau lần chạy trước bị dừng đột ngột
+            os.unlink(self.socket_path)
+        
+        self._server = await asyncio.start_unix_server(
+            self._handle_connection, path=self.socket_path, limit=SERVICE_MAX_LINE_BYTES
+        )
+        os.chmod(self.socket_path, SERVICE_SOCKET_MODE)
+        self.logger.info(f"Evaluation service listening on {self.socket_path}")
+    
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+    
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+        
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        
+        self.result_cache.close()
+        self.logger.info("Evaluation service stopped")
+    
+    def run(self) -> None:
+        asyncio.run(self._serve_until_signal())
+    
+    async def _serve_until_signal(self) -> None:
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        
+        # SIGTERM/SIGINT dừng server gọn gàng để xóa file socket và đóng cache
+        for signal_number in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signal_number, task.cancel)
+        
+        try:
+            await self.serve_forever()
+        except asyncio.CancelledError:
+            pass
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self.metrics.increment("service_connections", "opened")
+        
+        # Phản hồi được ghi theo đúng thứ tự yêu cầu; hàng đợi có giới hạn tạo backpressure
+        responses: asyncio.Queue = asyncio.Queue(self.max_pipeline)
+        sender = asyncio.create_task(self._send_responses(responses, writer))
+        
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    await self._enqueue(responses, self._error_response(None, "REQUEST_TOO_LARGE", "Yêu cầu quá dài"), sender)
+                    break
+                except ConnectionError:
+                    break
+                
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                
+                if not await self._enqueue(responses, self._dispatch(line, time.perf_counter_ns()), sender):
+                    break
+        
+        finally:
+            try:
+                if not await self._enqueue(responses, None, sender):
+                    sender.cancel()
+                await asyncio.gather(sender, return_exceptions=True)
+            finally:
+                self.connections -= 1
+    
+    async def _enqueue(self, responses: asyncio.Queue, response: Any, sender: asyncio.Task) -> bool:
+        # Sender dừng khi client ngắt kết nối: không còn ai lấy hàng đợi nên put() sẽ chờ mãi
+        if sender.done():
+            return False
+        
+        try:
+            responses.put_nowait(response)
+            return True
+        except asyncio.QueueFull:
+            pass
+        
+        put = asyncio.ensure_future(responses.put(response))
+        await asyncio.wait((put, sender), return_when=asyncio.FIRST_COMPLETED)
+        if put.done():
+            return True
+        
+        put.cancel()
+        return False
+    
+    async def _send_responses(self, responses: asyncio.Queue, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                response = await responses.get()
+                if response is None:
+                    break
+                
+                if isinstance(response, asyncio.Future):
+                    response = await response
+                writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b"\n")
+                
+                # Gom nhiều phản hồi vào một lần ghi khi client gửi dồn (pipelining)
+                if responses.empty():
+                    await writer.drain()
+        
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    def _dispatch(self, line: bytes, start_ns: int) -> Any:
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError:
+            return self._error_response(None, "INVALID_REQUEST", "Yêu cầu không phải JSON hợp lệ")
+        
+        request_id = request.get('id')
+        
+        if request.get('op') == 'stats':
+            return {'id': request_id, 'ok': True, 'stats': self.get_stats()}
+        
+        expression = request.get('expression')
+        if not isinstance(expression, str):
+            return self._error_response(request_id, "INVALID_REQUEST", "Thiếu trường 'expression'")
+        
+        engine = self.engine
+        normalized = engine.canonicalizer.normalize_text(expression)
+        
+        try:
+            parse_start = time.perf_counter_ns()
+            postfix_tokens = engine.parser.build_postfix(normalized)
+            cost = engine.cost_estimator.estimate(postfix_tokens)
+            self.metrics.lap("parse", parse_start)
+        except (CalculatorError, ArithmeticError, ValueError):
+            # Để engine tạo kết quả lỗi giống hệt đường tính thông thường
+            return self._finish(request_id, expression, engine.try_calculate(normalized), start_ns)
+        
+        if not self._is_heavy(cost):
+            result = engine.try_calculate_tokens(normalized, postfix_tokens, cost)
+            return self._finish(request_id, expression, result, start_ns)
+        
+        # Kết quả nặng được cache tại đây vì worker process không dùng chung cache
+        cache_key = None
+        canonical = engine.canonicalizer.canonicalize_postfix(postfix_tokens)
+        if canonical:
+            cache_key = self.result_cache.make_key(canonical)
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return self._finish(request_id, expression, CalculationResult.success(expression, cached), start_ns)
+        
+        self.metrics.increment("service_requests", "heavy")
+        future = asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), evaluate_program_in_worker, normalized
+        )
+        return asyncio.ensure_future(self._finish_heavy(request_id, expression, future, cache_key, start_ns))
+    
+    def _is_heavy(self, cost: EvaluationCost) -> bool:
+        if cost.work + cost.operations < self.heavy_threshold:
+            return False
+        
+        # Biểu thức vượt ngân sách bị engine từ chối ngay, không cần gửi sang worker
+        try:
+            self.engine.budget.check(cost)
+        except CalculatorError:
+            return False
+        return True
+    
+    async def _finish_heavy(self, request_id: Any, expression: str, future: asyncio.Future,
+                            cache_key: Optional[tuple], start_ns: int) -> Dict[str, Any]:
+        try:
+            result, timings = await future
+            self.metrics.merge(timings)
+        except Exception as e:
+            self.logger.error(f"Heavy evaluation of '{expression}' failed: {str(e)}")
+            result = CalculationResult.failure(expression, "UNEXPECTED_ERROR")
+        
+        if result.ok and cache_key is not None:
+            self.result_cache.put(cache_key, result.value)
+        
+        return self._finish(request_id, expression, result, start_ns)
+    
+    def _finish(self, request_id: Any, expression: str, result: CalculationResult,
+                start_ns: int) -> Dict[str, Any]:
+        result.expression = expression
+        self.metrics.record_outcome(result.error_code)
+        self.metrics.record("request", time.perf_counter_ns() - start_ns)
+        
+        response = result.to_dict()
+        response['id'] = request_id
+        return response
+    
+    def _error_response(self, request_id: Any, error_code: str, message: str) -> Dict[str, Any]:
+        self.metrics.increment("errors", error_code)
+        return {'id': request_id, 'ok': False, 'error_code': error_code, 'message': message}
+    
+    def _get_executor(self) -> Executor:
+        # Worker gửi thời gian từng bước về cùng kết quả; cache do process chính giữ
+        initargs = (None, None, 0.0, self.metrics.enabled)
+        if self._executor is None and self.inline:
+            initialize_worker(*initargs)
+            self._executor = InlineExecutor()
+        elif self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                self.heavy_workers, mp_context=multiprocessing.get_context('spawn'),
+                initializer=initialize_worker, initargs=initargs
+            )
+        return self._executor
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'stages': self.metrics.snapshot(),
+            'counters': self.metrics.counter_snapshot(),
+            'connections': self.connections,
+            'result_cache': self.result_cache.get_stats()
+        }
@@ -0,0 +1,95 @@
+from typing import Any, Dict, List, NamedTuple
+
+SNAPSHOT_VERSION = 1
+FLAG_ERROR_STATE = 0x01
+HISTORY_FIELDS = ('expression', 'result', 'timestamp', 'formatted_time')
+
+class SessionState(NamedTuple):
+    expression: str
+    last_result: str
+    memory_value: str
+    is_error_state: bool
+    history: List[Dict[str, Any]]
+
+# Định dạng: [version][flags][số mục lịch sử], độ dài (tính theo ký tự, varint) của từng chuỗi
+# (expression, last_result, memory_value rồi 4 chuỗi cho mỗi mục lịch sử), sau cùng là toàn bộ
+# các chuỗi nối liền mã hóa UTF-8 một lần: khôi phục chỉ cần một lần decode và cắt chuỗi
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data: bytes, position: int) -> tuple:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+def encode_session(state: SessionState) -> bytes:
+    texts = [state.expression, state.last_result, state.memory_value]
+    for entry in state.history:
+        for field in HISTORY_FIELDS:
+            texts.append(str(entry.get(field, "")))
+    
+    out = bytearray((SNAPSHOT_VERSION, FLAG_ERROR_STATE if state.is_error_state else 0))
+    _write_varint(out, len(state.history))
+    for text in texts:
+        length = len(text)
+        if length < 0x80:
+            out.append(length)
+        else:
+            _write_varint(out, length)
+    
+    out += "".join(texts).encode('utf-8')
+    return bytes(out)
+
+def decode_session(data: bytes) -> SessionState:
+    try:
+        if data[0] != SNAPSHOT_VERSION:
+            raise ValueError(f"phiên bản {data[0]} không được hỗ trợ")
+        
+        flags = data[1]
+        count, position = _read_varint(data, 2)
+        
+        lengths = []
+        for _ in range(3 + count * len(HISTORY_FIELDS)):
+            length = data[position]
+            if length < 0x80:
+                position += 1
+            else:
+                length, position = _read_varint(data, position)
+            lengths.append(length)
+        
+        payload = data[position:].decode('utf-8')
+    
+    except (IndexError, UnicodeDecodeError) as e:
+        raise ValueError(f"Snapshot phiên không hợp lệ: dữ liệu bị cắt hoặc hỏng ({type(e).__name__})") from e
+    except ValueError as e:
+        raise ValueError(f"Snapshot phiên không hợp lệ: {str(e)}") from e
+    
+    if sum(lengths) != len(payload):
+        raise ValueError("Snapshot phiên không hợp lệ: độ dài dữ liệu không khớp")
+    
+    texts = []
+    offset = 0
+    for length in lengths:
+        end = offset + length
+        texts.append(payload[offset:end])
+        offset = end
+    
+    history = []
+    for index in range(3, len(texts), 4):
+        expression, result, timestamp, formatted_time = texts[index:index + 4]
+        entry = {'expression': expression, 'result': result, 'timestamp': timestamp}
+        if formatted_time:
+            entry['formatted_time'] = formatted_time
+        history.append(entry)
+    
+    return SessionState(texts[0], texts[1], texts[2], bool(flags & FLAG_ERROR_STATE), history)
@@ -0,0 +1,132 @@
+import threading
+import time
+from decimal import getcontext, localcontext
+from typing import Optional
+
+from core.cache import PersistentResultCache, RejectedExpressionCache
+from core.cost import EvaluationBudget
+from core.parser import SafeCalculatorEngine
+from core.result import CalculationResult, error_message
+from core.validator import InputSanitizer, ExpressionValidator
+from utils.exceptions import CalculatorError
+from utils.logger import get_logger, log_error_with_context
+from utils.metrics import StageMetrics
+
+class StatelessCalculator:
+    def __init__(self, result_cache: Optional[PersistentResultCache] = None,
+                 rejected_cache: Optional[RejectedExpressionCache] = None,
+                 budget: Optional[EvaluationBudget] = None,
+                 metrics: Optional[StageMetrics] = None):
+        self.logger = get_logger("StatelessCalculator")
+        self.metrics = metrics if metrics is not None else StageMetrics()
+        
+        # Các thành phần dưới đây không giữ trạng thái giữa các lần gọi; cache có khóa riêng
+        self.sanitizer = InputSanitizer()
+        self.validator = ExpressionValidator()
+        self.calculation_engine = SafeCalculatorEngine(result_cache, budget, self.metrics)
+        self.rejected_cache = rejected_cache if rejected_cache is not None else RejectedExpressionCache()
+        
+        # Context Decimal là riêng của từng thread: cố định độ chính xác lúc khởi tạo
+        self.decimal_context = getcontext().copy()
+    
+    def evaluate(self, expression: str) -> CalculationResult:
+        with localcontext(self.decimal_context):
+            result = self._evaluate(expression)
+        
+        if self.metrics.enabled:
+            self.metrics.record_outcome(result.error_code)
+        return result
+    
+    def _evaluate(self, expression: str) -> CalculationResult:
+        if not expression or expression.strip() == "":
+            return CalculationResult.success(expression, "0")
+        
+        rejection = self.rejected_cache.get(expression)
+        if rejection is not None:
+            return CalculationResult.failure(expression, rejection[0])
+        
+        metrics = self.metrics
+        if metrics.enabled:
+            started = start = time.perf_counter_ns()
+        
+        try:
+            sanitized = self.sanitizer.sanitize_calculator_input(expression)
+            if metrics.enabled:
+                start = metrics.lap("sanitize", start)
+            
+            validated = self.validator.validate_expression(sanitized)
+            if metrics.enabled:
+                start = metrics.lap("validate", start)
+            
+            result = self.calculation_engine.try_calculate(validated)
+            if metrics.enabled:
+                metrics.lap("calculate", start)
+                metrics.lap("total", started)
+        
+        except CalculatorError as e:
+            result = CalculationResult.failure(
+                expression, e.error_code, getattr(e, 'position', None)
+            )
+        
+        except Exception as e:
+            log_error_with_context(e, {'expression': expression, 'error_type': type(e).__name__})
+            return CalculationResult.failure(expression, "UNEXPECTED_ERROR")
+        
+        if not result.ok:
+            self.remember_rejection(expression, result.error_code, result.message)
+        
+        result.expression = expression
+        return result
+    
+    def precheck(self, expression: str) -> Optional[CalculationResult]:
+        # Dùng trước khi gửi biểu thức sang worker process: trả kết quả ngay nếu không cần tính
+        with localcontext(self.decimal_context):
+            return self._precheck(expression)
+    
+    def _precheck(self, expression: str) -> Optional[CalculationResult]:
+        if not expression or expression.strip() == "":
+            return CalculationResult.success(expression, "0")
+        
+        rejection = self.rejected_cache.get(expression)
+        if rejection is not None:
+            return CalculationResult.failure(expression, rejection[0])
+        
+        try:
+            sanitized = self.sanitizer.sanitize_calculator_input(expression)
+            validated = self.validator.validate_expression(sanitized)
+            result = self.calculation_engine.lookup(validated)
+        except CalculatorError as e:
+            result = CalculationResult.failure(expression, e.error_code, getattr(e, 'position', None))
+        except Exception:
+            # Để worker xử lý và ghi log như một phép tính bình thường
+            return None
+        
+        if result is None:
+            return None
+        
+        if not result.ok:
+            self.remember_rejection(expression, result.error_code, result.message)
+        
+        result.expression = expression
+        return result
+    
+    def remember_rejection(self, expression: str, error_code: Optional[str], message: str) -> None:
+        # Vượt ngân sách thời gian phụ thuộc tải máy nên không được cache
+        if error_code != "BUDGET_EXCEEDED":
+            self.rejected_cache.put(expression, error_code, message)
+
+_default_calculator: Optional[StatelessCalculator] = None
+_default_lock = threading.Lock()
+
+def get_default_calculator() -> StatelessCalculator:
+    global _default_calculator
+    
+    if _default_calculator is None:
+        with _default_lock:
+            if _default_calculator is None:
+                _default_calculator = StatelessCalculator()
+    
+    return _default_calculator
+
+def evaluate(expression: str) -> CalculationResult:
+    return get_default_calculator().evaluate(expression)
@@ -0,0 +1,192 @@
+import math
+import re
+from decimal import Decimal
+from typing import Iterable, Iterator, List, Optional
+
+from core.parser import ExpressionEvaluator
+from core.cost import EvaluationBudget
+from core.result import CalculationResult, format_decimal
+from utils.constants import (
+    OPERATOR_PRECEDENCE, MAX_EVAL_DIGITS, LARGE_EXPRESSION_MAX_LENGTH,
+    LARGE_EXPRESSION_MAX_DEPTH, LARGE_EXPRESSION_MAX_SECONDS, LARGE_EXPRESSION_CHUNK_SIZE
+)
+from utils.exceptions import (
+    CalculatorError, ExpressionSyntaxError, ExpressionTooLongError, EmptyExpressionError,
+    EvaluationBudgetExceededError
+)
+from utils.logger import get_logger
+
+# Nhóm: 1 số, 2 toán tử hai ngôi, 3 '(', 4 ')', 5 hàm (kèm '('), 6 khoảng trắng, 7 ký tự không hợp lệ
+TOKEN_PATTERN = re.compile(
+    r'(\d+\.?\d*|\.\d+)|([+\-*/%^])|(\()|(\))|(sqrt|sin|cos|tan|log|abs|fact)\(|(\s+)|(.)',
+    re.DOTALL
+)
+# Ký tự có thể thuộc về một token chưa kết thúc ở cuối chunk
+PARTIAL_TOKEN_CHARS = frozenset('0123456789.abcfgilnoqrst')
+DEADLINE_CHECK_INTERVAL = 4096
+EXCERPT_RADIUS = 20
+
+class _StreamState:
+    __slots__ = ('operands', 'operators', 'expect_operand', 'offset', 'depth', 'tokens', 'deadline')
+    
+    def __init__(self, deadline: Optional[float]):
+        self.operands: List[Decimal] = []
+        # Toán tử một ký tự, '(' hoặc tên hàm nằm ngay dưới '(' của nó
+        self.operators: List[str] = []
+        self.expect_operand = True
+        self.offset = 0
+        self.depth = 0
+        self.tokens = 0
+        self.deadline = deadline
+
+class StreamingEvaluator(ExpressionEvaluator):
+    def __init__(self, budget: Optional[EvaluationBudget] = None,
+                 max_length: int = LARGE_EXPRESSION_MAX_LENGTH,
+                 chunk_size: int = LARGE_EXPRESSION_CHUNK_SIZE):
+        super().__init__()
+        self.logger = get_logger("StreamingEvaluator")
+        self.max_length = max_length
+        self.chunk_size = chunk_size
+        self.budget = budget if budget is not None else EvaluationBudget(
+            max_digits=MAX_EVAL_DIGITS,
+            max_operations=math.inf,
+            max_depth=LARGE_EXPRESSION_MAX_DEPTH,
+            max_seconds=LARGE_EXPRESSION_MAX_SECONDS
+        )
+    
+    def evaluate_text(self, expression: str) -> Decimal:
+        return self.evaluate_chunks((expression,))
+    
+    def evaluate_file(self, path: str) -> Decimal:
+        with open(path, 'r', encoding='utf-8') as source:
+            return self.evaluate_chunks(self._read_chunks(source))
+    
+    def evaluate_chunks(self, chunks: Iterable[str]) -> Decimal:
+        state = _StreamState(self.budget.deadline())
+        carry = ""
+        
+        for chunk in chunks:
+            text = carry + chunk if carry else chunk
+            
+            # Giữ lại phần cuối có thể là token bị cắt ngang (số hoặc tên hàm) cho chunk sau
+            cut = len(text)
+            while cut > 0 and text[cut - 1] in PARTIAL_TOKEN_CHARS:
+                cut -= 1
+            
+            self._feed(state, text, cut)
+            carry = text[cut:]
+        
+        if carry:
+            self._feed(state, carry, len(carry))
+        
+        return self._finish(state)
+    
+    def try_evaluate(self, expression: str) -> CalculationResult:
+        try:
+            result = self.evaluate_text(expression)
+        except CalculatorError as e:
+            return CalculationResult.failure(
+                expression, e.error_code, getattr(e, 'position', None)
+            )
+        except (ArithmeticError, ValueError) as e:
+            return CalculationResult.failure(expression, "CALCULATION_ERROR")
+        
+        return CalculationResult.success(expression, format_decimal(result))
+    
+    def _read_chunks(self, source) -> Iterator[str]:
+        while True:
+            chunk = source.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    
+    def _feed(self, state: _StreamState, text: str, end: int) -> None:
+        if state.offset + end > self.max_length:
+            raise ExpressionTooLongError(state.offset + end, self.max_length)
+        
+        operands = state.operands
+        operators = state.operators
+        
+        for match in TOKEN_PATTERN.finditer(text, 0, end):
+            kind = match.lastindex
+            
+            if kind == 6:
+                continue
+            
+            state.tokens += 1
+            if state.deadline is not None and state.tokens % DEADLINE_CHECK_INTERVAL == 0:
+                self.budget.check_deadline(state.deadline)
+            
+            if kind == 1:
+                if not state.expect_operand:
+                    self._syntax_error(state, text, match.start())
+                operands.append(Decimal(match.group(1)))
+                state.expect_operand = False
+            
+            elif kind == 2:
+                if state.expect_operand:
+                    self._syntax_error(state, text, match.start())
+                operator = match.group(2)
+                precedence = OPERATOR_PRECEDENCE.get(operator, 0)
+                
+                # Kết hợp trái như ExpressionParser: gộp khi toán tử trên đỉnh có độ ưu tiên >=
+                while (operators and operators[-1] != '(' and
+                       OPERATOR_PRECEDENCE.get(operators[-1], 0) >= precedence):
+                    operands.append(self._perform_operation(operators.pop(), operands))
+                
+                operators.append(operator)
+                state.expect_operand = True
+            
+            elif kind == 3 or kind == 5:
+                if not state.expect_operand:
+                    self._syntax_error(state, text, match.start())
+                
+                state.depth += 1
+                if state.depth > self.budget.max_depth:
+                    raise EvaluationBudgetExceededError("độ sâu", state.depth, self.budget.max_depth)
+                
+                if kind == 5:
+                    operators.append(match.group(5))
+                operators.append('(')
+            
+            elif kind == 4:
+                if state.expect_operand:
+                    self._syntax_error(state, text, match.start())
+                
+                while operators and operators[-1] != '(':
+                    operands.append(self._perform_operation(operators.pop(), operands))
+                
+                if not operators:
+                    self._syntax_error(state, text, match.start())
+                
+                operators.pop()
+                state.depth -= 1
+                
+                if operators and len(operators[-1]) > 1:
+                    function = operators.pop()
+                    if function == 'fact':
+                        self.budget.check_factorial(operands[-1])
+                    operands.append(self._perform_function(function, operands))
+            
+            else:
+                self._syntax_error(state, text, match.start())
+        
+        state.offset += end
+    
+    def _finish(self, state: _StreamState) -> Decimal:
+        if state.tokens == 0:
+            raise EmptyExpressionError()
+        
+        if state.expect_operand or state.depth != 0:
+            raise ExpressionSyntaxError("", state.offset)
+        
+        operands = state.operands
+        while state.operators:
+            operands.append(self._perform_operation(state.operators.pop(), operands))
+        
+        return operands[0]
+    
+    def _syntax_error(self, state: _StreamState, text: str, index: int) -> None:
+        # Chỉ đưa một đoạn quanh vị trí lỗi vào thông báo, không đưa cả biểu thức hàng MB
+        excerpt = text[max(0, index - EXCERPT_RADIUS):index + EXCERPT_RADIUS]
+        raise ExpressionSyntaxError(excerpt, state.offset + index)
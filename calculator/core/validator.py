@@ -4,13 +4,14 @@ from decimal import Decimal, InvalidOperation
 
 from utils.constants import (
     OPERATORS, NUMBERS, SPECIAL_CHARS, MAX_EXPRESSION_LENGTH,
-    MAX_NUMBER_VALUE, MIN_NUMBER_VALUE, SUPPORTED_OPERATIONS
+    MAX_NUMBER_VALUE, MIN_NUMBER_VALUE, SUPPORTED_OPERATIONS, OPERATOR_ALIASES
 )
 from utils.exceptions import (
     ExpressionSyntaxError, ExpressionTooLongError, InvalidCharacterError,
     EmptyExpressionError, NumberOverflowError, NumberUnderflowError
 )
 from utils.logger import get_logger
+from utils.tracing import traced
 
 class ExpressionValidator:
     def __init__(self):
@@ -22,6 +23,7 @@ class ExpressionValidator:
         self.consecutive_operators = re.compile(r'[+\-*/]{2,}')
         self.balanced_parentheses = re.compile(r'^[^()]*(\([^()]*\)[^()]*)*$')
     
+    @traced("validate", "validator")
     def validate_expression(self, expression: str) -> str:
         self.logger.debug(f"Validating expression: '{expression}'")
         
@@ -197,19 +199,8 @@ class InputSanitizer:
         return result
     
     def _normalize_operators(self, text: str) -> str:
-        operator_map = {
-            'x': '*',
-            'X': '*',
-            '×': '*',
-            '÷': '/',
-            ':': '/',
-            '−': '-',
-            '–': '-',
-            '—': '-',
-        }
-        
         result = text
-        for old, new in operator_map.items():
+        for old, new in OPERATOR_ALIASES.items():
             result = result.replace(old, new)
         
         return result
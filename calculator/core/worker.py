@@ -0,0 +1,73 @@
+import time
+from concurrent.futures import Executor, Future
+from typing import Dict, Optional, Tuple
+
+from core.cache import SharedResultCache
+from core.calculator import CalculatorEngine
+from core.parser import SafeCalculatorEngine
+from core.result import CalculationResult
+from utils.metrics import LatencyHistogram
+from utils.tracing import configure_worker_tracing
+
+_engine: Optional[CalculatorEngine] = None
+_program_engine: Optional[SafeCalculatorEngine] = None
+_result_cache_path: Optional[str] = None
+_metrics_enabled = False
+
+class InlineExecutor(Executor):
+    # Chạy ngay trên thread gọi thay vì worker: dùng khi --profile để profiler thấy phép tính thật
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+def initialize_worker(result_cache_path: Optional[str] = None, trace_path: Optional[str] = None,
+                      trace_sample_rate: float = 0.0, metrics_enabled: bool = False) -> None:
+    global _engine, _program_engine, _result_cache_path, _metrics_enabled
+    
+    # Worker dùng chung file cache với process chính (WAL): kết quả còn lại sau khi Esc dừng worker
+    _result_cache_path = result_cache_path
+    _metrics_enabled = metrics_enabled
+    # Khi chạy ngay trong process chính (inline), engine cũ được tạo lại theo cấu hình mới
+    _engine = None
+    _program_engine = None
+    if trace_path is not None:
+        configure_worker_tracing(trace_path, trace_sample_rate)
+
+def evaluate_in_worker(expression: str) -> Tuple[CalculationResult, Dict[str, LatencyHistogram]]:
+    global _engine
+    
+    engine = _engine
+    if engine is None:
+        result_cache = SharedResultCache(_result_cache_path) if _result_cache_path else None
+        engine = _engine = CalculatorEngine(result_cache)
+        if _metrics_enabled:
+            engine.metrics.enable()
+    
+    # Thời gian từng bước được gửi về cùng kết quả để process chính gộp vào StageMetrics của nó
+    result = engine.try_calculate_expression(expression)
+    return result, engine.metrics.drain()
+
+def evaluate_program_in_worker(expression: str) -> Tuple[CalculationResult, Dict[str, LatencyHistogram]]:
+    global _program_engine
+    
+    engine = _program_engine
+    if engine is None:
+        result_cache = SharedResultCache(_result_cache_path) if _result_cache_path else None
+        engine = _program_engine = SafeCalculatorEngine(result_cache)
+        if _metrics_enabled:
+            engine.metrics.enable()
+    
+    metrics = engine.metrics
+    if metrics.enabled:
+        start = time.perf_counter_ns()
+    
+    # Bỏ qua giới hạn độ dài của giao diện, nhưng vẫn áp dụng ngân sách tính toán
+    result = engine.try_calculate(engine.canonicalizer.normalize_text(expression))
+    result.expression = expression
+    if metrics.enabled:
+        metrics.lap("total", start)
+    return result, metrics.drain()
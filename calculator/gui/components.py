@@ -1,10 +1,14 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
+from tkinter import font as tkfont
 from typing import Callable, Optional, List, Dict, Any
 from datetime import datetime
 
 from gui.styles import get_style_manager, apply_theme_to_widget
-from utils.constants import BUTTON_LAYOUT, BUTTON_HEIGHT, BUTTON_WIDTH, BUTTON_PADDING
+from core.calculator import CalculationHistory
+from utils.constants import (
+    BUTTON_LAYOUT, BUTTON_HEIGHT, BUTTON_WIDTH, BUTTON_PADDING, HISTORY_VISIBLE_ROWS
+)
 from utils.logger import get_logger
 
 class CalculatorDisplay(tk.Entry):
@@ -30,10 +34,12 @@ class CalculatorDisplay(tk.Entry):
         self.logger.debug("Calculator display initialized")
     
     def set_text(self, text: str) -> None:
-        self.config(state='normal')
-        self.display_var.set(str(text))
-        self.config(state='readonly')
+        text = str(text)
+        if text == self.display_var.get():
+            return
         
+        # textvariable cập nhật được Entry ở trạng thái readonly, không cần đổi state
+        self.display_var.set(text)
         self.icursor(tk.END)
     
     def get_text(self) -> str:
@@ -57,6 +63,18 @@ class CalculatorDisplay(tk.Entry):
         except Exception as e:
             self.logger.error(f"Failed to copy to clipboard: {str(e)}")
 
+class PreviewLine(tk.Label):
+    def __init__(self, parent: tk.Widget, **kwargs):
+        super().__init__(parent, text="", anchor='e', **kwargs)
+        
+        apply_theme_to_widget(self, "label", "small")
+        self._calculator_style_info = ("label", "small")
+    
+    def set_preview(self, value: Optional[str]) -> None:
+        text = f"= {value}" if value else ""
+        if text != self.cget('text'):
+            self.config(text=text)
+
 class CalculatorButton(tk.Button):
     def __init__(self, parent: tk.Widget, text: str, command: Callable,
                  button_type: str = "number", **kwargs):
@@ -151,16 +169,27 @@ class ButtonGrid(tk.Frame):
             button.config(state='normal')
 
 class HistoryPanel(tk.Frame):
-    def __init__(self, parent: tk.Widget):
+    def __init__(self, parent: tk.Widget, history: Optional[CalculationHistory] = None):
         super().__init__(parent)
         self.logger = get_logger("HistoryPanel")
         
+        self.history = history if history is not None else CalculationHistory()
+        self.first_row = 0
+        self.visible_rows = HISTORY_VISIBLE_ROWS
+        self.selected_entry: Optional[Dict[str, Any]] = None
+        
+        # Chiều cao dòng chỉ đo lại khi font của listbox đổi (đổi theme), không phải mỗi <Configure>
+        self._row_font: Optional[tkfont.Font] = None
+        self._row_font_spec: Optional[str] = None
+        self._line_height = 1
+        
         self._create_widgets()
         self._setup_layout()
         
         apply_theme_to_widget(self, "window")
         self._calculator_style_info = ("window", "normal")
         
+        self._render()
         self.logger.debug("History panel initialized")
     
     def _create_widgets(self) -> None:
@@ -172,20 +201,20 @@ class HistoryPanel(tk.Frame):
         apply_theme_to_widget(self.history_frame, "window")
         self.history_frame._calculator_style_info = ("window", "normal")
         
+        # Listbox chỉ chứa các dòng đang hiển thị; dữ liệu nằm trong CalculationHistory
         self.history_listbox = tk.Listbox(
             self.history_frame,
             selectmode=tk.SINGLE,
-            activestyle='dotbox'
+            activestyle='dotbox',
+            exportselection=False
         )
         
         self.scrollbar = tk.Scrollbar(
             self.history_frame,
             orient=tk.VERTICAL,
-            command=self.history_listbox.yview
+            command=self._on_scrollbar
         )
         
-        self.history_listbox.config(yscrollcommand=self.scrollbar.set)
-        
         self.button_frame = tk.Frame(self)
         apply_theme_to_widget(self.button_frame, "window")
         self.button_frame._calculator_style_info = ("window", "normal")
@@ -206,6 +235,11 @@ class HistoryPanel(tk.Frame):
         
         self.history_listbox.bind('<Double-Button-1>', self.on_double_click)
         self.history_listbox.bind('<Return>', self.on_double_click)
+        self.history_listbox.bind('<<ListboxSelect>>', self._on_select)
+        self.history_listbox.bind('<Configure>', self._on_resize)
+        self.history_listbox.bind('<MouseWheel>', self._on_mouse_wheel)
+        self.history_listbox.bind('<Button-4>', lambda event: self._scroll_by(-1))
+        self.history_listbox.bind('<Button-5>', lambda event: self._scroll_by(1))
     
     def _setup_layout(self) -> None:
         self.title_label.pack(pady=(10, 5))
@@ -219,41 +253,113 @@ class HistoryPanel(tk.Frame):
         self.clear_button.pack(side=tk.LEFT, padx=(0, 5))
         self.copy_button.pack(side=tk.LEFT)
     
+    def _render(self) -> None:
+        entries = self.history.history
+        total = len(entries)
+        
+        self.first_row = max(0, min(self.first_row, total - self.visible_rows))
+        last_row = min(total, self.first_row + self.visible_rows)
+        
+        self.history_listbox.delete(0, tk.END)
+        rows = [self._format_entry(entries[i]) for i in range(self.first_row, last_row)]
+        if rows:
+            self.history_listbox.insert(0, *rows)
+        
+        if self.selected_entry is not None:
+            for i in range(self.first_row, last_row):
+                if entries[i] is self.selected_entry:
+                    self.history_listbox.selection_set(i - self.first_row)
+                    break
+        
+        if total:
+            self.scrollbar.set(self.first_row / total, last_row / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+    
+    def _format_entry(self, entry: Dict[str, Any]) -> str:
+        time_text = entry.get('formatted_time', '')[:8] or entry.get('timestamp', '')[11:19]
+        return f"{time_text} | {entry['expression']} = {entry['result']}"
+    
+    def _scroll_to(self, first_row: int) -> None:
+        if first_row != self.first_row:
+            self.first_row = first_row
+            self._render()
+    
+    def _scroll_by(self, rows: int) -> str:
+        self._scroll_to(self.first_row + rows)
+        return "break"
+    
+    def _on_scrollbar(self, action: str, amount: str, unit: Optional[str] = None) -> None:
+        if action == tk.MOVETO:
+            self._scroll_to(int(float(amount) * len(self.history.history)))
+        elif action == tk.SCROLL:
+            step = self.visible_rows if unit == tk.PAGES else 1
+            self._scroll_to(self.first_row + int(amount) * step)
+    
+    def _on_mouse_wheel(self, event) -> str:
+        return self._scroll_by(-1 if event.delta > 0 else 1)
+    
+    def _row_line_height(self) -> int:
+        spec = str(self.history_listbox.cget('font'))
+        if spec != self._row_font_spec:
+            self._row_font_spec = spec
+            self._row_font = tkfont.Font(font=spec)
+            self._line_height = max(1, self._row_font.metrics('linespace'))
+        return self._line_height
+    
+    def _on_resize(self, event) -> None:
+        line_height = self._row_line_height()
+        padding = 2 * (int(self.history_listbox.cget('borderwidth')) +
+                       int(self.history_listbox.cget('highlightthickness')))
+        visible_rows = max(1, (event.height - padding) // line_height)
+        
+        if visible_rows != self.visible_rows:
+            at_end = self.first_row + self.visible_rows >= len(self.history.history)
+            self.visible_rows = visible_rows
+            self.refresh(scroll_to_end=at_end)
+    
+    def _on_select(self, event=None) -> None:
+        selection = self.history_listbox.curselection()
+        if selection:
+            index = self.first_row + selection[0]
+            if index < len(self.history.history):
+                self.selected_entry = self.history.history[index]
+    
+    def refresh(self, scroll_to_end: bool = False) -> None:
+        if scroll_to_end:
+            self.first_row = len(self.history.history) - self.visible_rows
+        self._render()
+    
     def add_calculation(self, expression: str, result: str) -> None:
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        history_text = f"{timestamp} | {expression} = {result}"
-        
-        self.history_listbox.insert(tk.END, history_text)
+        self.history.add_calculation(expression, result)
+        self.refresh(scroll_to_end=True)
         
-        self.history_listbox.see(tk.END)
-        
-        self.logger.debug(f"Added to history: {history_text}")
+        self.logger.debug(f"Added to history: {expression} = {result}")
     
     def clear_history(self) -> None:
         if messagebox.askyesno("Xác nhận", "Bạn có chắc muốn xóa toàn bộ lịch sử?"):
-            self.history_listbox.delete(0, tk.END)
+            self.history.clear_history()
+            self.selected_entry = None
+            self.refresh()
             self.logger.info("History cleared")
     
     def copy_selected(self) -> None:
-        selection = self.history_listbox.curselection()
-        if selection:
-            text = self.history_listbox.get(selection[0])
-            if " | " in text and " = " in text:
-                expression_part = text.split(" | ")[1].split(" = ")[0]
-                try:
-                    self.clipboard_clear()
-                    self.clipboard_append(expression_part)
-                    self.logger.debug(f"Copied expression: {expression_part}")
-                except Exception as e:
-                    self.logger.error(f"Failed to copy: {str(e)}")
+        if self.selected_entry is not None:
+            expression_part = self.selected_entry['expression']
+            try:
+                self.clipboard_clear()
+                self.clipboard_append(expression_part)
+                self.logger.debug(f"Copied expression: {expression_part}")
+            except Exception as e:
+                self.logger.error(f"Failed to copy: {str(e)}")
     
     def on_double_click(self, event=None) -> None:
-        selection = self.history_listbox.curselection()
-        if selection:
+        self._on_select()
+        if self.selected_entry is not None:
             self.copy_selected()
     
     def get_history_data(self) -> List[str]:
-        return [self.history_listbox.get(i) for i in range(self.history_listbox.size())]
+        return [self._format_entry(entry) for entry in self.history.history]
 
 class MemoryPanel(tk.Frame):
     def __init__(self, parent: tk.Widget, memory_callback: Callable[[str], None]):
@@ -369,6 +475,15 @@ class StatusBar(tk.Frame):
         apply_theme_to_widget(self.theme_label, "label", "small")
         self.theme_label._calculator_style_info = ("label", "small")
         
+        self.progress_bar = ttk.Progressbar(
+            self,
+            orient=tk.HORIZONTAL,
+            mode='determinate',
+            maximum=1.0,
+            length=120
+        )
+        self.progress_visible = False
+        
         self.status_label.pack(side=tk.LEFT, padx=5)
         self.theme_label.pack(side=tk.RIGHT, padx=5)
         
@@ -376,7 +491,19 @@ class StatusBar(tk.Frame):
         self._calculator_style_info = ("window", "normal")
     
     def set_status(self, message: str) -> None:
-        self.status_label.config(text=message)
+        if self.status_label.cget('text') != message:
+            self.status_label.config(text=message)
     
     def set_theme_indicator(self, theme_name: str) -> None:
-        self.theme_label.config(text=theme_name.title())
\ No newline at end of file
+        self.theme_label.config(text=theme_name.title())
+    
+    def show_progress(self, fraction: float) -> None:
+        if not self.progress_visible:
+            self.progress_bar.pack(side=tk.RIGHT, padx=5)
+            self.progress_visible = True
+        self.progress_bar['value'] = max(0.0, min(1.0, fraction))
+    
+    def hide_progress(self) -> None:
+        self.progress_bar.pack_forget()
+        self.progress_visible = False
+        self.progress_bar['value'] = 0.0
\ No newline at end of file
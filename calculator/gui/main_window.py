@@ -1,29 +1,58 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import json
 import os
 
 from gui.components import (
     CalculatorDisplay, ButtonGrid, HistoryPanel, 
-    MemoryPanel, StatusBar
+    MemoryPanel, StatusBar, PreviewLine
 )
 from gui.styles import (
     get_theme_manager, get_style_manager, 
     apply_theme_to_widget
 )
-from core.calculator import CalculatorEngine
+from gui.tasks import BackgroundTask, BackgroundEvaluator
+from gui.scheduler import RenderScheduler
+from core.calculator import CalculatorEngine, CalculationHistory
+from core.cache import SharedResultCache
+from core.result import CalculationResult
+from core.preview import ExpressionPreviewer
 from utils.constants import (
-    WINDOW_TITLE, WINDOW_SIZE, WINDOW_MIN_SIZE, APP_NAME, APP_VERSION
+    WINDOW_TITLE, WINDOW_SIZE, WINDOW_MIN_SIZE, APP_NAME, APP_VERSION,
+    HISTORY_IMPORT_BATCH_SIZE, HISTORY_EXPORT_CHUNK_SIZE, PREVIEW_DEBOUNCE_MS
 )
 from utils.logger import get_logger
+from utils.metrics import LatencyHistogram
+from utils.prometheus import MetricsServer
+from utils.recording import SessionRecorder
 from utils.exceptions import CalculatorError
 
 class CalculatorMainWindow:
-    def __init__(self):
+    def __init__(self, result_cache_path: Optional[str] = None,
+                 metrics_port: Optional[int] = None,
+                 record_path: Optional[str] = None,
+                 inline_evaluation: bool = False):
         self.logger = get_logger("MainWindow")
+        self.inline_evaluation = inline_evaluation
         
-        self.calculator = CalculatorEngine()
+        # Cache dùng chung với worker process tính phép '=' (xem BackgroundEvaluator)
+        self.result_cache_path = result_cache_path
+        self.result_cache: Optional[SharedResultCache] = None
+        if result_cache_path:
+            self.result_cache = SharedResultCache(result_cache_path)
+        
+        self.calculator = CalculatorEngine(self.result_cache)
+        
+        self.metrics_server: Optional[MetricsServer] = None
+        if metrics_port is not None:
+            self.calculator.metrics.enable()
+            self.metrics_server = MetricsServer(self.calculator.get_stats, port=metrics_port)
+            self.metrics_server.start()
+        
+        self.recorder: Optional[SessionRecorder] = None
+        if record_path:
+            self.recorder = SessionRecorder(record_path)
         
         self.theme_manager = get_theme_manager()
         self.style_manager = get_style_manager()
@@ -34,14 +63,22 @@ class CalculatorMainWindow:
         self.history_panel: Optional[HistoryPanel] = None
         self.memory_panel: Optional[MemoryPanel] = None
         self.status_bar: Optional[StatusBar] = None
+        self.render_scheduler: Optional[RenderScheduler] = None
         
         self.is_sidebar_visible = False
+        self.history_task: Optional[BackgroundTask] = None
+        self.evaluator: Optional[BackgroundEvaluator] = None
+        self._imported_count = 0
+        self.previewer = ExpressionPreviewer()
+        self._preview_id: Optional[str] = None
         
         self._create_main_window()
         self._create_menu()
         self._create_widgets()
         self._setup_layout()
+        self._setup_render_scheduler()
         self._setup_keyboard_bindings()
+        self._setup_evaluator()
         
         self.logger.info("Calculator main window initialized")
     
@@ -63,6 +100,7 @@ class CalculatorMainWindow:
         menubar.add_cascade(label="Tập tin", menu=file_menu)
         file_menu.add_command(label="Xuất lịch sử...", command=self._export_history)
         file_menu.add_command(label="Nhập lịch sử...", command=self._import_history)
+        file_menu.add_command(label="Hủy nhập/xuất lịch sử", command=self._cancel_history_task)
         file_menu.add_separator()
         file_menu.add_command(label="Thoát", command=self._on_closing)
         
@@ -100,6 +138,7 @@ class CalculatorMainWindow:
         apply_theme_to_widget(self.calculator_frame, "window")
         
         self.display = CalculatorDisplay(self.calculator_frame)
+        self.preview_line = PreviewLine(self.calculator_frame)
         
         self.button_grid = ButtonGrid(
             self.calculator_frame,
@@ -111,7 +150,7 @@ class CalculatorMainWindow:
         
         self.sidebar_notebook = ttk.Notebook(self.sidebar_frame)
         
-        self.history_panel = HistoryPanel(self.sidebar_notebook)
+        self.history_panel = HistoryPanel(self.sidebar_notebook, self.calculator.history)
         self.sidebar_notebook.add(self.history_panel, text="Lịch Sử")
         
         self.memory_panel = MemoryPanel(
@@ -127,69 +166,154 @@ class CalculatorMainWindow:
         
         self.calculator_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        self.display.pack(fill=tk.X, pady=(0, 10))
+        self.display.pack(fill=tk.X)
+        self.preview_line.pack(fill=tk.X, pady=(0, 10))
         
         self.button_grid.pack(fill=tk.BOTH, expand=True)
         
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
     
+    def _setup_render_scheduler(self) -> None:
+        self.render_scheduler = RenderScheduler(self.root)
+        self.render_scheduler.register('display', self.display.set_text, self.display.get_text())
+        self.render_scheduler.register('memory', self.memory_panel.update_memory_display,
+                                       self.memory_panel.memory_value)
+        self.render_scheduler.register('status', self.status_bar.set_status, "Sẵn sàng")
+        self.render_scheduler.register('preview', self.preview_line.set_preview, None)
+    
+    def _show_display(self, text: str) -> None:
+        self.render_scheduler.update('display', text)
+    
+    def _show_memory(self, value: str) -> None:
+        self.render_scheduler.update('memory', value)
+    
+    def _show_status(self, message: str) -> None:
+        self.render_scheduler.update('status', message)
+    
+    def _schedule_preview(self) -> None:
+        if self._preview_id is not None:
+            self.root.after_cancel(self._preview_id)
+        self._preview_id = self.root.after(PREVIEW_DEBOUNCE_MS, self._update_preview)
+    
+    def _update_preview(self) -> None:
+        self._preview_id = None
+        expression = self.calculator.current_expression
+        
+        value = None
+        if expression and not self.calculator.is_error_state:
+            value = self.previewer.preview(expression)
+        
+        # Không lặp lại khi biểu thức chỉ là một số
+        self.render_scheduler.update('preview', None if value == expression else value)
+    
     def _setup_keyboard_bindings(self) -> None:
         self.root.focus_set()
         
         for i in range(10):
-            self.root.bind(str(i), lambda event, num=str(i): self._on_button_click(num))
+            self.root.bind(str(i), lambda event, num=str(i): self._on_key_press(event, num))
         
-        self.root.bind('+', lambda event: self._on_button_click('+'))
-        self.root.bind('-', lambda event: self._on_button_click('-'))
-        self.root.bind('*', lambda event: self._on_button_click('*'))
-        self.root.bind('/', lambda event: self._on_button_click('/'))
-        self.root.bind('.', lambda event: self._on_button_click('.'))
-        self.root.bind('%', lambda event: self._on_button_click('%'))
+        self.root.bind('+', lambda event: self._on_key_press(event, '+'))
+        self.root.bind('-', lambda event: self._on_key_press(event, '-'))
+        self.root.bind('*', lambda event: self._on_key_press(event, '*'))
+        self.root.bind('/', lambda event: self._on_key_press(event, '/'))
+        self.root.bind('.', lambda event: self._on_key_press(event, '.'))
+        self.root.bind('%', lambda event: self._on_key_press(event, '%'))
         
-        self.root.bind('<Return>', lambda event: self._on_button_click('='))
-        self.root.bind('<KP_Enter>', lambda event: self._on_button_click('='))
-        self.root.bind('=', lambda event: self._on_button_click('='))
-        self.root.bind('<Escape>', lambda event: self._on_button_click('C'))
-        self.root.bind('<BackSpace>', lambda event: self._on_button_click('CE'))
+        self.root.bind('<Return>', lambda event: self._on_key_press(event, '='))
+        self.root.bind('<KP_Enter>', lambda event: self._on_key_press(event, '='))
+        self.root.bind('=', lambda event: self._on_key_press(event, '='))
+        self.root.bind('<Escape>', self._on_escape)
+        self.root.bind('<BackSpace>', lambda event: self._on_key_press(event, 'CE'))
         
         self.root.bind('<Control-q>', lambda event: self._on_closing())
         self.root.bind('<Control-r>', lambda event: self._reset_calculator())
     
-    def _on_button_click(self, button_value: str) -> None:
+    def _setup_evaluator(self) -> None:
+        self.evaluator = BackgroundEvaluator(
+            self.root, self.result_cache_path, self.calculator.metrics.enabled, self.inline_evaluation
+        )
+        self.evaluator.start()
+    
+    def _on_escape(self, event: Optional[tk.Event] = None) -> None:
+        if self.evaluator.cancel():
+            if self.recorder is not None:
+                self.recorder.record("key", "cancel", getattr(event, 'keysym', None))
+            self._show_status("Đã hủy phép tính")
+        else:
+            self._on_key_press(event, 'C')
+    
+    def _on_key_press(self, event: Optional[tk.Event], button_value: str) -> None:
+        if self.recorder is not None:
+            self.recorder.record("key", button_value, getattr(event, 'keysym', None))
+        self._on_button_click(button_value, record=False)
+    
+    def _on_button_click(self, button_value: str, record: bool = True) -> None:
+        if record and self.recorder is not None:
+            self.recorder.record("button", button_value)
+        
+        if self.evaluator.is_pending:
+            if button_value == '=':
+                return
+            self.evaluator.cancel()
+        
+        if button_value == '=':
+            expression = self.calculator.begin_calculation()
+            if expression is not None:
+                # Lỗi đã biết, lỗi cú pháp và kết quả có trong cache không cần đến worker
+                cached = self.calculator.precheck_calculation(expression)
+                if cached is not None:
+                    self._on_calculation_done(cached)
+                    return
+                
+                self._show_status("Đang tính toán... (Esc để hủy)")
+                self.evaluator.submit(expression, self._on_calculation_done)
+                return
+        
         try:
-            self.status_bar.set_status("Đang tính toán...")
-            
             result = self.calculator.handle_button_press(button_value)
             
-            self.display.set_text(result)
+            self._show_display(result)
+            self._schedule_preview()
             
             if button_value == '=' and not self.calculator.is_error_state:
-                last_calc = self.calculator.history.get_last_calculation()
-                if last_calc:
-                    self.history_panel.add_calculation(
-                        last_calc['expression'],
-                        last_calc['result']
-                    )
-            
-            memory_value = self.calculator.memory_recall()
-            self.memory_panel.update_memory_display(memory_value)
+                self.history_panel.refresh(scroll_to_end=True)
             
-            self.status_bar.set_status("Sẵn sàng")
+            self._show_status("Sẵn sàng")
             
         except Exception as e:
             self.logger.error(f"Error processing button click: {str(e)}")
-            self.display.set_text("Lỗi")
-            self.status_bar.set_status("Lỗi")
+            self._show_display("Lỗi")
+            self._show_status("Lỗi")
+    
+    def _on_calculation_done(self, result: CalculationResult,
+                             timings: Optional[Dict[str, LatencyHistogram]] = None) -> None:
+        # Phép tính chạy trong worker process: kết quả được đếm tại đây, thời gian từng bước gửi kèm
+        if self.calculator.metrics.enabled:
+            self.calculator.metrics.record_outcome(result.error_code)
+            if timings:
+                self.calculator.metrics.merge(timings)
+        
+        self._show_display(self.calculator.finish_calculation(result))
+        self._schedule_preview()
+        
+        if result.ok:
+            self.history_panel.refresh(scroll_to_end=True)
+            self._show_status("Sẵn sàng")
+        else:
+            self._show_status("Lỗi")
     
     def _on_memory_operation(self, operation: str) -> None:
+        if self.recorder is not None:
+            self.recorder.record("memory", operation)
+        
         try:
-            current_value = self.display.get_text()
+            current_value = self.render_scheduler.get('display', self.display.get_text())
             
             if operation == "MS":
                 self.calculator.memory_store(current_value)
             elif operation == "MR":
                 recalled_value = self.calculator.memory_recall()
-                self.display.set_text(recalled_value)
+                self._show_display(recalled_value)
             elif operation == "MC":
                 self.calculator.memory_clear()
             elif operation == "M+":
@@ -197,8 +321,7 @@ class CalculatorMainWindow:
             elif operation == "M-":
                 self.calculator.memory_subtract(current_value)
             
-            memory_value = self.calculator.memory_recall()
-            self.memory_panel.update_memory_display(memory_value)
+            self._show_memory(self.calculator.memory_recall())
             
         except Exception as e:
             self.logger.error(f"Memory operation error: {str(e)}")
@@ -230,57 +353,145 @@ class CalculatorMainWindow:
         refresh_widget(self.root)
     
     def _export_history(self) -> None:
-        try:
-            filename = filedialog.asksaveasfilename(
-                defaultextension=".json",
-                filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
-                title="Xuất lịch sử tính toán"
+        if self._is_history_task_running():
+            return
+        
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            title="Xuất lịch sử tính toán"
+        )
+        
+        if filename:
+            entries = list(self.calculator.history.history)
+            self._start_history_task(
+                lambda task: self._export_history_worker(task, filename, entries),
+                name="HistoryExport",
+                status="Đang xuất lịch sử...",
+                on_done=lambda count: self._on_history_task_done(
+                    f"Đã xuất lịch sử ra file: {filename}"),
+                on_error=lambda e: self._on_history_task_error(f"Không thể xuất lịch sử: {str(e)}")
             )
             
-            if filename:
-                history_data = self.calculator.history.export_to_json()
-                with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(history_data)
-                messagebox.showinfo("Thành công", f"Đã xuất lịch sử ra file: {filename}")
+    def _export_history_worker(self, task: BackgroundTask, filename: str,
+                               entries: List[Dict[str, Any]]) -> int:
+        temp_filename = filename + ".tmp"
+        total = max(1, len(entries))
+        written = 0
                 
-        except Exception as e:
-            messagebox.showerror("Lỗi", f"Không thể xuất lịch sử: {str(e)}")
+        try:
+            with open(temp_filename, 'w', encoding='utf-8') as f:
+                for chunk in CalculationHistory.iter_json_chunks(entries, HISTORY_EXPORT_CHUNK_SIZE):
+                    task.check_cancelled()
+                    f.write(chunk)
+                    written = min(len(entries), written + HISTORY_EXPORT_CHUNK_SIZE)
+                    task.report_progress(written / total)
+            
+            os.replace(temp_filename, filename)
+            return len(entries)
+        
+        finally:
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
     
     def _import_history(self) -> None:
-        try:
-            filename = filedialog.askopenfilename(
-                filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
-                title="Nhập lịch sử tính toán"
+        if self._is_history_task_running():
+            return
+        
+        filename = filedialog.askopenfilename(
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            title="Nhập lịch sử tính toán"
+        )
+        
+        if filename:
+            self._imported_count = 0
+            self._start_history_task(
+                lambda task: self._import_history_worker(task, filename),
+                name="HistoryImport",
+                status="Đang nhập lịch sử...",
+                on_batch=self._on_import_batch,
+                on_done=lambda result: self._on_history_task_done(
+                    f"Đã nhập {self._imported_count} mục lịch sử"),
+                on_error=lambda e: self._on_history_task_error(f"Không thể nhập lịch sử: {str(e)}")
             )
             
-            if filename:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    history_data = f.read()
+    def _import_history_worker(self, task: BackgroundTask, filename: str) -> None:
+        with open(filename, 'r', encoding='utf-8') as f:
+            history_data = f.read()
                 
-                count = self.calculator.history.import_from_json(history_data)
-                messagebox.showinfo("Thành công", f"Đã nhập {count} mục lịch sử")
+        total = max(1, len(history_data))
+        batch = []
                 
-        except Exception as e:
-            messagebox.showerror("Lỗi", f"Không thể nhập lịch sử: {str(e)}")
+        for entry, position in CalculationHistory.iter_json_entry_positions(history_data):
+            batch.append(entry)
+            if len(batch) >= HISTORY_IMPORT_BATCH_SIZE:
+                task.emit_batch(batch)
+                task.report_progress(position / total)
+                batch = []
+        
+        if batch:
+            task.emit_batch(batch)
+    
+    def _on_import_batch(self, batch: List[Dict[str, Any]]) -> None:
+        self._imported_count += self.calculator.history.add_entries(batch)
+        self.history_panel.refresh(scroll_to_end=True)
+    
+    def _start_history_task(self, worker, name: str, status: str, **callbacks) -> None:
+        self.history_task = BackgroundTask(
+            self.root,
+            worker,
+            on_progress=self.status_bar.show_progress,
+            on_cancel=self._on_history_task_cancelled,
+            name=name,
+            **callbacks
+        )
+        self._show_status(f"{status} (Hủy trong menu Tập tin)")
+        self.status_bar.show_progress(0.0)
+        self.history_task.start()
+    
+    def _is_history_task_running(self) -> bool:
+        if self.history_task is not None and self.history_task.is_running:
+            messagebox.showwarning("Đang xử lý", "Đang nhập/xuất lịch sử, vui lòng chờ hoặc hủy tác vụ")
+            return True
+        return False
+    
+    def _cancel_history_task(self) -> None:
+        if self.history_task is not None:
+            self.history_task.cancel()
+    
+    def _on_history_task_done(self, message: str) -> None:
+        self.status_bar.hide_progress()
+        self._show_status("Sẵn sàng")
+        messagebox.showinfo("Thành công", message)
+    
+    def _on_history_task_cancelled(self) -> None:
+        self.status_bar.hide_progress()
+        self._show_status("Đã hủy nhập/xuất lịch sử")
+    
+    def _on_history_task_error(self, message: str) -> None:
+        self.status_bar.hide_progress()
+        self._show_status("Lỗi")
+        messagebox.showerror("Lỗi", message)
     
     def _clear_history(self) -> None:
         if messagebox.askyesno("Xác nhận", "Bạn có chắc muốn xóa toàn bộ lịch sử?"):
             self.calculator.history.clear_history()
             if hasattr(self, 'history_panel') and self.history_panel:
-                self.history_panel.clear_history()
+                self.history_panel.refresh()
     
     def _clear_memory(self) -> None:
         self.calculator.memory_clear()
-        self.memory_panel.update_memory_display("0")
+        self._show_memory("0")
         messagebox.showinfo("Thông báo", "Đã xóa bộ nhớ")
     
     def _reset_calculator(self) -> None:
         if messagebox.askyesno("Xác nhận", "Bạn có chắc muốn reset toàn bộ máy tính?"):
             self.calculator.reset()
-            self.display.clear()
+            self._show_display("0")
+            self._schedule_preview()
             if hasattr(self, 'history_panel') and self.history_panel:
-                self.history_panel.clear_history()
-            self.memory_panel.update_memory_display("0")
+                self.history_panel.refresh()
+            self._show_memory("0")
             messagebox.showinfo("Thông báo", "Đã reset máy tính")
     
     def _show_shortcuts(self) -> None:
@@ -291,6 +502,7 @@ Số: 0-9, .
 Phép toán: +, -, *, /, %
 Tính: Enter hoặc =
 Xóa: Escape (C), Backspace (CE)
+Hủy phép tính đang chạy: Escape
 
 Ctrl+Q: Thoát
 Ctrl+R: Reset
@@ -313,6 +525,16 @@ Phát triển bởi Lê Văn Hưng HE186837 FPTU
     def _on_closing(self) -> None:
         if messagebox.askokcancel("Thoát", "Bạn có muốn thoát khỏi Calculator?"):
             self.logger.info("Calculator closing...")
+            self._cancel_history_task()
+            self.evaluator.shutdown()
+            if self._preview_id is not None:
+                self.root.after_cancel(self._preview_id)
+            if self.metrics_server is not None:
+                self.metrics_server.stop()
+            if self.result_cache is not None:
+                self.result_cache.close()
+            if self.recorder is not None:
+                self.recorder.close()
             self.root.destroy()
     
     def run(self) -> None:
@@ -0,0 +1,60 @@
+import tkinter as tk
+from typing import Callable, Dict, Any, Optional
+
+from utils.logger import get_logger
+
+_UNSET = object()
+
+class RenderScheduler:
+    def __init__(self, root: tk.Misc):
+        self.logger = get_logger("RenderScheduler")
+        self.root = root
+        
+        self._renderers: Dict[str, Callable[[Any], None]] = {}
+        self._rendered: Dict[str, Any] = {}
+        self._pending: Dict[str, Any] = {}
+        self._after_id: Optional[str] = None
+        
+        self.frames = 0
+        self.skipped = 0
+    
+    def register(self, key: str, renderer: Callable[[Any], None], initial: Any = _UNSET) -> None:
+        self._renderers[key] = renderer
+        if initial is not _UNSET:
+            self._rendered[key] = initial
+    
+    def update(self, key: str, value: Any) -> None:
+        self._pending[key] = value
+        
+        if self._after_id is None:
+            self._after_id = self.root.after_idle(self.flush)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._pending:
+            return self._pending[key]
+        return self._rendered.get(key, default)
+    
+    def invalidate(self, key: Optional[str] = None) -> None:
+        if key is None:
+            self._rendered.clear()
+        else:
+            self._rendered.pop(key, None)
+    
+    def flush(self) -> None:
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        
+        pending, self._pending = self._pending, {}
+        self.frames += 1
+        
+        for key, value in pending.items():
+            if self._rendered.get(key, _UNSET) == value:
+                self.skipped += 1
+                continue
+            
+            try:
+                self._renderers[key](value)
+                self._rendered[key] = value
+            except Exception as e:
+                self.logger.error(f"Render of '{key}' failed: {str(e)}")
@@ -0,0 +1,239 @@
+import multiprocessing
+import queue
+import threading
+import tkinter as tk
+from typing import Callable, Dict, Optional, Any, List
+
+from core.result import CalculationResult
+from core.worker import evaluate_in_worker, initialize_worker
+from utils.constants import (
+    BACKGROUND_POLL_INTERVAL, BACKGROUND_QUEUE_SIZE, BACKGROUND_MESSAGES_PER_POLL,
+    EVALUATION_POLL_INTERVAL
+)
+from utils.logger import get_logger
+from utils.metrics import LatencyHistogram
+from utils.tracing import get_tracer, worker_trace_path
+
+class TaskCancelled(Exception):
+    pass
+
+class BackgroundTask:
+    def __init__(self, root: tk.Misc, worker: Callable[['BackgroundTask'], Any],
+                 on_batch: Optional[Callable[[List[Any]], None]] = None,
+                 on_progress: Optional[Callable[[float], None]] = None,
+                 on_done: Optional[Callable[[Any], None]] = None,
+                 on_cancel: Optional[Callable[[], None]] = None,
+                 on_error: Optional[Callable[[Exception], None]] = None,
+                 name: str = "BackgroundTask"):
+        self.logger = get_logger("BackgroundTask")
+        self.root = root
+        self.worker = worker
+        self.name = name
+        
+        self.on_batch = on_batch
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_cancel = on_cancel
+        self.on_error = on_error
+        
+        self._messages: queue.Queue = queue.Queue(maxsize=BACKGROUND_QUEUE_SIZE)
+        self._cancel_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._poll_id: Optional[str] = None
+        self.is_running = False
+    
+    def start(self) -> None:
+        self.is_running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        self._poll_id = self.root.after(BACKGROUND_POLL_INTERVAL, self._poll)
+        self.logger.info(f"{self.name} started")
+    
+    def cancel(self) -> None:
+        if self.is_running:
+            self._cancel_event.set()
+            self.logger.info(f"{self.name} cancellation requested")
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+    
+    def check_cancelled(self) -> None:
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+    
+    def emit_batch(self, batch: List[Any]) -> None:
+        self._put(('batch', batch))
+    
+    def report_progress(self, fraction: float) -> None:
+        self._put(('progress', fraction))
+    
+    def _put(self, message: tuple) -> None:
+        # Queue có giới hạn: worker chờ khi UI chưa xử lý kịp, nhưng vẫn phản hồi lệnh hủy
+        while True:
+            self.check_cancelled()
+            try:
+                self._messages.put(message, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+    
+    def _run(self) -> None:
+        try:
+            result = self.worker(self)
+            message = ('cancelled', None) if self.cancelled else ('done', result)
+        except TaskCancelled:
+            message = ('cancelled', None)
+        except Exception as e:
+            self.logger.error(f"{self.name} failed: {str(e)}")
+            message = ('error', e)
+        
+        # Thông điệp kết thúc luôn được gửi, kể cả khi đã hủy
+        self._messages.put(message)
+    
+    def _poll(self) -> None:
+        self._poll_id = None
+        
+        for _ in range(BACKGROUND_MESSAGES_PER_POLL):
+            try:
+                kind, payload = self._messages.get_nowait()
+            except queue.Empty:
+                break
+            
+            if kind == 'batch':
+                if self.on_batch and not self.cancelled:
+                    self.on_batch(payload)
+            elif kind == 'progress':
+                if self.on_progress and not self.cancelled:
+                    self.on_progress(payload)
+            else:
+                self._finish(kind, payload)
+                return
+        
+        self._poll_id = self.root.after(BACKGROUND_POLL_INTERVAL, self._poll)
+    
+    def _finish(self, kind: str, payload: Any) -> None:
+        self.is_running = False
+        self.logger.info(f"{self.name} finished: {kind}")
+        
+        if kind == 'done' and self.on_done:
+            self.on_done(payload)
+        elif kind == 'cancelled' and self.on_cancel:
+            self.on_cancel()
+        elif kind == 'error' and self.on_error:
+            self.on_error(payload)
+
+
+EvaluationCallback = Callable[[CalculationResult, Dict[str, LatencyHistogram]], None]
+
+class BackgroundEvaluator:
+    def __init__(self, root: tk.Misc, result_cache_path: Optional[str] = None,
+                 metrics_enabled: bool = False, inline: bool = False):
+        self.logger = get_logger("BackgroundEvaluator")
+        self.root = root
+        self.result_cache_path = result_cache_path
+        self.metrics_enabled = metrics_enabled
+        # Tính ngay trong process chính (không hủy được bằng Esc): dùng khi profile
+        self.inline = inline
+        self._inline_initialized = False
+        
+        self._pool = None
+        self._pending = None
+        self._expression: Optional[str] = None
+        self._callback: Optional[EvaluationCallback] = None
+        self._poll_id: Optional[str] = None
+    
+    def start(self) -> None:
+        self._ensure_pool()
+    
+    def _ensure_pool(self) -> None:
+        if self._pool is not None or self.inline:
+            return
+        
+        try:
+            # spawn: process con không kế thừa trạng thái Tk của process chính
+            context = multiprocessing.get_context('spawn')
+            tracer = get_tracer()
+            trace_path = worker_trace_path(tracer.path) if tracer.enabled else None
+            self._pool = context.Pool(
+                1, initialize_worker,
+                (self.result_cache_path, trace_path, tracer.sample_rate, self.metrics_enabled)
+            )
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Worker process unavailable, evaluating inline: {str(e)}")
+            self._pool = None
+    
+    @property
+    def is_pending(self) -> bool:
+        return self._pending is not None
+    
+    def submit(self, expression: str, on_result: EvaluationCallback) -> None:
+        self.cancel()
+        self._ensure_pool()
+        
+        if self._pool is None:
+            if not self._inline_initialized:
+                initialize_worker(self.result_cache_path, metrics_enabled=self.metrics_enabled)
+                self._inline_initialized = True
+            on_result(*evaluate_in_worker(expression))
+            return
+        
+        self._pending = self._pool.apply_async(evaluate_in_worker, (expression,))
+        self._expression = expression
+        self._callback = on_result
+        self._poll_id = self.root.after(EVALUATION_POLL_INTERVAL, self._poll)
+    
+    def _poll(self) -> None:
+        self._poll_id = None
+        if self._pending is None:
+            return
+        
+        if not self._pending.ready():
+            self._poll_id = self.root.after(EVALUATION_POLL_INTERVAL, self._poll)
+            return
+        
+        pending, expression, callback = self._pending, self._expression, self._callback
+        self._clear_pending()
+        
+        try:
+            result, timings = pending.get()
+        except Exception as e:
+            self.logger.error(f"Worker evaluation of '{expression}' failed: {str(e)}")
+            result, timings = CalculationResult.failure(expression, "UNEXPECTED_ERROR"), {}
+        
+        callback(result, timings)
+    
+    def _clear_pending(self) -> None:
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+        
+        self._pending = None
+        self._expression = None
+        self._callback = None
+    
+    def cancel(self) -> bool:
+        if self._pending is None:
+            return False
+        
+        self.logger.info(f"Cancelling evaluation of '{self._expression}'")
+        self._clear_pending()
+        
+        # Không thể ngắt một phép tính đang chạy: dừng process worker và tạo lại
+        self._pool.terminate()
+        self._pool = None
+        self._ensure_pool()
+        return True
+    
+    def shutdown(self) -> None:
+        busy = self._pending is not None
+        self._clear_pending()
+        
+        if self._pool is not None:
+            if busy:
+                self._pool.terminate()
+            else:
+                # Worker rảnh thoát bình thường để kịp ghi nốt trace chưa flush
+                self._pool.close()
+                self._pool.join()
+            self._pool = None
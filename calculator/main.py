@@ -1,9 +1,240 @@
 import sys
 import os
+import argparse
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-def main():
+def parse_arguments(argv=None) -> argparse.Namespace:
+    from utils.constants import (
+        APP_NAME, RESULT_CACHE_FILE, TRACE_SAMPLE_RATE, PROFILE_MODES, PROFILE_SAMPLE_INTERVAL
+    )
+    
+    parser = argparse.ArgumentParser(description=APP_NAME)
+    parser.add_argument(
+        "--result-cache",
+        nargs="?",
+        const=RESULT_CACHE_FILE,
+        default=None,
+        metavar="PATH",
+        help=f"Bật cache kết quả lưu trên đĩa (mặc định: {RESULT_CACHE_FILE})"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        metavar="PORT",
+        help="Mở endpoint Prometheus tại http://127.0.0.1:PORT/metrics (0 = chọn cổng trống); "
+             "dùng được với GUI, --serve, --batch và --evaluate-file"
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        default=None,
+        help="Ghi span của từng phép tính ra FILE (Chrome Trace Event JSON, mở bằng chrome://tracing hoặc Perfetto)"
+    )
+    parser.add_argument(
+        "--trace-sample",
+        type=float,
+        default=TRACE_SAMPLE_RATE,
+        metavar="RATE",
+        help=f"Tỉ lệ phép tính được ghi trace, từ 0 đến 1 (mặc định: {TRACE_SAMPLE_RATE})"
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        default=None,
+        help="Profile cả phiên (GUI hoặc hàng loạt), ghi FILE.pstats và collapsed stack FILE.folded cho flamegraph. "
+             "Khi profile, phép '=' của GUI, --batch và phép tính nặng của --serve chạy ngay trong process chính "
+             "thay vì worker process/thread (Esc không hủy được phép tính) để profile đo được phép tính thật"
+    )
+    parser.add_argument(
+        "--profile-mode",
+        choices=PROFILE_MODES,
+        default=PROFILE_MODES[0],
+        help="cprofile: đo chính xác thread chính; sampling: chỉ lấy mẫu stack, overhead thấp (mặc định: cprofile)"
+    )
+    parser.add_argument(
+        "--profile-interval",
+        type=float,
+        default=PROFILE_SAMPLE_INTERVAL * 1000,
+        metavar="MS",
+        help=f"Khoảng cách giữa hai lần lấy mẫu stack (mặc định: {PROFILE_SAMPLE_INTERVAL * 1000:g} ms)"
+    )
+    parser.add_argument(
+        "--record",
+        metavar="FILE",
+        default=None,
+        help="Ghi lại phím và nút bấm của phiên GUI kèm thời điểm vào FILE (JSON mỗi dòng) để phát lại bằng benchmarks/replay.py"
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        default=None,
+        help="Tính các biểu thức trong FILE (mỗi dòng một biểu thức) không cần giao diện, '-' để đọc stdin"
+    )
+    parser.add_argument(
+        "--output",
+        metavar="FILE",
+        default=None,
+        help="Ghi kết quả chạy hàng loạt (JSON mỗi dòng) vào FILE thay vì stdout"
+    )
+    parser.add_argument(
+        "--evaluate-file",
+        metavar="FILE",
+        default=None,
+        help="Tính một biểu thức rất lớn trong FILE bằng chế độ streaming (không giới hạn 100 ký tự)"
+    )
+    parser.add_argument(
+        "--serve",
+        metavar="SOCKET",
+        default=None,
+        help="Chạy dịch vụ tính toán nhận JSON mỗi dòng qua Unix socket SOCKET (không mở giao diện)"
+    )
+    parser.add_argument(
+        "--batch-threads",
+        action="store_true",
+        help="Chạy hàng loạt bằng thread thay vì process"
+    )
+    return parser.parse_args(argv)
+
+def start_metrics_server(args: argparse.Namespace, stats_provider):
+    if args.metrics_port is None:
+        return None
+    
+    from utils.prometheus import MetricsServer
+    
+    metrics_server = MetricsServer(stats_provider, port=args.metrics_port)
+    metrics_server.start()
+    # stdout có thể đang chứa kết quả JSON của chế độ hàng loạt
+    print(f"📊 Metrics: {metrics_server.url}", file=sys.stderr)
+    return metrics_server
+
+def metrics_stats(metrics) -> dict:
+    return {'stages': metrics.snapshot(), 'counters': metrics.counter_snapshot()}
+
+def run_batch(args: argparse.Namespace) -> int:
+    import json
+    import logging
+    from core.batch import BatchEvaluator
+    from utils.metrics import StageMetrics
+    
+    # Log của từng biểu thức làm chậm đáng kể khi chạy hàng loạt
+    logging.disable(logging.INFO)
+    
+    source = sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8")
+    with source:
+        expressions = [line.strip() for line in source if line.strip()]
+    
+    # Worker mở chung file cache (WAL) và gửi thời gian từng bước về để gộp vào metrics
+    metrics = StageMetrics(enabled=args.metrics_port is not None)
+    evaluator = BatchEvaluator(
+        use_processes=not args.batch_threads, inline=args.profile is not None,
+        result_cache_path=args.result_cache, metrics=metrics
+    )
+    metrics_server = start_metrics_server(args, lambda: metrics_stats(metrics))
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    failures = 0
+    
+    try:
+        for result in evaluator.iter_results(expressions):
+            if not result.ok:
+                failures += 1
+            if metrics.enabled:
+                metrics.record_outcome(result.error_code)
+            output.write(json.dumps(result.to_dict(), ensure_ascii=False) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if metrics_server is not None:
+            metrics_server.stop()
+    
+    return 1 if failures else 0
+
+def run_service(args: argparse.Namespace) -> int:
+    import logging
+    from core.cache import PersistentResultCache
+    from core.service import EvaluationService
+    
+    logging.disable(logging.INFO)
+    
+    service = EvaluationService(
+        args.serve, PersistentResultCache(args.result_cache or ":memory:"), inline=args.profile is not None
+    )
+    metrics_server = start_metrics_server(args, service.get_stats)
+    
+    print(f"🔌 Dịch vụ đang lắng nghe tại {args.serve}", file=sys.stderr)
+    try:
+        service.run()
+    finally:
+        if metrics_server is not None:
+            metrics_server.stop()
+    
+    return 0
+
+def run_evaluate_file(args: argparse.Namespace) -> int:
+    import json
+    import logging
+    from core.streaming import StreamingEvaluator
+    from core.result import CalculationResult, format_decimal
+    from utils.exceptions import CalculatorError
+    from utils.metrics import StageMetrics
+    
+    logging.disable(logging.INFO)
+    
+    metrics = StageMetrics(enabled=args.metrics_port is not None)
+    metrics_server = start_metrics_server(args, lambda: metrics_stats(metrics))
+    
+    try:
+        with metrics.stage("evaluate_file"):
+            value = StreamingEvaluator().evaluate_file(args.evaluate_file)
+        result = CalculationResult.success(args.evaluate_file, format_decimal(value))
+    except CalculatorError as e:
+        result = CalculationResult.failure(
+            args.evaluate_file, e.error_code, getattr(e, 'position', None)
+        )
+    except (ArithmeticError, ValueError) as e:
+        result = CalculationResult.failure(args.evaluate_file, "CALCULATION_ERROR")
+    
+    if metrics.enabled:
+        metrics.record_outcome(result.error_code)
+    if metrics_server is not None:
+        metrics_server.stop()
+    print(json.dumps(result.to_dict(), ensure_ascii=False))
+    return 0 if result.ok else 1
+
+def run_profiled(args: argparse.Namespace) -> int:
+    from utils.profiling import SessionProfiler
+    
+    profiler = SessionProfiler(args.profile, args.profile_mode, args.profile_interval / 1000)
+    with profiler:
+        exit_code = run(args)
+    
+    # stdout có thể đang chứa kết quả JSON của chế độ hàng loạt
+    print(f"📈 Profile: {profiler.pstats_path}, {profiler.collapsed_path}", file=sys.stderr)
+    return exit_code
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    
+    if args.trace:
+        from utils.tracing import configure_tracing
+        configure_tracing(args.trace, args.trace_sample)
+    
+    if args.profile:
+        return run_profiled(args)
+    
+    return run(args)
+
+def run(args: argparse.Namespace) -> int:
+    if args.batch:
+        return run_batch(args)
+    
+    if args.evaluate_file:
+        return run_evaluate_file(args)
+    
+    if args.serve:
+        return run_service(args)
+    
     print("🚀 Khởi động Calculator Application...")
     
     try:
@@ -18,7 +249,16 @@ def main():
         logger.info("Calculator starting...")
         
         print("🎮 Tạo giao diện...")
-        calculator_app = CalculatorMainWindow()
+        calculator_app = CalculatorMainWindow(
+            result_cache_path=args.result_cache,
+            metrics_port=args.metrics_port,
+            record_path=args.record,
+            inline_evaluation=args.profile is not None
+        )
+        if calculator_app.metrics_server is not None:
+            print(f"📊 Metrics: {calculator_app.metrics_server.url}")
+        if calculator_app.recorder is not None:
+            print(f"⏺️ Đang ghi phiên vào {args.record}")
         
         print("🎯 Bắt đầu GUI loop...")
         calculator_app.run()
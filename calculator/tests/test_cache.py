@@ -0,0 +1,27 @@
+import logging
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.cache import PersistentResultCache
+from core.calculator import CalculatorEngine
+
+logging.disable(logging.CRITICAL)
+
+class ResultCacheStatsTest(unittest.TestCase):
+    def test_precheck_miss_is_not_counted_twice(self):
+        cache = PersistentResultCache(":memory:")
+        engine = CalculatorEngine(cache)
+        
+        # Kiểm tra trước khi gửi sang worker rồi worker tính: chỉ là một lần trượt
+        self.assertIsNone(engine.precheck_calculation('1+2'))
+        self.assertEqual(engine.try_calculate_expression('1+2').value, '3')
+        self.assertEqual(engine.precheck_calculation('1+2').value, '3')
+        
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import logging
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.cache import PersistentResultCache
+from core.canonical import ExpressionCanonicalizer
+from core.parser import ExpressionParser, SafeCalculatorEngine
+
+logging.disable(logging.CRITICAL)
+
+LARGE = '9999999999*9999999999*9999999999'
+
+class ExpressionCanonicalizerTest(unittest.TestCase):
+    def setUp(self):
+        self.canonicalizer = ExpressionCanonicalizer(ExpressionParser())
+    
+    def test_rounded_chain_keeps_order(self):
+        # Với 28 chữ số, (0-A)+A+1 = 1 nhưng (0-A)+1+A = 0: hai biểu thức không được trùng khóa
+        first = f'(0-{LARGE})+{LARGE}+1'
+        second = f'(0-{LARGE})+1+{LARGE}'
+        self.assertNotEqual(self.canonicalizer.canonicalize(first), self.canonicalizer.canonicalize(second))
+        
+        engine = SafeCalculatorEngine(PersistentResultCache(":memory:"))
+        self.assertEqual(engine.try_calculate(first).value, '1')
+        self.assertEqual(engine.try_calculate(second).value, '0')
+    
+    def test_exact_integer_chain_is_reordered(self):
+        self.assertEqual(self.canonicalizer.canonicalize('3 + 1 + 2'), '1+2+3')
+        self.assertEqual(self.canonicalizer.canonicalize('4*(3*2)'), '2*3*4')
+        self.assertEqual(self.canonicalizer.canonicalize('007 × 2'), '2*7')
+    
+    def test_inexact_operands_keep_order(self):
+        self.assertEqual(self.canonicalizer.canonicalize('0.20+0.1'), '0.2+0.1')
+        self.assertEqual(self.canonicalizer.canonicalize('1-(2-3)'), '1-(2-3)')
+
+if __name__ == "__main__":
+    unittest.main()
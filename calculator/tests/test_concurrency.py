@@ -0,0 +1,107 @@
+import logging
+import os
+import random
+import sys
+import threading
+import unittest
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpora import load_corpora
+from core.pool import EnginePool
+from core.stateless import StatelessCalculator, evaluate
+
+logging.disable(logging.CRITICAL)
+
+THREADS = 8
+ITERATIONS = 3
+SWITCH_INTERVAL = 1e-6  # đổi thread thường xuyên để lộ race condition
+
+class ConcurrencyTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        corpora = load_corpora()
+        cls.expressions = corpora['short'] + corpora['functions'] + corpora['errors']
+        
+        # Kết quả tuần tự trên một calculator riêng là chuẩn để so sánh
+        calculator = StatelessCalculator()
+        cls.expected = {}
+        for expression in cls.expressions:
+            result = calculator.evaluate(expression)
+            cls.expected[expression] = (result.value, result.error_code)
+    
+    def setUp(self):
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(SWITCH_INTERVAL)
+        self.failures = []
+        self._lock = threading.Lock()
+    
+    def tearDown(self):
+        sys.setswitchinterval(self._switch_interval)
+    
+    def fail_later(self, message: str) -> None:
+        with self._lock:
+            self.failures.append(message)
+    
+    def run_threads(self, target) -> None:
+        def guarded(seed: int) -> None:
+            try:
+                target(seed)
+            except Exception as e:
+                self.fail_later(f"thread {seed}: {type(e).__name__}: {e}")
+        
+        threads = [threading.Thread(target=guarded, args=(seed,)) for seed in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(self.failures[:10], [])
+    
+    def check_results(self, evaluate_one, seed: int) -> None:
+        rng = random.Random(seed)
+        for _ in range(ITERATIONS):
+            for expression in rng.sample(self.expressions, len(self.expressions)):
+                result = evaluate_one(expression)
+                if (result.value, result.error_code) != self.expected[expression]:
+                    self.fail_later(f"{expression!r} = {(result.value, result.error_code)}, "
+                                    f"mong đợi {self.expected[expression]}")
+    
+    def test_module_evaluate_matches_sequential(self):
+        self.run_threads(lambda seed: self.check_results(evaluate, seed))
+    
+    def test_pool_evaluate_matches_sequential(self):
+        pool = EnginePool(4)
+        self.run_threads(lambda seed: self.check_results(pool.evaluate, seed))
+    
+    def test_pool_sessions_do_not_share_state(self):
+        pool = EnginePool(3)
+        successful = [expression for expression in self.expressions
+                      if self.expected[expression][1] is None and expression.strip()]
+        
+        def session_worker(seed: int) -> None:
+            rng = random.Random(seed)
+            for _ in range(ITERATIONS * 4):
+                with pool.session() as engine:
+                    if engine.history.history or engine.last_result != "0" or engine.memory_recall() != "0":
+                        self.fail_later("engine mượn từ pool còn trạng thái của phiên trước")
+                    
+                    # Bộ nhớ và kết quả cuối của mỗi phiên chỉ được chứa giá trị của chính thread này
+                    engine.memory_store(str(seed))
+                    chosen = rng.sample(successful, 5)
+                    for expression in chosen:
+                        engine.calculate_expression(expression)
+                        if engine.last_result != self.expected[expression][0]:
+                            self.fail_later(f"last_result {engine.last_result!r} sau {expression!r}")
+                    
+                    if Decimal(engine.memory_recall()) != seed:
+                        self.fail_later(f"bộ nhớ của thread {seed} thành {engine.memory_recall()}")
+                    if len(engine.history.history) != len(chosen):
+                        self.fail_later(f"lịch sử có {len(engine.history.history)} mục, mong đợi {len(chosen)}")
+        
+        self.run_threads(session_worker)
+        self.assertLessEqual(pool.get_stats()['created'], 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import logging
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.parser import SafeCalculatorEngine
+from core.streaming import StreamingEvaluator
+
+logging.disable(logging.CRITICAL)
+
+class CostEstimatorTest(unittest.TestCase):
+    def test_long_product_is_accepted(self):
+        # Tích dài vượt giới hạn float nhưng Decimal làm tròn về độ chính xác của context: vẫn rẻ
+        expression = '*'.join(['99999'] * 900)
+        
+        result = SafeCalculatorEngine().try_calculate(expression)
+        expected = StreamingEvaluator().try_evaluate(expression)
+        
+        self.assertTrue(result.ok, result.error_code)
+        self.assertTrue(expected.ok, expected.error_code)
+        self.assertEqual(result.value, expected.value)
+    
+    def test_large_factorial_is_rejected(self):
+        result = SafeCalculatorEngine().try_calculate('fact(5000)')
+        self.assertEqual(result.error_code, 'BUDGET_EXCEEDED')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import random
+import re
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.editor import ExpressionBuffer
+
+KEYS = '0123456789.+-*/() '
+
+def last_number(text: str) -> str:
+    # Mô hình chuỗi: số cuối cùng là đoạn không chứa phép toán đứng cuối, bỏ qua phép toán ở đuôi
+    return re.split(r'[+\-*/\s]', re.sub(r'[+\-*/\s]+$', '', text))[-1]
+
+class ExpressionBufferTest(unittest.TestCase):
+    def assert_matches(self, buffer: ExpressionBuffer, text: str) -> None:
+        self.assertEqual(buffer.text, text)
+        self.assertEqual(len(buffer), len(text))
+        self.assertEqual(bool(buffer), bool(text))
+        self.assertEqual(buffer.last_char, text[-1:])
+        self.assertEqual(''.join(buffer.tokens), text)
+        self.assertEqual(buffer.last_number(), last_number(text))
+        self.assertEqual(buffer.last_number_has_decimal, '.' in last_number(text))
+    
+    def test_random_edits_match_string_model(self):
+        rng = random.Random(38)
+        buffer = ExpressionBuffer()
+        text = ""
+        
+        for _ in range(20000):
+            action = rng.random()
+            if action < 0.7:
+                chars = ''.join(rng.choice(KEYS) for _ in range(rng.randint(1, 3)))
+                buffer.append(chars)
+                text += chars
+            elif action < 0.9:
+                self.assertEqual(buffer.pop(), text[-1:])
+                text = text[:-1]
+            elif action < 0.98:
+                buffer.toggle_sign()
+                text = text[1:] if text.startswith('-') else '-' + text
+            else:
+                text = ''.join(rng.choice(KEYS) for _ in range(rng.randint(0, 20)))
+                buffer.set_text(text)
+            
+            self.assert_matches(buffer, text)
+    
+    def test_pop_decimal_point_clears_flag(self):
+        buffer = ExpressionBuffer("1.5+2.")
+        self.assertTrue(buffer.last_number_has_decimal)
+        buffer.pop()
+        self.assertFalse(buffer.last_number_has_decimal)
+        buffer.pop()
+        self.assertTrue(buffer.last_number_has_decimal)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import logging
+import os
+import sys
+import unittest
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import worker
+from core.batch import BatchEvaluator
+from core.worker import evaluate_in_worker, initialize_worker
+from utils.metrics import StageMetrics
+from utils.prometheus import CONTENT_TYPE, MetricsServer
+
+logging.disable(logging.CRITICAL)
+
+class StageMetricsTest(unittest.TestCase):
+    def test_worker_timings_merge_into_parent(self):
+        # Engine của worker được tạo lại để nhận cấu hình metrics mới
+        worker._engine = None
+        initialize_worker(metrics_enabled=True)
+        parent = StageMetrics(enabled=True)
+        
+        for expression in ('1+2', '3*4', '5/0'):
+            result, timings = evaluate_in_worker(expression)
+            parent.record_outcome(result.error_code)
+            parent.merge(timings)
+        
+        stages = parent.snapshot()
+        self.assertEqual(stages['total']['count'], 3)
+        self.assertEqual(stages['parse']['count'], 3)
+        self.assertEqual(parent.counter_snapshot()['calculations'], {'ok': 2, 'error': 1})
+        
+        # Worker đã chuyển hết số đo nên lần gửi sau chỉ chứa phép tính mới
+        _, timings = evaluate_in_worker('7-1')
+        self.assertEqual(timings['total'].count, 1)
+    
+    def test_batch_worker_timings_merge_into_metrics(self):
+        metrics = StageMetrics(enabled=True)
+        evaluator = BatchEvaluator(use_processes=False, metrics=metrics)
+        
+        results = evaluator.evaluate_all(['1+2', '3*4', '5/0'])
+        
+        self.assertEqual([result.value for result in results], ['3', '12', None])
+        self.assertEqual(metrics.snapshot()['total']['count'], 3)
+        self.assertEqual(metrics.snapshot()['parse']['count'], 3)
+    
+    def test_metrics_server_exposition(self):
+        metrics = StageMetrics(enabled=True)
+        metrics.record("total", 1500)
+        metrics.record_outcome(None)
+        metrics.record_outcome("DIVISION_BY_ZERO")
+        
+        server = MetricsServer(
+            lambda: {'stages': metrics.snapshot(), 'counters': metrics.counter_snapshot()},
+            host="127.0.0.1", port=0
+        )
+        server.start()
+        try:
+            with urllib.request.urlopen(server.url, timeout=5) as response:
+                content_type = response.headers['Content-Type']
+                body = response.read().decode('utf-8')
+        finally:
+            server.stop()
+        
+        self.assertEqual(content_type, CONTENT_TYPE)
+        lines = body.splitlines()
+        self.assertIn('# TYPE calculator_calculations_total counter', lines)
+        self.assertIn('calculator_calculations_total{outcome="ok"} 1', lines)
+        self.assertIn('calculator_calculations_total{outcome="error"} 1', lines)
+        self.assertIn('calculator_errors_total{error_code="DIVISION_BY_ZERO"} 1', lines)
+        self.assertIn('calculator_stage_duration_seconds_count{stage="total"} 1', lines)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.service import EvaluationService
+
+logging.disable(logging.CRITICAL)
+
+PIPELINE = 2
+REQUESTS = 20
+TIMEOUT_SECONDS = 5
+
+class _DisconnectedWriter:
+    # Client đã đóng kết nối: lần drain đầu tiên báo lỗi như socket thật
+    def __init__(self):
+        self.closed = False
+    
+    def write(self, data: bytes) -> None:
+        pass
+    
+    async def drain(self) -> None:
+        raise ConnectionResetError("client disconnected")
+    
+    def close(self) -> None:
+        self.closed = True
+
+class ServiceConnectionTest(unittest.TestCase):
+    def test_disconnect_with_full_pipeline(self):
+        asyncio.run(self._disconnect_with_full_pipeline())
+    
+    async def _disconnect_with_full_pipeline(self):
+        service = EvaluationService("unused.sock", max_pipeline=PIPELINE, inline=True)
+        
+        # Client gửi dồn nhiều yêu cầu hơn hàng đợi chứa được rồi ngắt kết nối
+        reader = asyncio.StreamReader()
+        reader.feed_data(b'{"id": 1, "expression": "1+1"}\n' * REQUESTS)
+        reader.feed_eof()
+        writer = _DisconnectedWriter()
+        
+        try:
+            await asyncio.wait_for(service._handle_connection(reader, writer), TIMEOUT_SECONDS)
+        finally:
+            service.result_cache.close()
+        
+        self.assertEqual(service.connections, 0)
+        self.assertTrue(writer.closed)
+        self.assertLess(service.metrics.counter_snapshot()['calculations']['ok'], REQUESTS)
+
+if __name__ == '__main__':
+    unittest.main()
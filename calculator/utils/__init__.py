@@ -10,9 +10,14 @@ try:
         CalculatorError, ExpressionSyntaxError, DivisionByZeroError,
         NumberOverflowError, NumberUnderflowError, InvalidOperationError,
         ExpressionTooLongError, InvalidCharacterError, EmptyExpressionError,
-        ParsingError, CalculationError
+        ParsingError, CalculationError, EvaluationBudgetExceededError
     )
     from utils.logger import get_logger, CalculatorLogger, logged
+    from utils.metrics import StageMetrics, LatencyHistogram
+    from utils.prometheus import MetricsServer, render_prometheus
+    from utils.tracing import Tracer, get_tracer, configure_tracing, traced
+    from utils.profiling import SessionProfiler, SamplingProfiler
+    from utils.recording import SessionRecorder, RecordedEvent, load_recording
 except ImportError:
     # Fallback for direct execution
     from utils.constants import *
@@ -20,9 +25,14 @@ except ImportError:
         CalculatorError, ExpressionSyntaxError, DivisionByZeroError,
         NumberOverflowError, NumberUnderflowError, InvalidOperationError,
         ExpressionTooLongError, InvalidCharacterError, EmptyExpressionError,
-        ParsingError, CalculationError
+        ParsingError, CalculationError, EvaluationBudgetExceededError
     )
     from utils.logger import get_logger, CalculatorLogger, logged
+    from utils.metrics import StageMetrics, LatencyHistogram
+    from utils.prometheus import MetricsServer, render_prometheus
+    from utils.tracing import Tracer, get_tracer, configure_tracing, traced
+    from utils.profiling import SessionProfiler, SamplingProfiler
+    from utils.recording import SessionRecorder, RecordedEvent, load_recording
 
 __all__ = [
     # Constants (tất cả từ constants.py)
@@ -33,8 +43,20 @@ __all__ = [
     'CalculatorError', 'ExpressionSyntaxError', 'DivisionByZeroError',
     'NumberOverflowError', 'NumberUnderflowError', 'InvalidOperationError',
     'ExpressionTooLongError', 'InvalidCharacterError', 'EmptyExpressionError',
-    'ParsingError', 'CalculationError',
+    'ParsingError', 'CalculationError', 'EvaluationBudgetExceededError',
     
     # Logger
-    'get_logger', 'CalculatorLogger', 'logged'
+    'get_logger', 'CalculatorLogger', 'logged',
+    
+    # Metrics
+    'StageMetrics', 'LatencyHistogram', 'MetricsServer', 'render_prometheus',
+    
+    # Tracing
+    'Tracer', 'get_tracer', 'configure_tracing', 'traced',
+    
+    # Profiling
+    'SessionProfiler', 'SamplingProfiler',
+    
+    # Recording
+    'SessionRecorder', 'RecordedEvent', 'load_recording'
 ]
\ No newline at end of file
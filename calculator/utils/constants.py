@@ -39,12 +39,35 @@ BUTTON_PADDING = 5
 BUTTON_HEIGHT = 2
 BUTTON_WIDTH = 5
 DISPLAY_HEIGHT = 2
+HISTORY_VISIBLE_ROWS = 10
+
+# Tác vụ nền (nhập/xuất lịch sử)
+BACKGROUND_POLL_INTERVAL = 20  # ms giữa các lần kiểm tra kết quả từ worker thread
+BACKGROUND_QUEUE_SIZE = 8
+BACKGROUND_MESSAGES_PER_POLL = 4
+EVALUATION_POLL_INTERVAL = 10  # ms giữa các lần kiểm tra kết quả tính toán nền
+PREVIEW_DEBOUNCE_MS = 60  # chờ người dùng ngừng gõ trước khi tính kết quả xem trước
+PREVIEW_MAX_SECONDS = 0.01
+HISTORY_IMPORT_BATCH_SIZE = 2000
+HISTORY_EXPORT_CHUNK_SIZE = 2000
 
 # Toán tử và ký tự hợp lệ
 OPERATORS: List[str] = ['+', '-', '*', '/', '(', ')']
 NUMBERS: List[str] = ['0', '1', '2', '3', '4', '5', '6', '7', '8', '9']
 SPECIAL_CHARS: List[str] = ['.', 'C', '=', 'CE', '±', '%']
 
+# Các ký tự thay thế cho toán tử (chuẩn hóa về dạng chuẩn)
+OPERATOR_ALIASES: Dict[str, str] = {
+    'x': '*',
+    'X': '*',
+    '×': '*',
+    '÷': '/',
+    ':': '/',
+    '−': '-',
+    '–': '-',
+    '—': '-',
+}
+
 # Button layout configuration
 BUTTON_LAYOUT: List[List[str]] = [
     ['CE', 'C', '±', '/'],
@@ -85,6 +108,56 @@ MAX_DECIMAL_PLACES = 10
 MAX_NUMBER_VALUE = 1e10
 MIN_NUMBER_VALUE = -1e10
 
+# Ngân sách tính toán cho mỗi biểu thức
+MAX_EVAL_DIGITS = 4000
+MAX_EVAL_OPERATIONS = 100000
+MAX_EVAL_DEPTH = 1000
+MAX_EVAL_SECONDS = 2.0
+
+# Đo thời gian từng bước tính toán (CalculatorEngine.get_stats)
+METRICS_ENABLED = False
+METRICS_HOST = "127.0.0.1"  # endpoint Prometheus chỉ lắng nghe trên máy cục bộ
+
+# Tracing (Chrome Trace Event JSON, bật bằng --trace)
+TRACE_SAMPLE_RATE = 1.0  # tỉ lệ phép tính gốc được ghi lại
+TRACE_MAX_EVENTS = 100000
+TRACE_ARG_MAX_LENGTH = 200
+TRACE_WORKER_FLUSH_SECONDS = 2.0  # worker ghi trace ra file tối đa một lần mỗi khoảng này
+
+# Profile cả phiên làm việc (bật bằng --profile)
+PROFILE_MODES = ["cprofile", "sampling"]
+PROFILE_SAMPLE_INTERVAL = 0.005  # giây giữa hai lần lấy mẫu stack
+PROFILE_MAX_DEPTH = 200
+
+# Ghi lại phím bấm của phiên GUI (bật bằng --record) và phát lại bằng benchmarks/replay.py
+RECORDING_FORMAT_VERSION = 1
+REPLAY_MAX_GAP = 1.0  # giây: khoảng nghỉ dài hơn giữa hai phím bị rút ngắn khi phát lại theo nhịp
+REPLAY_GUI_TIMEOUT = 10.0  # giây chờ tối đa phép tính nền khi phát lại trên GUI
+
+# Chế độ biểu thức lớn (streaming, bỏ qua MAX_EXPRESSION_LENGTH)
+LARGE_EXPRESSION_MAX_LENGTH = 16 * 1024 * 1024  # ký tự
+LARGE_EXPRESSION_MAX_DEPTH = 10000  # số cấp ngoặc lồng nhau
+LARGE_EXPRESSION_MAX_SECONDS = 120.0
+LARGE_EXPRESSION_CHUNK_SIZE = 64 * 1024
+
+# Chạy hàng loạt: biểu thức nặng chạy trên worker riêng để không chặn biểu thức nhẹ
+BATCH_WORKERS = 4
+BATCH_HEAVY_WORKERS = 1
+BATCH_HEAVY_THRESHOLD = 100000  # đơn vị công việc ước lượng bởi CostEstimator
+
+# Pool engine cho server nhiều thread (core.pool.EnginePool)
+ENGINE_POOL_SIZE = 8
+
+# Snapshot phiên (CalculatorSession.snapshot): số mục lịch sử gần nhất được giữ lại
+SESSION_SNAPSHOT_HISTORY = 20
+
+# Dịch vụ tính toán qua Unix socket (JSON mỗi dòng, bật bằng --serve)
+SERVICE_HEAVY_WORKERS = 2
+SERVICE_HEAVY_THRESHOLD = BATCH_HEAVY_THRESHOLD
+SERVICE_MAX_PIPELINE = 256  # số yêu cầu chưa trả lời tối đa trên mỗi kết nối
+SERVICE_MAX_LINE_BYTES = 1024 * 1024
+SERVICE_SOCKET_MODE = 0o660
+
 # Error messages
 ERROR_MESSAGES = {
     "syntax_error": "Lỗi cú pháp trong biểu thức",
@@ -97,6 +170,31 @@ ERROR_MESSAGES = {
     "empty_expression": "Biểu thức trống"
 }
 
+# Result cache (tùy chọn, lưu trên đĩa giữa các phiên)
+EVALUATOR_VERSION = "1"  # Tăng khi thay đổi logic tính toán để vô hiệu hóa cache cũ
+NUMERIC_BACKEND = "decimal"
+RESULT_CACHE_FILE = "calculator_cache.db"
+RESULT_CACHE_MAX_ENTRIES = 10000
+RESULT_CACHE_WARM_ENTRIES = 1000
+RESULT_CACHE_FLUSH_INTERVAL = 32
+SHARED_CACHE_WARM_ENTRIES = 256
+SHARED_CACHE_BUSY_TIMEOUT = 5.0  # giây chờ khi process khác đang ghi
+
+# Cache các biểu thức bị từ chối (lỗi lặp lại được trả về ngay)
+REJECTED_CACHE_MAX_ENTRIES = 1000
+
+# Thông báo lỗi hiển thị cho người dùng theo error_code
+USER_ERROR_MESSAGES = {
+    "SYNTAX_ERROR": "Lỗi cú pháp",
+    "DIVISION_BY_ZERO": "Không thể chia cho 0",
+    "NUMBER_OVERFLOW": "Số quá lớn",
+    "NUMBER_UNDERFLOW": "Số quá nhỏ",
+    "INVALID_OPERATION": "Phép toán không hợp lệ",
+    "EMPTY_EXPRESSION": "0",
+    "BUDGET_EXCEEDED": "Biểu thức quá phức tạp",
+    "UNEXPECTED_ERROR": "Lỗi không xác định"
+}
+
 # Logging configuration
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -116,9 +116,10 @@ class ParsingError(CalculatorError):
     """
     Exception được raise khi không thể parse biểu thức
     """
-    def __init__(self, expression: str, reason: str = ""):
+    def __init__(self, expression: str, reason: str = "", position: Optional[int] = None):
         self.expression = expression
         self.reason = reason
+        self.position = position
         message = f"Không thể phân tích biểu thức: '{expression}'"
         if reason:
             message += f". Lý do: {reason}"
@@ -138,4 +139,17 @@ class CalculationError(CalculatorError):
             message += f" tại bước: {step}"
         if original_error:
             message += f". Lỗi gốc: {str(original_error)}"
-        super().__init__(message, "CALCULATION_ERROR")
\ No newline at end of file
+        super().__init__(message, "CALCULATION_ERROR")
+
+
+class EvaluationBudgetExceededError(CalculatorError):
+    """
+    Exception được raise khi biểu thức vượt quá ngân sách tính toán
+    (số chữ số, số phép toán, độ sâu hoặc thời gian)
+    """
+    def __init__(self, resource: str, value: float, limit: float):
+        self.resource = resource
+        self.value = value
+        self.limit = limit
+        message = f"Biểu thức vượt quá giới hạn {resource}: {value:g} > {limit:g}"
+        super().__init__(message, "BUDGET_EXCEEDED")
\ No newline at end of file
@@ -0,0 +1,172 @@
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Optional, ContextManager, Tuple
+
+from utils.constants import METRICS_ENABLED
+
+# 4 bucket con cho mỗi lũy thừa của 2: sai số tương đối của phân vị tối đa ~12.5%
+SUB_BUCKET_BITS = 2
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+BUCKET_COUNT = SUB_BUCKETS * 64
+
+class LatencyHistogram:
+    __slots__ = ('counts', 'count', 'total_ns', 'min_ns', 'max_ns')
+    
+    def __init__(self):
+        self.counts: List[int] = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = 0
+        self.max_ns = 0
+    
+    def record(self, duration_ns: int) -> None:
+        if duration_ns < 0:
+            duration_ns = 0
+        
+        self.counts[self._bucket(duration_ns)] += 1
+        self.total_ns += duration_ns
+        
+        if self.count == 0 or duration_ns < self.min_ns:
+            self.min_ns = duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+        self.count += 1
+    
+    def percentile(self, fraction: float) -> float:
+        if self.count == 0:
+            return 0.0
+        
+        rank = max(1, int(fraction * self.count + 0.5))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                low, high = self._bounds(index)
+                value = (low + high) / 2
+                return min(max(value, self.min_ns), self.max_ns)
+        
+        return float(self.max_ns)
+    
+    def merge(self, other: 'LatencyHistogram') -> None:
+        for index, bucket_count in enumerate(other.counts):
+            self.counts[index] += bucket_count
+        
+        if other.count:
+            self.min_ns = other.min_ns if self.count == 0 else min(self.min_ns, other.min_ns)
+            self.max_ns = max(self.max_ns, other.max_ns)
+        self.count += other.count
+        self.total_ns += other.total_ns
+    
+    def snapshot(self) -> Dict[str, float]:
+        mean = self.total_ns / self.count if self.count else 0.0
+        return {
+            'count': self.count,
+            'mean_us': mean / 1000,
+            'p50_us': self.percentile(0.50) / 1000,
+            'p95_us': self.percentile(0.95) / 1000,
+            'p99_us': self.percentile(0.99) / 1000,
+            'max_us': self.max_ns / 1000
+        }
+    
+    @staticmethod
+    def _bucket(value: int) -> int:
+        if value < SUB_BUCKETS:
+            return value
+        
+        exponent = value.bit_length() - SUB_BUCKET_BITS - 1
+        return min(exponent * SUB_BUCKETS + (value >> exponent), BUCKET_COUNT - 1)
+    
+    @staticmethod
+    def _bounds(index: int) -> tuple:
+        if index < SUB_BUCKETS:
+            return index, index
+        
+        exponent, mantissa = divmod(index, SUB_BUCKETS)
+        mantissa += SUB_BUCKETS
+        exponent -= 1
+        return mantissa << exponent, ((mantissa + 1) << exponent) - 1
+
+class StageMetrics:
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.counters: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+    
+    def enable(self) -> None:
+        self.enabled = True
+    
+    def disable(self) -> None:
+        self.enabled = False
+    
+    def record(self, stage: str, duration_ns: int) -> None:
+        # Engine dùng chung giữa các thread ghi vào cùng histogram; "+=" không nguyên tử
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = LatencyHistogram()
+            histogram.record(duration_ns)
+    
+    def increment(self, name: str, label: str = "", amount: int = 1) -> None:
+        key = (name, label)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+    
+    def record_outcome(self, error_code: Optional[str]) -> None:
+        if error_code is None:
+            self.increment("calculations", "ok")
+        else:
+            self.increment("calculations", "error")
+            self.increment("errors", error_code)
+    
+    def lap(self, stage: str, start_ns: int) -> int:
+        # Ghi thời gian từ start_ns đến hiện tại và trả về mốc mới cho bước tiếp theo
+        now = time.perf_counter_ns()
+        self.record(stage, now - start_ns)
+        return now
+    
+    def stage(self, name: str) -> ContextManager[None]:
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name)
+    
+    @contextmanager
+    def _timed(self, name: str) -> Iterator[None]:
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter_ns() - start)
+    
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms = {}
+            self.counters = {}
+    
+    def drain(self) -> Dict[str, LatencyHistogram]:
+        # Trả về các histogram đã ghi và bắt đầu lại: dùng để chuyển số đo từ worker về process chính
+        with self._lock:
+            histograms, self.histograms = self.histograms, {}
+        return histograms
+    
+    def merge(self, histograms: Dict[str, LatencyHistogram]) -> None:
+        with self._lock:
+            for stage, other in histograms.items():
+                histogram = self.histograms.get(stage)
+                if histogram is None:
+                    histogram = self.histograms[stage] = LatencyHistogram()
+                histogram.merge(other)
+    
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: histogram.snapshot() for name, histogram in sorted(self.histograms.items())}
+    
+    def counter_snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            items = sorted(self.counters.items())
+        
+        counters: Dict[str, Dict[str, int]] = {}
+        for (name, label), value in items:
+            counters.setdefault(name, {})[label] = value
+        return counters
@@ -0,0 +1,159 @@
+import cProfile
+import marshal
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+from utils.constants import PROFILE_MODES, PROFILE_SAMPLE_INTERVAL, PROFILE_MAX_DEPTH
+from utils.logger import get_logger
+
+FrameKey = Tuple[str, int, str]
+
+class SamplingProfiler:
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL, max_depth: int = PROFILE_MAX_DEPTH):
+        self.logger = get_logger("SamplingProfiler")
+        self.interval = interval
+        self.max_depth = max_depth
+        
+        # Mỗi stack lưu từ gốc đến lá, phần tử đầu là tên thread
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="SamplingProfiler", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+    
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        
+        while not self._stop_event.wait(self.interval):
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                
+                stack.reverse()
+                self.stacks[(thread_names.get(ident, str(ident)),) + tuple(stack)] += 1
+            
+            self.samples += 1
+    
+    def collapsed_lines(self):
+        for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1]):
+            frames = [stack[0]] + [
+                f"{name} ({os.path.basename(filename)}:{line})" for filename, line, name in stack[1:]
+            ]
+            yield f"{';'.join(frame.replace(';', ',') for frame in frames)} {count}"
+    
+    def write_collapsed(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as handle:
+            for line in self.collapsed_lines():
+                handle.write(line + "\n")
+    
+    def to_pstats(self) -> Dict[FrameKey, Tuple[Any, ...]]:
+        # Dựng bảng theo định dạng của pstats: mỗi mẫu được tính là `interval` giây
+        stats: Dict[FrameKey, list] = {}
+        
+        for stack, count in self.stacks.items():
+            frames = stack[1:]
+            if not frames:
+                continue
+            
+            elapsed = count * self.interval
+            seen = set()
+            caller = None
+            
+            for frame in frames:
+                entry = stats.setdefault(frame, [0, 0, 0.0, 0.0, {}])
+                if frame not in seen:
+                    seen.add(frame)
+                    entry[0] += count
+                    entry[1] += count
+                    entry[3] += elapsed
+                
+                if caller is not None:
+                    edge = entry[4].get(caller, (0, 0, 0.0, 0.0))
+                    entry[4][caller] = (edge[0] + count, edge[1] + count, edge[2], edge[3] + elapsed)
+                caller = frame
+            
+            stats[frames[-1]][2] += elapsed
+            last_edge = stats[frames[-1]][4]
+            if len(frames) > 1:
+                edge = last_edge[frames[-2]]
+                last_edge[frames[-2]] = (edge[0], edge[1], edge[2] + elapsed, edge[3])
+        
+        return {frame: tuple(entry) for frame, entry in stats.items()}
+    
+    def write_pstats(self, path: str) -> None:
+        with open(path, 'wb') as handle:
+            marshal.dump(self.to_pstats(), handle)
+
+class SessionProfiler:
+    def __init__(self, path: str, mode: str = "cprofile", interval: float = PROFILE_SAMPLE_INTERVAL):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Chế độ profile không hợp lệ: {mode}")
+        
+        self.logger = get_logger("SessionProfiler")
+        self.mode = mode
+        
+        root, extension = os.path.splitext(path)
+        if extension not in ('.pstats', '.prof'):
+            root = path
+        self.pstats_path = f"{root}.pstats"
+        self.collapsed_path = f"{root}.folded"
+        
+        # Sampler luôn chạy để có collapsed stack của mọi thread; cProfile chỉ đo thread chính
+        self.sampler = SamplingProfiler(interval)
+        self.profile = cProfile.Profile() if mode == "cprofile" else None
+    
+    def start(self) -> None:
+        self.sampler.start()
+        if self.profile is not None:
+            self.profile.enable()
+    
+    def stop(self) -> Tuple[str, str]:
+        if self.profile is not None:
+            self.profile.disable()
+        self.sampler.stop()
+        
+        if self.profile is not None:
+            self.profile.dump_stats(self.pstats_path)
+        else:
+            self.sampler.write_pstats(self.pstats_path)
+        self.sampler.write_collapsed(self.collapsed_path)
+        
+        self.logger.info(
+            f"Profile written to {self.pstats_path} and {self.collapsed_path} "
+            f"({self.sampler.samples} samples)"
+        )
+        return self.pstats_path, self.collapsed_path
+    
+    def __enter__(self) -> 'SessionProfiler':
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
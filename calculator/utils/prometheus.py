@@ -0,0 +1,136 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.constants import METRICS_HOST
+from utils.logger import get_logger
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRIC_PREFIX = "calculator"
+QUANTILES = (('0.5', 'p50_us'), ('0.95', 'p95_us'), ('0.99', 'p99_us'))
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(**labels: str) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+def render_prometheus(stats: Dict[str, Any]) -> str:
+    lines: List[str] = []
+    
+    def metric(name: str, kind: str, help_text: str) -> str:
+        full_name = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {kind}")
+        return full_name
+    
+    counters = stats.get('counters', {})
+    
+    name = metric("calculations_total", "counter", "Calculations by outcome")
+    for outcome in ('ok', 'error'):
+        lines.append(f"{name}{_labels(outcome=outcome)} {counters.get('calculations', {}).get(outcome, 0)}")
+    
+    name = metric("errors_total", "counter", "Failed calculations by error_code")
+    for error_code, value in counters.get('errors', {}).items():
+        lines.append(f"{name}{_labels(error_code=error_code)} {value}")
+    
+    name = metric("stage_duration_seconds", "summary", "Duration of each calculation stage")
+    for stage, snapshot in stats.get('stages', {}).items():
+        for quantile, key in QUANTILES:
+            lines.append(f"{name}{_labels(stage=stage, quantile=quantile)} {snapshot[key] / 1e6:.9f}")
+        lines.append(f"{name}_sum{_labels(stage=stage)} {snapshot['mean_us'] * snapshot['count'] / 1e6:.9f}")
+        lines.append(f"{name}_count{_labels(stage=stage)} {snapshot['count']}")
+    
+    caches = {'rejected': stats.get('rejected_cache'), 'result': stats.get('result_cache')}
+    caches = {cache: cache_stats for cache, cache_stats in caches.items() if cache_stats}
+    
+    name = metric("cache_hits_total", "counter", "Cache hits")
+    for cache, cache_stats in caches.items():
+        lines.append(f"{name}{_labels(cache=cache)} {cache_stats['hits']}")
+    
+    name = metric("cache_misses_total", "counter", "Cache misses")
+    for cache, cache_stats in caches.items():
+        lines.append(f"{name}{_labels(cache=cache)} {cache_stats['misses']}")
+    
+    name = metric("cache_hit_ratio", "gauge", "Cache hit ratio since start")
+    for cache, cache_stats in caches.items():
+        lines.append(f"{name}{_labels(cache=cache)} {cache_stats['hit_rate']:.6f}")
+    
+    name = metric("history_size", "gauge", "Entries in calculation history")
+    lines.append(f"{name} {stats.get('history_size', 0)}")
+    
+    return "\n".join(lines) + "\n"
+
+class MetricsServer:
+    def __init__(self, stats_provider: Callable[[], Dict[str, Any]],
+                 host: str = METRICS_HOST, port: int = 0):
+        self.logger = get_logger("MetricsServer")
+        self.stats_provider = stats_provider
+        self.host = host
+        self.requested_port = port
+        
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def port(self) -> Optional[int]:
+        return self._server.server_address[1] if self._server is not None else None
+    
+    @property
+    def url(self) -> Optional[str]:
+        return f"http://{self.host}:{self.port}/metrics" if self._server is not None else None
+    
+    def start(self) -> None:
+        if self._server is not None:
+            return
+        
+        self._server = ThreadingHTTPServer((self.host, self.requested_port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="MetricsServer", daemon=True
+        )
+        self._thread.start()
+        self.logger.info(f"Metrics endpoint listening on {self.url}")
+    
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
+        self.logger.info("Metrics endpoint stopped")
+    
+    def render(self) -> str:
+        return render_prometheus(self.stats_provider())
+    
+    def _make_handler(self) -> type:
+        server = self
+        
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                
+                try:
+                    body = server.render().encode('utf-8')
+                except Exception as e:
+                    server.logger.error(f"Rendering metrics failed: {str(e)}")
+                    self.send_error(500)
+                    return
+                
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format: str, *args) -> None:
+                server.logger.debug(format % args)
+        
+        return MetricsHandler
@@ -0,0 +1,93 @@
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, IO, List, NamedTuple, Optional
+
+from utils.constants import APP_VERSION, RECORDING_FORMAT_VERSION
+from utils.logger import get_logger
+
+class RecordedEvent(NamedTuple):
+    time: float  # giây kể từ lúc bắt đầu ghi
+    source: str  # 'button', 'key' hoặc 'memory'
+    value: str  # giá trị nút ('7', '+', '=', 'CE', 'MS'...) hoặc 'cancel' khi Esc hủy phép tính
+    keysym: Optional[str] = None
+
+class SessionRecorder:
+    def __init__(self, path: str):
+        self.logger = get_logger("SessionRecorder")
+        self.path = path
+        self.events = 0
+        
+        # Ghi theo từng dòng để bản ghi vẫn dùng được khi ứng dụng bị dừng đột ngột
+        self._handle: Optional[IO[str]] = open(path, 'w', encoding='utf-8', buffering=1)
+        self._origin = time.perf_counter()
+        self._write({
+            'type': 'session',
+            'version': RECORDING_FORMAT_VERSION,
+            'app_version': APP_VERSION,
+            'started': datetime.now().isoformat()
+        })
+    
+    def record(self, source: str, value: str, keysym: Optional[str] = None) -> None:
+        if self._handle is None:
+            return
+        
+        event: Dict[str, Any] = {
+            't': round(time.perf_counter() - self._origin, 6),
+            'source': source,
+            'value': value
+        }
+        if keysym is not None:
+            event['keysym'] = keysym
+        
+        self._write(event)
+        self.events += 1
+    
+    def _write(self, payload: Dict[str, Any]) -> None:
+        try:
+            self._handle.write(json.dumps(payload, ensure_ascii=False) + "\n")
+        except OSError as e:
+            self.logger.error(f"Writing recording to {self.path} failed: {str(e)}")
+            self.close()
+    
+    def close(self) -> None:
+        if self._handle is None:
+            return
+        
+        handle, self._handle = self._handle, None
+        try:
+            handle.close()
+        except OSError as e:
+            self.logger.error(f"Closing recording {self.path} failed: {str(e)}")
+        self.logger.info(f"Recorded {self.events} input events to {self.path}")
+    
+    def __enter__(self) -> 'SessionRecorder':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+def load_recording(path: str) -> List[RecordedEvent]:
+    events = []
+    
+    with open(path, 'r', encoding='utf-8') as handle:
+        for line_number, line in enumerate(handle, 1):
+            line = line.strip()
+            if not line:
+                continue
+            
+            try:
+                payload = json.loads(line)
+                if payload.get('type') == 'session':
+                    if payload.get('version') != RECORDING_FORMAT_VERSION:
+                        raise ValueError(f"phiên bản {payload.get('version')} không được hỗ trợ")
+                    continue
+                
+                events.append(RecordedEvent(
+                    float(payload['t']), payload['source'], payload['value'], payload.get('keysym')
+                ))
+            
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                raise ValueError(f"Bản ghi {path} không hợp lệ ở dòng {line_number}: {str(e)}") from e
+    
+    return events
@@ -0,0 +1,196 @@
+import atexit
+import functools
+import json
+import multiprocessing.util
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from utils.constants import (
+    TRACE_SAMPLE_RATE, TRACE_MAX_EVENTS, TRACE_ARG_MAX_LENGTH, TRACE_WORKER_FLUSH_SECONDS
+)
+from utils.logger import get_logger
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start_ns', 'recording')
+    
+    def __init__(self, tracer: 'Tracer', name: str, category: str, args: Optional[Dict[str, Any]]):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start_ns = 0
+        self.recording = False
+    
+    def __enter__(self) -> '_Span':
+        self.recording = self.tracer._enter()
+        self.start_ns = time.perf_counter_ns()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        end_ns = time.perf_counter_ns()
+        if self.recording:
+            if exc_type is not None:
+                self.args = dict(self.args or {}, error=exc_type.__name__)
+            self.tracer._record(self, end_ns)
+        self.tracer._exit()
+
+class _NullSpan:
+    def __enter__(self) -> '_NullSpan':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        return None
+
+_NULL_SPAN = _NullSpan()
+
+class Tracer:
+    def __init__(self, path: Optional[str] = None, sample_rate: float = TRACE_SAMPLE_RATE,
+                 max_events: int = TRACE_MAX_EVENTS, flush_interval: Optional[float] = None):
+        self.logger = get_logger("Tracer")
+        self.path = path
+        self.sample_rate = sample_rate
+        # Mỗi lần flush ghi lại cả file: chỉ flush tự động sau mỗi khoảng thời gian, không theo từng span
+        self.flush_interval = flush_interval
+        self._next_flush = time.monotonic() if flush_interval is not None else None
+        self.enabled = path is not None and sample_rate > 0
+        
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self.sampled_roots = 0
+        self.skipped_roots = 0
+        
+        self._origin_ns = time.perf_counter_ns()
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._random = random.Random()
+    
+    def span(self, name: str, category: str = "calculator",
+             args: Optional[Dict[str, Any]] = None) -> Any:
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, args)
+    
+    def _enter(self) -> bool:
+        local = self._local
+        depth = getattr(local, 'depth', 0)
+        
+        # Quyết định lấy mẫu một lần cho span gốc; mọi span con theo quyết định đó
+        if depth == 0:
+            local.sampled = self._random.random() < self.sample_rate
+            if local.sampled:
+                self.sampled_roots += 1
+            else:
+                self.skipped_roots += 1
+        
+        local.depth = depth + 1
+        return local.sampled
+    
+    def _exit(self) -> None:
+        local = self._local
+        local.depth -= 1
+        
+        if (local.depth == 0 and local.sampled and self._next_flush is not None
+                and time.monotonic() >= self._next_flush):
+            self.flush()
+    
+    def _record(self, span: _Span, end_ns: int) -> None:
+        event = {
+            'name': span.name,
+            'cat': span.category,
+            'ph': 'X',
+            'ts': (span.start_ns - self._origin_ns) / 1000,
+            'dur': (end_ns - span.start_ns) / 1000,
+            'pid': self._pid,
+            'tid': threading.get_ident()
+        }
+        if span.args:
+            event['args'] = span.args
+        
+        with self._lock:
+            self.events.append(event)
+    
+    def flush(self) -> None:
+        if self.path is None:
+            return
+        
+        with self._lock:
+            events = list(self.events)
+            if self.flush_interval is not None:
+                self._next_flush = time.monotonic() + self.flush_interval
+        
+        trace = {'traceEvents': events, 'displayTimeUnit': 'ms'}
+        temporary_path = f"{self.path}.tmp"
+        
+        try:
+            with open(temporary_path, 'w', encoding='utf-8') as handle:
+                json.dump(trace, handle)
+            os.replace(temporary_path, self.path)
+        except OSError as e:
+            self.logger.error(f"Writing trace to {self.path} failed: {str(e)}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'sample_rate': self.sample_rate,
+            'sampled_roots': self.sampled_roots,
+            'skipped_roots': self.skipped_roots,
+            'events': len(self.events)
+        }
+
+_tracer = Tracer()
+_atexit_registered = False
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+def configure_tracing(path: Optional[str], sample_rate: float = TRACE_SAMPLE_RATE,
+                      flush_interval: Optional[float] = None) -> Tracer:
+    global _tracer, _atexit_registered
+    
+    if _tracer.enabled:
+        _tracer.flush()
+    
+    _tracer = Tracer(path, sample_rate, flush_interval=flush_interval)
+    
+    if path is not None and not _atexit_registered:
+        atexit.register(lambda: _tracer.flush())
+        _atexit_registered = True
+    
+    return _tracer
+
+def worker_trace_path(path: str) -> str:
+    # Mỗi worker process ghi file riêng để không ghi đè trace của process chính
+    root, extension = os.path.splitext(path)
+    return f"{root}.worker-{{pid}}{extension or '.json'}"
+
+def configure_worker_tracing(path_template: str, sample_rate: float) -> None:
+    tracer = configure_tracing(path_template.format(pid=os.getpid()), sample_rate, TRACE_WORKER_FLUSH_SECONDS)
+    
+    # Process con của multiprocessing thoát bằng os._exit nên atexit không chạy; finalizer thì có
+    # (trừ khi pool bị terminate, khi đó chỉ mất các span từ lần flush định kỳ cuối cùng)
+    multiprocessing.util.Finalize(tracer, tracer.flush, exitpriority=0)
+
+def trace_argument(value: str) -> str:
+    if len(value) <= TRACE_ARG_MAX_LENGTH:
+        return value
+    return value[:TRACE_ARG_MAX_LENGTH] + f"... ({len(value)} ký tự)"
+
+def traced(name: str, category: str = "calculator",
+           args: Optional[Callable[..., Dict[str, Any]]] = None):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*call_args, **call_kwargs):
+            tracer = _tracer
+            if not tracer.enabled:
+                return func(*call_args, **call_kwargs)
+            
+            span_args = args(*call_args, **call_kwargs) if args is not None else None
+            with _Span(tracer, name, category, span_args):
+                return func(*call_args, **call_kwargs)
+        
+        return wrapper
+    return decorator